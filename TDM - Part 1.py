@@ -2,37 +2,31 @@
 # TDM - Part 1: Defensive Data Preparation
 # ======================================
 
-import pandas as pd
-import numpy as np
+from frame_backend import clean_pff, merge_all, to_pandas
 
 BASE = "/Users/anokhpalakurthi/Downloads/"
 
-def safe_divide(n, d):
-    return np.where(d > 0, n / d, 0)
+# Each export is a lazy plan on the Polars backend (one fused scan → merge),
+# eager pandas otherwise; ratios are safe divides (0 when the base is 0)
 
 # Pass Rush
-pass_rush = pd.read_csv(BASE + "pass_rush_summary.csv")
 keep = [
     "player","team_name","position",
     "snap_counts_pass_rush","sacks","hits","hurries","total_pressures",
     "pass_rush_win_rate","prp","grades_pass_rush_defense","grades_defense",
     "pass_rush_wins"
 ]
-pass_rush = pass_rush[[c for c in keep if c in pass_rush.columns]].rename(columns={
+pass_rush = clean_pff(BASE + "pass_rush_summary.csv", keep=keep, missing_ok=True, rename={
     "player":"Player","team_name":"Team","position":"Position",
     "snap_counts_pass_rush":"PassRushSnaps","sacks":"Sacks","hits":"Hits",
     "hurries":"Hurries","total_pressures":"Pressures",
     "pass_rush_win_rate":"WinRate","prp":"PRP",
     "grades_pass_rush_defense":"PFF_PassRushGrade",
     "grades_defense":"PFF_DefenseGrade","pass_rush_wins":"PassRushWins"
-})
-pass_rush["PressureRate"] = safe_divide(pass_rush["Pressures"], pass_rush["PassRushSnaps"])
-for c in [c for c in pass_rush.columns if "Rate" in c or "PRP" in c]:
-    if pass_rush[c].max() > 1: pass_rush[c] /= 100
-pass_rush.fillna(0, inplace=True)
+}, ratios={"PressureRate": ("Pressures", "PassRushSnaps")}, safe_ratios=True, drop_inf=False,
+   rate_keys=("Rate", "PRP"))
 
 # Coverage
-coverage = pd.read_csv(BASE + "defense_coverage_summary.csv")
 keep = [
     "player","team_name","position","snap_counts_coverage",
     "targets","receptions","yards","touchdowns",
@@ -40,7 +34,7 @@ keep = [
     "grades_coverage_defense","grades_defense",
     "interceptions","pass_break_ups"
 ]
-coverage = coverage[[c for c in keep if c in coverage.columns]].rename(columns={
+coverage = clean_pff(BASE + "defense_coverage_summary.csv", keep=keep, missing_ok=True, rename={
     "player":"Player","team_name":"Team","position":"Position",
     "snap_counts_coverage":"CoverageSnaps",
     "targets":"Targets","receptions":"ReceptionsAllowed",
@@ -50,19 +44,16 @@ coverage = coverage[[c for c in keep if c in coverage.columns]].rename(columns={
     "grades_coverage_defense":"PFF_CoverageGrade",
     "grades_defense":"PFF_DefenseGrade",
     "interceptions":"INTs","pass_break_ups":"PBUs"
-})
-coverage["YardsPerTarget"] = safe_divide(coverage["YardsAllowed"], coverage["Targets"])
-coverage.fillna(0, inplace=True)
+}, ratios={"YardsPerTarget": ("YardsAllowed", "Targets")}, safe_ratios=True, drop_inf=False, rate_keys=())
 
 # Run Defense
-run = pd.read_csv(BASE + "run_defense_summary.csv")
 keep = [
     "player","team_name","position","snap_counts_run",
     "stops","missed_tackles","missed_tackle_rate",
     "stop_percent","grades_run_defense","grades_defense",
     "forced_fumbles","tackles"
 ]
-run = run[[c for c in keep if c in run.columns]].rename(columns={
+run = clean_pff(BASE + "run_defense_summary.csv", keep=keep, missing_ok=True, rename={
     "player":"Player","team_name":"Team","position":"Position",
     "snap_counts_run":"RunDefenseSnaps",
     "stops":"Stops","missed_tackles":"MissedTackles",
@@ -70,14 +61,10 @@ run = run[[c for c in keep if c in run.columns]].rename(columns={
     "grades_run_defense":"PFF_RunDefenseGrade",
     "grades_defense":"PFF_DefenseGrade",
     "forced_fumbles":"ForcedFumbles","tackles":"Tackles"
-})
-for c in [c for c in run.columns if "Rate" in c or "Percent" in c]:
-    if run[c].max() > 1: run[c] /= 100
-run.fillna(0, inplace=True)
+}, drop_inf=False)
 
 # Merge and Clean
-tdm = pass_rush.merge(coverage, on=["Player","Team","Position"], how="outer") \
-               .merge(run, on=["Player","Team","Position"], how="outer")
+tdm = to_pandas(merge_all([pass_rush, coverage, run], ["Player","Team","Position"], how="outer"))
 
 for col in ["PFF_DefenseGrade_x","PFF_DefenseGrade_y"]:
     if col in tdm.columns:
@@ -4,22 +4,42 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+from diagnostics import print_collinearity
+from dtypes import memory_report, read_compact
+from figures import figure_spec, render_figures
+from frame_backend import merge_all
+from opponent_adjust import adjust_for_opponent, load_game_logs
+from runtime import DIAGNOSTICS, FIGURES, REPORT
+from scoring_kernel import TDM_POS_MAP
+from shrinkage import shrink_domain
+from standardize import composite_parts, group_zscore, save_group_stats
 
 BASE = "/Users/anokhpalakurthi/Downloads/"
-passrush = pd.read_csv(BASE + "PassRush_PFF_Clean.csv")
-coverage = pd.read_csv(BASE + "Coverage_PFF_Clean.csv")
-rundef   = pd.read_csv(BASE + "RunDefense_PFF_Clean.csv")
+passrush = read_compact(BASE + "PassRush_PFF_Clean.csv")
+coverage = read_compact(BASE + "Coverage_PFF_Clean.csv")
+rundef   = read_compact(BASE + "RunDefense_PFF_Clean.csv")
+memory_report("TDM Part 2", "ingest", passrush=passrush, coverage=coverage, rundef=rundef)
+
+# Opponent adjustment (only when game logs are present)
+game_logs = load_game_logs()
+if game_logs is not None:
+    passrush = adjust_for_opponent(passrush, "passrush", game_logs)
+    coverage = adjust_for_opponent(coverage, "coverage", game_logs)
+    rundef   = adjust_for_opponent(rundef,   "rundef",   game_logs)
+
+# Empirical-Bayes shrinkage of rate stats toward position-group means (before z-scores)
+passrush, pri_pr  = shrink_domain(passrush, "passrush", TDM_POS_MAP)
+coverage, pri_cov = shrink_domain(coverage, "coverage", TDM_POS_MAP)
+rundef,   pri_run = shrink_domain(rundef,   "rundef",   TDM_POS_MAP)
+pd.concat([pri_pr, pri_cov, pri_run], ignore_index=True).to_csv(BASE + "TDM_Shrinkage_Priors.csv", index=False)
 
 # Detect correct base (prefer PlayerAgg)
 if os.path.exists(BASE + "TDM_Base_PlayerAgg.csv"):
-    base = pd.read_csv(BASE + "TDM_Base_PlayerAgg.csv")
+    base = read_compact(BASE + "TDM_Base_PlayerAgg.csv")
     key = ["Player", "Position"] 
 else:
-    base = pd.read_csv(BASE + "TDM_Base_TeamLinked.csv")
+    base = read_compact(BASE + "TDM_Base_TeamLinked.csv")
     key = ["Player", "Team", "Position"]
 
 # Ensure snap columns present
@@ -30,19 +50,27 @@ for col in snap_cols:
 base = base[key + snap_cols]
 
 # Z-Score and Directional Normalization
-def zscore_cols(df, cols, negate_cols=None):
-    df = df.copy()
+# Within position groups (ED/DI/LB/CB/S), league-wide fallback for thin groups;
+# stats are for the sign-flipped values and saved for online scoring.
+SNAP_WEIGHTED = False
+std_stats = []
+
+def zscore_cols(df, cols, negate_cols=None, domain=None, weight_col=None):
     cols = [c for c in cols if c in df.columns]
     if not cols:
-        return df, pd.Series(dtype=float)
+        return df[["Position"]].copy(), pd.Series(dtype=float)
+    # copy only what this stage touches (position, features, weight), not the whole table
+    use_w = weight_col if SNAP_WEIGHTED and weight_col in df.columns else None
+    df = df[list(dict.fromkeys(["Position"] + cols + ([use_w] if use_w else [])))].copy()
 
     if negate_cols:
         for c in negate_cols:
             if c in df.columns:
                 df[c] = -df[c]
 
-    scaler = StandardScaler()
-    df[cols] = scaler.fit_transform(df[cols])
+    df["PositionGroup"] = df["Position"].map(TDM_POS_MAP).fillna("Other")
+    df[cols], stats = group_zscore(df, cols, "PositionGroup", use_w)
+    std_stats.append(stats.assign(Domain=domain))
     comp = df[cols].mean(axis=1)
     return df, comp
 
@@ -69,21 +97,39 @@ run_cols = [
 ]
 run_negate = ["MissedTackles", "MissedTackleRate"]
 
+# Raw-feature multicollinearity (sign flips don't change VIFs)
+if DIAGNOSTICS:
+    print_collinearity("Pass Rush features", passrush, pr_cols)
+    print_collinearity("Coverage features", coverage, cov_cols)
+    print_collinearity("Run Defense features", rundef, run_cols)
+
 # Z-Scores
-_, pr_comp  = zscore_cols(passrush, pr_cols)
-_, cov_comp = zscore_cols(coverage, cov_cols, negate_cols=cov_negate)
-_, run_comp = zscore_cols(rundef,   run_cols,  negate_cols=run_negate)
+pr_z,  pr_comp  = zscore_cols(passrush, pr_cols, domain="PassRush", weight_col="PassRushSnaps")
+cov_z, cov_comp = zscore_cols(coverage, cov_cols, negate_cols=cov_negate, domain="Coverage", weight_col="CoverageSnaps")
+run_z, run_comp = zscore_cols(rundef,   run_cols,  negate_cols=run_negate, domain="RunDefense", weight_col="RunDefenseSnaps")
+save_group_stats(pd.concat(std_stats, ignore_index=True), BASE + "TDM_Standardization_Stats.csv")
 
 passrush["PassRushScore_raw"]   = pr_comp
 coverage["CoverageScore_raw"]   = cov_comp
 rundef["RunDefenseScore_raw"]   = run_comp
 
+# Per-feature shares of each composite ("<Domain>Score:<feature>"); they go
+# through the same averaging, snap weighting and minimums as the scores
+parts = {}
+for dom, table, z, cols in [("PassRush", passrush, pr_z, pr_cols),
+                            ("Coverage", coverage, cov_z, cov_cols),
+                            ("RunDefense", rundef, run_z, run_cols)]:
+    p = composite_parts(z, [c for c in cols if c in z.columns], f"{dom}Score")
+    for c in p.columns:
+        table[c] = p[c]
+    parts[dom] = list(p.columns)
+
 # Merge Domain Tables
-merged = (
-    passrush[key + ["PassRushScore_raw"]]
-    .merge(coverage[key + ["CoverageScore_raw"]], on=key, how="outer")
-    .merge(rundef[key + ["RunDefenseScore_raw"]], on=key, how="outer")
-)
+merged = merge_all([
+    passrush[key + ["PassRushScore_raw"] + parts["PassRush"]],
+    coverage[key + ["CoverageScore_raw"] + parts["Coverage"]],
+    rundef[key + ["RunDefenseScore_raw"] + parts["RunDefense"]],
+], on=key)
 
 # Collapse duplicates
 merged = merged.groupby(key, as_index=False).mean(numeric_only=True)
@@ -110,15 +156,16 @@ for dom, snap_col in [
     merged[f"{dom}Weight"] = np.where(merged["TotalSnaps"] > 0,
                                       merged[snap_col] / merged["TotalSnaps"], 0.0)
     merged[f"{dom}Score"]  = merged.get(f"{dom}Score_raw", 0.0) * merged[f"{dom}Weight"]
+    merged[parts[dom]] = merged[parts[dom]].mul(merged[f"{dom}Weight"], axis=0)
 
 # Domain Minimums
 MIN_PR  = 75
 MIN_COV = 150
 MIN_RUN = 100
 
-merged.loc[merged["PassRushSnaps"]   < MIN_PR,  "PassRushScore"]  = 0.0
-merged.loc[merged["CoverageSnaps"]   < MIN_COV, "CoverageScore"]  = 0.0
-merged.loc[merged["RunDefenseSnaps"] < MIN_RUN, "RunDefenseScore"]= 0.0
+merged.loc[merged["PassRushSnaps"]   < MIN_PR,  ["PassRushScore"] + parts["PassRush"]]  = 0.0
+merged.loc[merged["CoverageSnaps"]   < MIN_COV, ["CoverageScore"] + parts["Coverage"]]  = 0.0
+merged.loc[merged["RunDefenseSnaps"] < MIN_RUN, ["RunDefenseScore"] + parts["RunDefense"]]= 0.0
 
 # Overall defensive snap floor
 SNAP_FLOOR = 200
@@ -147,19 +194,17 @@ out_cols = key + [
     "PassRushSnaps","CoverageSnaps","RunDefenseSnaps","TotalSnaps",
     "PassRushScore","CoverageScore","RunDefenseScore"
 ]
+memory_report("TDM Part 2", "merged", base=merged)
 merged[out_cols].to_csv(BASE + "TDM_Base_Weighted.csv", index=False)
+# Row-aligned with the weighted base; each domain's feature shares sum to its score
+merged[key + [c for dom in parts for c in parts[dom]]].to_csv(BASE + "TDM_Feature_Contributions.csv", index=False)
 print(f"\n Exported weighted base ({merged.shape[0]} rows): {BASE}TDM_Base_Weighted.csv")
 
 # Vizualization
-try:
-    plt.figure(figsize=(9, 5))
-    sns.violinplot(
-        data=merged[["PassRushScore","CoverageScore","RunDefenseScore"]],
-        inner="box", cut=0, palette="coolwarm"
-    )
-    plt.title("Distribution of Weighted Defensive Domain Scores (Player-Normalized, Post-Filters)")
-    plt.axhline(0, color="gray", ls="--", lw=1)
-    plt.tight_layout()
-    plt.show()
-except Exception as e:
-    print("(Info) Visualization skipped:", e)
\ No newline at end of file
+if FIGURES:
+    render_figures([
+        figure_spec("TDM_Domain_Distributions", "violin",
+                    merged[["PassRushScore","CoverageScore","RunDefenseScore"]], figsize=(9, 5),
+                    palette="coolwarm",
+                    title="Distribution of Weighted Defensive Domain Scores (Player-Normalized, Post-Filters)"),
+    ], BASE, report=REPORT)
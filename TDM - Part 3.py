@@ -2,63 +2,89 @@
 # TDM - Part 3: Ridge Modeling vs Defensive DVOA (Aligned & Snap-Weighted)
 # ======================================
 
-import pandas as pd, numpy as np, matplotlib.pyplot as plt, seaborn as sns
-from sklearn.linear_model import RidgeCV
-from sklearn.preprocessing import StandardScaler
-from statsmodels.stats.outliers_influence import variance_inflation_factor
+import pandas as pd, numpy as np
+from diagnostics import bootstrap_collinearity, print_collinearity
+from dtypes import memory_report, read_compact
+from figures import figure_spec, render_figures
+from runtime import DIAGNOSTICS, FIGURES, OUT_OF_CORE, REPORT, SHARED, USE_DVOA_PROXY
+from shared_features import frame_arrays, publish
+from teams import fix_teams, load_dvoa
+if OUT_OF_CORE:
+    from out_of_core import merge_on, team_aggregate
 
 BASE = "/Users/anokhpalakurthi/Downloads/"
 TDM_PATH = BASE + "TDM_Base_Weighted.csv"
 TEAM_MAP_PATH = BASE + "TDM_Base_TeamLinked.csv"
-DVOA_PATH = BASE + "Defensive DVOA.csv"
+DVOA_PATH = BASE + ("Defensive DVOA Proxy.csv" if USE_DVOA_PROXY else "Defensive DVOA.csv")
 
-# Load and Team Map
-tdm = pd.read_csv(TDM_PATH)
+# Load and Team Map (out-of-core: linked bucket by bucket on Player, aggregated below)
 team_map = pd.read_csv(TEAM_MAP_PATH)[["Player", "Team"]].drop_duplicates()
-tdm = tdm.merge(team_map, on="Player", how="left")
-
-# Loading and Cleaning DVOA
-dvoa = pd.read_csv(DVOA_PATH)
-dvoa.columns = dvoa.columns.str.strip().str.upper()
-dvoa.rename(columns={
-    "TEAM": "Team",
-    "DVOA": "DefensiveDVOA",
-    "PASS": "PassDefenseDVOA",
-    "RUSH": "RushDefenseDVOA"
-}, inplace=True)
-dvoa = dvoa[["Team","DefensiveDVOA","PassDefenseDVOA","RushDefenseDVOA"]]
-
-# Normalize abbreviations
-fix = {"ARZ":"ARI","BLT":"BAL","CLV":"CLE","HST":"HOU","SF":"SFO","LA":"LAR"}
-tdm["Team"] = tdm["Team"].replace(fix).replace({"SFO":"SF"})
-dvoa["Team"] = dvoa["Team"].replace(fix).replace({"SFO":"SF"})
+if OUT_OF_CORE:
+    tdm = None
+    linked = merge_on(TDM_PATH, team_map, ["Player"], "left", "tdm_linked")
+else:
+    tdm = read_compact(TDM_PATH)
+    tdm = tdm.merge(team_map, on="Player", how="left")
+    memory_report("TDM Part 3", "ingest", base=tdm)
+
+# Loading DVOA
+dvoa = load_dvoa(DVOA_PATH, "def")
+
+# Normalize abbreviations (teams.TEAM_FIX)
+if tdm is not None:
+    tdm["Team"] = fix_teams(tdm["Team"])
 
 # Team-Level Snap Weight Agg
 domains = ["PassRushScore","CoverageScore","RunDefenseScore"]
 
-for dom in domains:
-    tdm[f"{dom}_Weighted"] = tdm[dom] * tdm["TotalSnaps"]
+if tdm is not None:
+    for dom in domains:
+        tdm[f"{dom}_Weighted"] = tdm[dom] * tdm["TotalSnaps"]
 
-team = (
-    tdm.groupby("Team", as_index=False)
-       .agg({f"{d}_Weighted": "sum" for d in domains} | {"TotalSnaps": "sum"})
-)
+    team = (
+        tdm.groupby("Team", as_index=False)
+           .agg({f"{d}_Weighted": "sum" for d in domains} | {"TotalSnaps": "sum"})
+    )
 
-for dom in domains:
-    team[dom] = team[f"{dom}_Weighted"] / team["TotalSnaps"]
+    for dom in domains:
+        team[dom] = team[f"{dom}_Weighted"] / team["TotalSnaps"]
+    n_teams = tdm["Team"].nunique()
+else:
+    team = team_aggregate(linked, domains, weight_col="TotalSnaps",
+                          transform=lambda p: p.assign(Team=fix_teams(p["Team"])))
+    n_teams = len(team)
+    memory_report("TDM Part 3", "ingest", team=team)
 
 team = team[["Team"] + domains]
 
 # DVOA Merge
 merged = team.merge(dvoa, on="Team", how="inner")
-print(f"Merged to {len(merged)} team rows (expected 32).")
+print(f"Merged to {len(merged)} team rows ({n_teams} teams in the player table).")
 
 # Invert DVOA so higher = better defense
 for col in ["DefensiveDVOA","PassDefenseDVOA","RushDefenseDVOA"]:
     merged[col + "_Positive"] = -merged[col]
 
+# Publish model matrices for parallel workers
+if SHARED and tdm is None:
+    print("(Info) Shared features skipped: out-of-core run holds no player table")
+elif SHARED:
+    try:
+        targets = ["DefensiveDVOA_Positive", "PassDefenseDVOA_Positive", "RushDefenseDVOA_Positive"]
+        arrays = frame_arrays(tdm, domains, prefix="player_") | frame_arrays(merged, domains, ["Team"], prefix="team_")
+        arrays["player_team"] = pd.Index(merged["Team"]).get_indexer(tdm["Team"]).astype(np.int32)
+        arrays["player_snaps"] = tdm["TotalSnaps"].to_numpy(dtype=np.float64)
+        arrays["team_y"] = merged[targets].to_numpy(dtype=np.float64)
+        arrays["team_y_columns"] = np.array(targets, dtype=str)
+        publish("tdm", arrays)
+        print("Shared feature matrices published (shared_features.attach(\"tdm\"))")
+    except Exception as e:
+        print(f"(Info) Shared features skipped: {e}")
+
 # Ridge Stuff
 def fit_ridge(X_df, y, alphas=np.logspace(-3, 3, 200)):
+    from sklearn.linear_model import RidgeCV
+    from sklearn.preprocessing import StandardScaler
     scaler = StandardScaler()
     Xs = scaler.fit_transform(X_df)
     ridge = RidgeCV(alphas=alphas, store_cv_results=True).fit(Xs, y)
@@ -97,65 +123,41 @@ print("\nAll-Phase Ridge Coefficients")
 print(coefs_all.round(3))
 print(f"R²={r2_all:.3f} | MAE={mae_all:.3f}")
 
-# Visualize Coefficients
-try:
-    res_df = pd.DataFrame([
-        {"Model":"Split - PassDef","Metric":k,"Weight":v} for k,v in coefs_pass.items()
-    ] + [
-        {"Model":"Split - RushDef","Metric":k,"Weight":v} for k,v in coefs_rush.items()
-    ] + [
-        {"Model":"All-Phase (Defense)","Metric":k,"Weight":v} for k,v in coefs_all.items()
-    ])
-
-    plt.figure(figsize=(12,6))
-    sns.barplot(data=res_df, x="Metric", y="Weight", hue="Model", palette="viridis")
-    plt.title("Defensive Ridge Coefficients (Split & All-Phase)", fontsize=14, weight="bold")
-    plt.axhline(0, color="black", lw=1)
-    plt.grid(axis="y", ls="--", alpha=0.6)
-    plt.tight_layout()
-    plt.show()
-except Exception as e:
-    print("(Info) Coefficient viz skipped:", e)
-
-# Predicted vs. Actual Plots
-try:
-    plt.figure(figsize=(6,5))
-    sns.regplot(x=y_all, y=yhat_all, scatter_kws={'s':70}, line_kws={'color':'red'})
-    plt.xlabel("Actual Defensive DVOA (+)")
-    plt.ylabel("Predicted Defensive DVOA (+)")
-    plt.title("Ridge Model Fit – All Defense")
-    plt.grid(True, ls="--", alpha=0.5)
-    plt.tight_layout()
-    plt.show()
-except Exception as e:
-    print("(Info) Regression fit plot skipped:", e)
+# Visualize Coefficients + Predicted vs. Actual
+res_df = pd.DataFrame([
+    {"Model":"Split - PassDef","Metric":k,"Weight":v} for k,v in coefs_pass.items()
+] + [
+    {"Model":"Split - RushDef","Metric":k,"Weight":v} for k,v in coefs_rush.items()
+] + [
+    {"Model":"All-Phase (Defense)","Metric":k,"Weight":v} for k,v in coefs_all.items()
+])
+figs = [
+    figure_spec("TDM_Ridge_Coefficients", "coef_bars", res_df, figsize=(12, 6), palette="viridis",
+                title="Defensive Ridge Coefficients (Split & All-Phase)"),
+    figure_spec("TDM_Ridge_Fit_AllDefense", "regplot",
+                pd.DataFrame({"Actual": y_all, "Predicted": yhat_all}),
+                xlabel="Actual Defensive DVOA (+)", ylabel="Predicted Defensive DVOA (+)",
+                title="Ridge Model Fit – All Defense"),
+]
 
 # =====================================================
 # Multicollinearity Diagnostics
 # =====================================================
-print("\nMulticollinearity Diagnostics")
-
-X_for_vif = merged[domains]
-X_scaled = pd.DataFrame(StandardScaler().fit_transform(X_for_vif), columns=X_for_vif.columns)
-vif_df = pd.DataFrame({
-    "Variable": X_scaled.columns,
-    "VIF": [variance_inflation_factor(X_scaled.values, i) for i in range(X_scaled.shape[1])]
-})
-print("\nVariance Inflation Factors:")
-print(vif_df.round(3))
-
-corr = X_for_vif.corr().round(2)
-print("\nCorrelation Matrix:")
-print(corr)
-
-try:
-    plt.figure(figsize=(6,5))
-    sns.heatmap(corr, annot=True, cmap="coolwarm", center=0, fmt=".2f")
-    plt.title("Correlation Matrix of Domain Scores")
-    plt.tight_layout()
-    plt.show()
-except Exception as e:
-    print("(Info) Correlation heatmap skipped:", e)
+if DIAGNOSTICS:
+    print("\nMulticollinearity Diagnostics")
+
+    rep = print_collinearity("Team Domain Scores", merged, domains)
+
+    # Bootstrap over teams: how stable are the VIFs with only ~32 rows?
+    vif_boot, cond_boot = bootstrap_collinearity(merged, domains)
+    print("\nBootstrap VIF Bands (500 team resamples):")
+    print(vif_boot.round(3).to_string(index=False))
+    print(cond_boot.round(2).to_string())
+
+    corr = rep["corr"].round(2)
+
+    figs.append(figure_spec("TDM_Domain_Correlation", "heatmap", corr.reset_index(),
+                            title="Correlation Matrix of Domain Scores"))
 
 # =====================================================
 # Export Ridge Weights
@@ -167,4 +169,7 @@ weights_df = pd.concat([
 ], ignore_index=True)
 
 weights_df.to_csv(BASE + "TDM_Calibrated_Weights_SplitPhase.csv", index=False)
-print(f"\nExported Ridge Weights → {BASE}TDM_Calibrated_Weights_SplitPhase.csv")
\ No newline at end of file
+print(f"\nExported Ridge Weights → {BASE}TDM_Calibrated_Weights_SplitPhase.csv")
+
+if FIGURES:
+    render_figures(figs, BASE, report=REPORT)
@@ -3,142 +3,110 @@
 # ======================================
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import os
+from dtypes import memory_report, read_compact
+from figures import figure_spec, render_figures
+from permutation import correlation_table, print_correlation_table
+from runtime import FIGURES, OUT_OF_CORE, REPORT, SEASON, STORE, USE_DVOA_PROXY
+from score_store import DB_PATH, write_season
+from scoring_kernel import TDM_PASS_NEED, TDM_RUSH_NEED, coef_map, score_tdm
+from teams import fix_teams, load_dvoa
+if OUT_OF_CORE:
+    from out_of_core import SPILL_DIR, merge_on, partition, score_aggregate
 
 BASE = "/Users/anokhpalakurthi/Downloads/"
 TDM_PATH = BASE + "TDM_Base_Weighted.csv"
 PLAYERAGG_PATH = BASE + "TDM_Base_PlayerAgg.csv"
-DVOA_PATH = BASE + "Defensive DVOA.csv"
+DVOA_PATH = BASE + ("Defensive DVOA Proxy.csv" if USE_DVOA_PROXY else "Defensive DVOA.csv")
 WEIGHTS_PATH = BASE + "TDM_Calibrated_Weights_SplitPhase.csv"
 
-# Load
-tdm = pd.read_csv(TDM_PATH)
-dvoa = pd.read_csv(DVOA_PATH)
+# Load (out-of-core: the base table is only streamed into partitions below)
+tdm = None if OUT_OF_CORE else read_compact(TDM_PATH)
+dvoa = load_dvoa(DVOA_PATH, "def")
 weights = pd.read_csv(WEIGHTS_PATH)
 
 # Team Identifiers
-if "Team" not in tdm.columns:
-    playeragg = pd.read_csv(PLAYERAGG_PATH)[["Player", "PrimaryTeam"]]
-    tdm = tdm.merge(playeragg, on="Player", how="left")
-    tdm.rename(columns={"PrimaryTeam": "Team"}, inplace=True)
-
-# Clean DVOA
-dvoa.columns = dvoa.columns.str.strip().str.upper()
-dvoa.rename(columns={
-    "TEAM": "Team",
-    "DVOA": "DefensiveDVOA",
-    "PASS": "PassDefenseDVOA",
-    "RUSH": "RushDefenseDVOA"
-}, inplace=True)
-dvoa = dvoa[["Team", "DefensiveDVOA", "PassDefenseDVOA", "RushDefenseDVOA"]]
-
-# Standardize Names
-fix = {"ARZ": "ARI", "BLT": "BAL", "CLV": "CLE", "HST": "HOU", "LA": "LAR"}
-tdm["Team"] = tdm["Team"].replace(fix)
-dvoa["Team"] = dvoa["Team"].replace(fix)
+if tdm is not None:
+    memory_report("TDM Part 4", "ingest", base=tdm)
+    if "Team" not in tdm.columns:
+        playeragg = pd.read_csv(PLAYERAGG_PATH)[["Player", "PrimaryTeam"]]
+        tdm = tdm.merge(playeragg, on="Player", how="left")
+        tdm.rename(columns={"PrimaryTeam": "Team"}, inplace=True)
+elif "Team" not in pd.read_csv(TDM_PATH, nrows=0).columns:
+    playeragg = pd.read_csv(PLAYERAGG_PATH)[["Player", "PrimaryTeam"]].rename(columns={"PrimaryTeam": "Team"})
+    spill = merge_on(TDM_PATH, playeragg, ["Player"], "left", "tdm_scored")
+else:
+    spill = SPILL_DIR + "tdm_scored"
+    partition(TDM_PATH, "Team", spill)
+
+# Standardize Names (DVOA already normalized by load_dvoa)
+if tdm is not None:
+    tdm["Team"] = fix_teams(tdm["Team"])
 
 # Ridge Weights
-beta_passdef = weights.query("Phase == 'PassDef'").set_index("Metric")["Ridge"].to_dict()
-beta_rushdef = weights.query("Phase == 'RushDef'").set_index("Metric")["Ridge"].to_dict()
+beta_passdef = coef_map(weights, "PassDef", TDM_PASS_NEED)
+beta_rushdef = coef_map(weights, "RushDef", TDM_RUSH_NEED)
 print("\nLoaded Ridge Weights")
 print("PassDef →", beta_passdef)
 print("RushDef →", beta_rushdef)
 
-# Calculate TDM Components
-for c in ["PassRushScore", "CoverageScore", "RunDefenseScore"]:
-    tdm[c] = tdm.get(c, 0.0)
-
-tdm["PassDef_TDM"] = (
-    beta_passdef.get("PassRushScore", 0) * tdm["PassRushScore"] +
-    beta_passdef.get("CoverageScore", 0) * tdm["CoverageScore"]
-)
-tdm["RushDef_TDM"] = (
-    beta_rushdef.get("RunDefenseScore", 0) * tdm["RunDefenseScore"] +
-    beta_rushdef.get("PassRushScore", 0) * tdm["PassRushScore"]
-)
-tdm["TotalTDM"] = tdm["PassDef_TDM"] + tdm["RushDef_TDM"]
-
-# Slight weights
-PASSRUSH_W, COVERAGE_W, RUNDEF_W = 1.2, 0.9, 1.0
-tdm["PassDef_TDM_Adj"] = (
-    PASSRUSH_W * beta_passdef.get("PassRushScore", 0) * tdm["PassRushScore"] +
-    COVERAGE_W * beta_passdef.get("CoverageScore", 0) * tdm["CoverageScore"]
-)
-tdm["RushDef_TDM_Adj"] = (
-    RUNDEF_W * beta_rushdef.get("RunDefenseScore", 0) * tdm["RunDefenseScore"] +
-    PASSRUSH_W * beta_rushdef.get("PassRushScore", 0) * tdm["PassRushScore"]
-)
-tdm["TotalTDM_Adj"] = tdm["PassDef_TDM_Adj"] + tdm["RushDef_TDM_Adj"]
-
-# Winsorize extreme outliers
-for col in ["PassDef_TDM_Adj", "RushDef_TDM_Adj", "TotalTDM_Adj"]:
-    q1, q99 = tdm[col].quantile([0.01, 0.99])
-    tdm[col] = tdm[col].clip(q1, q99)
-
-# Aggregate by Team
-agg_cols = ["PassDef_TDM", "RushDef_TDM", "TotalTDM", "TotalTDM_Adj"]
-team = tdm.groupby("Team", as_index=False)[agg_cols].mean()
+# Calculate TDM Components (core, slight-weighted, phase-weighted, role-calibrated), then aggregate by Team
+# Same kernel as the Part 5 leaderboard, so validation and rankings share numbers
+# (out-of-core: scored partition by partition, clipped at the exact league-wide bounds)
+agg_cols = ["PassDef_TDM_core", "RushDef_TDM_core", "TotalTDM_core", "TotalTDM_Adj", "TotalTDM_Adjusted",
+            "PassDef_TDM_Adj", "RushDef_TDM_Adj", "TotalTDM"]
+if tdm is not None:
+    score_tdm(tdm, beta_passdef, beta_rushdef)
+    team = tdm.groupby("Team", as_index=False)[agg_cols].mean()
+else:
+    team = score_aggregate(spill, lambda part, sketch, fold: score_tdm(part, beta_passdef, beta_rushdef,
+                                                                        sketch=sketch, fold=fold),
+                           agg_cols, transform=lambda p: p.assign(Team=fix_teams(p["Team"])))
+    team = team[["Team"] + agg_cols]
+    memory_report("TDM Part 4", "ingest", team=team)
+# phase-weighted total under its own name (TotalTDM once meant the core sum, now TotalTDM_core)
+team = team.rename(columns={"TotalTDM": "TotalTDM_Phase"})
+n_teams = len(team)
 team = team.merge(dvoa, on="Team", how="inner")
-print(f"\nAggregated to {len(team)} teams (expected 32)")
-
-# Correation Diagnostics
-corrs = {
-    "PassDef_TDM vs PassDVOA": -team["PassDef_TDM"].corr(team["PassDefenseDVOA"]),
-    "RushDef_TDM vs RushDVOA": -team["RushDef_TDM"].corr(team["RushDefenseDVOA"]),
-    "TotalTDM vs DVOA":       -team["TotalTDM"].corr(team["DefensiveDVOA"]),
-    "TotalTDM_Adj vs DVOA":   -team["TotalTDM_Adj"].corr(team["DefensiveDVOA"]),
+print(f"\nAggregated to {len(team)} teams ({n_teams} in the player table)")
+
+# Correlation Diagnostics (inverted so ↑ = better defense; permutation p-values + CIs)
+corr_pairs = {
+    "PassDef_TDM_core vs PassDVOA":      ("PassDef_TDM_core",  "PassDefenseDVOA", -1),
+    "PassDef_TDM_Adj vs PassDVOA":       ("PassDef_TDM_Adj",   "PassDefenseDVOA", -1),
+    "RushDef_TDM_core vs RushDVOA":      ("RushDef_TDM_core",  "RushDefenseDVOA", -1),
+    "RushDef_TDM_Adj vs RushDVOA":       ("RushDef_TDM_Adj",   "RushDefenseDVOA", -1),
+    "TotalTDM_core vs DVOA":             ("TotalTDM_core",     "DefensiveDVOA",   -1),
+    "TotalTDM_Adj vs DVOA":              ("TotalTDM_Adj",      "DefensiveDVOA",   -1),
+    "TotalTDM_Phase vs DVOA":            ("TotalTDM_Phase",    "DefensiveDVOA",   -1),
+    "TotalTDM_Adjusted vs DVOA":         ("TotalTDM_Adjusted", "DefensiveDVOA",   -1),
 }
-print("\nCorrelations (inverted so ↑ = better defense)")
-for k, v in corrs.items():
-    print(f"{k:30s}: {v:.3f}")
-
-# Visualization
-team_sorted = team.sort_values("TotalTDM_Adj", ascending=False)
-
-sns.set_theme(style="whitegrid")
-plt.rcParams.update({
-    "axes.edgecolor": "0.3",
-    "axes.linewidth": 0.8,
-    "axes.labelweight": "semibold",
-    "axes.titleweight": "bold",
-    "font.size": 11,
-    "figure.facecolor": "white",
-    "axes.facecolor": "white"
-})
-
-fig, ax1 = plt.subplots(figsize=(13, 6))
-
-# Bars for TDM
-bar_color = "#264653"
-sns.barplot(
-    data=team_sorted, x="Team", y="TotalTDM_Adj",
-    color=bar_color, alpha=0.95, ax=ax1
-)
-ax1.set_ylabel("Total Defensive Metric (Adj.)", fontsize=12, labelpad=10, weight="semibold")
-ax1.set_xlabel("")
-ax1.grid(axis="y", linestyle="--", alpha=0.4)
-
-# Line for DVOA
-ax2 = ax1.twinx()
-line_color = "#E76F51"
-sns.lineplot(
-    data=team_sorted, x="Team", y="DefensiveDVOA",
-    color=line_color, marker="o", markersize=5, linewidth=2, ax=ax2
-)
-ax2.set_ylabel("Defensive DVOA", fontsize=12, color=line_color, weight="semibold")
-ax2.tick_params(axis="y", colors=line_color)
-ax2.grid(False)
-
-# Title & layout
-plt.title("Team-Level Defensive TDM vs Defensive DVOA (2024)", fontsize=14, weight="bold", pad=12)
-plt.xticks(rotation=0)
-plt.tight_layout()
-plt.savefig(BASE + "TDM_TeamRank_vs_DefDVOA.png", dpi=400)
-plt.show()
+corrs = correlation_table(team, corr_pairs)
+print("\nCorrelations (inverted so ↑ = better defense; * = permutation p < 0.05)")
+print_correlation_table(corrs)
+corrs.to_csv(BASE + "TDM_DVOA_Correlation_Tests.csv", index=False)
 
 # Export
 team.to_csv(BASE + "TDM_Team_Aggregates.csv", index=False)
-print(f"Exported: {BASE}TDM_Team_Aggregates.csv") 
\ No newline at end of file
+print(f"Exported: {BASE}TDM_Team_Aggregates.csv, {BASE}TDM_DVOA_Correlation_Tests.csv")
+
+# ---------- Score store (season-keyed SQLite) ----------
+if STORE:
+    try:
+        write_season(team, "teams", SEASON, Side="def")
+        print(f"✅ Season {SEASON} defense team aggregates stored in {DB_PATH}")
+    except Exception as e:
+        print(f"(Info) Score store skipped: {e}")
+
+# Visualization
+if FIGURES:
+    team_sorted = team.sort_values("TotalTDM_Adj", ascending=False)
+    render_figures([
+        figure_spec("TDM_TeamRank_vs_DefDVOA", "team_bar_line",
+                    team_sorted[["Team", "TotalTDM_Adj", "DefensiveDVOA"]], dpi=400, twin=True,
+                    bar="TotalTDM_Adj", line="DefensiveDVOA", figsize=(13, 6),
+                    bar_color="#264653", bar_alpha=0.95, line_color="#E76F51",
+                    ylabel="Total Defensive Metric (Adj.)", ylabel2="Defensive DVOA",
+                    title="Team-Level Defensive TDM vs Defensive DVOA (2024)"),
+    ], BASE, report=REPORT)
@@ -2,89 +2,61 @@
 # TDM - Part 5: Player Leaderboard
 # ======================================
 
-import pandas as pd, numpy as np, matplotlib.pyplot as plt, seaborn as sns
+import os
+import pandas as pd, numpy as np
+from dtypes import memory_report, read_compact
+from leaderboard import Leaderboard
+from player_search import PREFIX_SCORE, PlayerIndex
+from figures import figure_spec, render_figures
+from replacement import TDM_ROSTER_SLOTS, replacement_baselines, update_baselines, value_over_replacement
+from runtime import FIGURES, REPORT, SEASON, STORE
+from score_store import DB_PATH, season_history, write_season
+from scoring_kernel import (
+    TDM_PASS_NEED, TDM_PHASES, TDM_RUSH_NEED, coef_map, decompose, feature_contributions,
+    save_decomposition, score_tdm
+)
+from winsorize import QuantileSketch
 
 BASE = "/Users/anokhpalakurthi/Downloads/"
 TDM_PATH   = BASE + "TDM_Base_Weighted.csv"                 
 WEIGHTS_SP = BASE + "TDM_Calibrated_Weights_SplitPhase.csv" 
+CLIP_HISTORY = BASE + "TDM_Clip_Sketch_History.csv"   # previous seasons' sketch (copy of an old TDM_Clip_Sketch.csv)
+
+# Multi-season clip bounds: off → exact 1%/99% of this season alone
+USE_CLIP_HISTORY = False
 
 # Load
-tdm = pd.read_csv(TDM_PATH)
+tdm = read_compact(TDM_PATH)
 wts = pd.read_csv(WEIGHTS_SP)
+memory_report("TDM Part 5", "ingest", base=tdm)
 
 # Ridge coef mapping
-def coef_map(phase, needed):
-    sub = wts[(wts["Phase"] == phase) & (wts["Metric"].isin(needed))]
-    m = dict(zip(sub["Metric"], sub["Ridge"]))
-    for k in needed:
-        m.setdefault(k, 0.0)
-    return m
-
-pass_need = ["PassRushScore", "CoverageScore"]
-rush_need = ["RunDefenseScore", "PassRushScore"]
-
-beta_pass = coef_map("PassDef", pass_need)
-beta_rush = coef_map("RushDef", rush_need)
+beta_pass = coef_map(wts, "PassDef", TDM_PASS_NEED)
+beta_rush = coef_map(wts, "RushDef", TDM_RUSH_NEED)
 
 print("\nWeight summaries (ridge core):")
 print("Pass weights:", beta_pass)
 print("Rush weights:", beta_rush)
 
-# Ensure scores exist
-for c in ["PassRushScore", "CoverageScore", "RunDefenseScore"]:
-    if c not in tdm.columns:
-        tdm[c] = 0.0
-
-# Pure ridge core
-tdm["PassDef_TDM_core"] = (
-    beta_pass["PassRushScore"] * tdm["PassRushScore"] +
-    beta_pass["CoverageScore"]  * tdm["CoverageScore"]
-)
-tdm["RushDef_TDM_core"] = (
-    beta_rush["RunDefenseScore"] * tdm["RunDefenseScore"] +
-    beta_rush["PassRushScore"]   * tdm["PassRushScore"]
-)
-tdm["TotalTDM_core"] = tdm["PassDef_TDM_core"] + tdm["RushDef_TDM_core"]
-
-# Phase weighting
-PASS_W = 1.20
-RUSH_W = 0.80
-
-tdm["PassDef_TDM"] = PASS_W * tdm["PassDef_TDM_core"]
-tdm["RushDef_TDM"] = RUSH_W * tdm["RushDef_TDM_core"]
-tdm["TotalTDM"]    = tdm["PassDef_TDM"] + tdm["RushDef_TDM"]
-
-# Outlier Control
-for col in ["PassDef_TDM", "RushDef_TDM", "TotalTDM"]:
-    lo, hi = tdm[col].quantile([0.01, 0.99])
-    tdm[col] = tdm[col].clip(lo, hi)
-
-# Calibrate roles
-pos_map = {
-    "EDGE": "ED", "ED": "ED", "DE": "ED", "OLB": "ED",
-    "DT": "DI", "IDL": "DI", "NT": "DI", "DI": "DI",
-    "ILB": "LB", "LB": "LB", "MLB": "LB",
-    "CB": "CB", "SCB": "CB",
-    "S": "S", "SS": "S", "FS": "S"
-}
-tdm["PositionGroup"] = tdm["Position"].map(pos_map).fillna("Other")
-
-role_mult = {
-    # mild trims to trench dominance
-    "DI": 0.92,
-    "ED": 0.95,
-    # slight boost to back-seven
-    "LB": 1.03,
-    "S":  1.08,
-    "CB": 1.12,
-    # others neutral
-    "Other": 1.00
-}
-tdm["RoleMult"] = tdm["PositionGroup"].map(role_mult).fillna(1.00)
-
-# Apply role multiplier to final (post-hoc), not to phase components
-tdm["TotalTDM_Adjusted"] = tdm["TotalTDM"] * tdm["RoleMult"]
-
+# Pure ridge core, phase weighting, outlier control and role calibration
+# (role multiplier applies to the final, not to phase components)
+sketch = None
+if USE_CLIP_HISTORY:
+    sketch = QuantileSketch.load(CLIP_HISTORY) if os.path.exists(CLIP_HISTORY) else QuantileSketch()
+C = score_tdm(tdm, beta_pass, beta_rush, sketch=sketch)
+if sketch is not None:
+    sketch.save(BASE + "TDM_Clip_Sketch.csv")
+    print("✅ Clip bounds from history + this season; sketch saved to TDM_Clip_Sketch.csv")
+
+
+# --- Value over replacement (baselines from this season's score distribution) ---
+vor_in = tdm.assign(Season=str(SEASON))
+baselines = update_baselines(BASE + "Replacement_Baselines.csv",
+                             replacement_baselines(vor_in, "TotalTDM", TDM_ROSTER_SLOTS), "def")
+tdm["TDM_VOR"] = value_over_replacement(vor_in, baselines[baselines["Side"] == "def"], "TotalTDM")
+print(f"\n📏 Replacement baselines ({SEASON}, TotalTDM):")
+print(baselines[(baselines["Side"] == "def") & (baselines["Season"] == str(SEASON))]
+      [["PositionGroup", "Slots", "Rank", "Players", "Baseline"]].round(3).to_string(index=False))
 
 # Leaderboard generation
 cols = [
@@ -93,14 +65,14 @@ cols = [
     "PassRushScore", "CoverageScore", "RunDefenseScore", "RoleMult", "TotalSnaps"
 ]
 
-top25 = tdm.sort_values("TotalTDM_Adjusted", ascending=False).head(25)
+board = Leaderboard(tdm, ["TotalTDM_Adjusted", "TotalTDM", "PassDef_TDM", "RushDef_TDM"])
+top25 = board.top_k("TotalTDM_Adjusted", 25)
 print("\n🛡️ Top 25 — TotalTDM_Adjusted (Phase-weighted, Role-calibrated):")
 print(top25[cols].round(3))
 
 # Positional balance snapshot
 pos_summary = (
-    tdm.groupby("PositionGroup")["TotalTDM_Adjusted"]
-    .agg(["mean", "std", "count"])
+    board.group_summary("TotalTDM_Adjusted", "PositionGroup")
     .sort_values("mean", ascending=False)
     .round(3)
 )
@@ -108,32 +80,53 @@ print("\n📊 Positional Summary (after role calibration):")
 print(pos_summary)
 
 # Simple diagnostics for a few DBs (optional)
+name_index = PlayerIndex(tdm["Player"])
 for name in ["Pat Surtain II", "Sauce Gardner", "Jaire Alexander", "Xavier McKinney"]:
-    diag = tdm.loc[tdm["Player"].str.contains(name, case=False, na=False), cols]
+    diag = tdm.iloc[name_index.rows_for(name, min_score=PREFIX_SCORE)][cols]
     if not diag.empty:
         print(f"\n🔎 Diagnostic: {name}")
         print(diag.round(3))
 
 # Export and visualize
 out_csv = BASE + "TDM_Player_Leaderboard_PhaseWeighted_RoleCalibrated.csv"
+memory_report("TDM Part 5", "leaderboard", leaderboard=tdm)
 tdm.to_csv(out_csv, index=False)
 
-viz = top25.sort_values("TotalTDM_Adjusted", ascending=False)
-plt.figure(figsize=(10, 8))
-sns.barplot(
-    data=viz,
-    y="Player",
-    x="TotalTDM_Adjusted",
-    hue="PositionGroup",
-    dodge=False,
-    palette="viridis",
-    order=viz["Player"]
-)
-plt.title("Top 25 Defensive Players — Phase-Weighted, Role-Calibrated (TOM-style)", fontsize=14, weight="bold")
-plt.xlabel("Adjusted TDM (post-hoc role calibration)")
-plt.ylabel("")
-plt.grid(axis="x", linestyle="--", alpha=0.5)
-plt.legend(title="Position Group", bbox_to_anchor=(1.05, 1), loc="upper left")
-plt.tight_layout()
-plt.savefig(BASE + "TDM_Top25_PhaseWeighted_RoleCalibrated.png", dpi=300)
-plt.show()
\ No newline at end of file
+# ---------- Score decomposition (player × term; explanations are a lookup) ----------
+feats = feature_contributions(BASE + "TDM_Feature_Contributions.csv", tdm)
+T, terms, levels = decompose(tdm, C, TDM_PHASES, "TotalTDM_Adjusted", feats)
+save_decomposition(BASE + "TDM_Score_Decomposition.npz", tdm, T, terms, levels)
+lead = int(np.argmax(tdm["TotalTDM_Adjusted"].to_numpy()))
+top_terms = pd.Series(T[lead], index=terms)[[lv != "feature" for lv in levels]]
+print(f"\n🧩 {tdm['Player'].iloc[lead]}: TotalTDM_Adjusted {tdm['TotalTDM_Adjusted'].iloc[lead]:.3f} =")
+print(top_terms[top_terms.abs() > 1e-9].round(3).to_string())
+
+# ---------- Score store (season-keyed SQLite) ----------
+if STORE:
+    try:
+        write_season(tdm, "players", SEASON, Side="def")
+        write_season(wts, "coefficients", SEASON, Side="def")
+        print(f"✅ Season {SEASON} defense players + weights stored in {DB_PATH}")
+    except Exception as e:
+        print(f"(Info) Score store skipped: {e}")
+
+# ---------- Comparables index (every stored season + this one) ----------
+try:
+    from similarity import DEF_VECTOR, build_index
+    history = season_history("players", "def", SEASON) if STORE else None
+    sim = build_index(tdm.assign(Season=SEASON), DEF_VECTOR, history)
+    sim.save(BASE + "TDM_Similarity_Index.npz")
+    lead = top25["Player"].iloc[0]
+    print(f"\n🔍 Most similar to {lead} ({len(sim.X)} player-seasons indexed):")
+    print(sim.similar(lead, 5).round(3))
+except Exception as e:
+    print(f"(Info) Similarity index skipped: {e}")
+
+if FIGURES:
+    render_figures([
+        figure_spec("TDM_Top25_PhaseWeighted_RoleCalibrated", "top_bar",
+                    top25[["Player", "TotalTDM_Adjusted", "PositionGroup"]], dpi=300,
+                    x="TotalTDM_Adjusted", hue="PositionGroup", palette="viridis",
+                    title="Top 25 Defensive Players — Phase-Weighted, Role-Calibrated (TOM-style)",
+                    xlabel="Adjusted TDM (post-hoc role calibration)", legend_title="Position Group"),
+    ], BASE, report=REPORT)
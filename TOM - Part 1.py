@@ -1,11 +1,10 @@
-import pandas as pd
+from frame_backend import clean_pff, to_pandas
 
 # ==========================
 # PART 1: PASSING (PFF)
 # ==========================
 
 file_path = "/Users/anokhpalakurthi/Downloads/Passing (PFF).csv"
-df = pd.read_csv(file_path)
 
 keep_cols = [
     'player', 'team_name', 'position', 'dropbacks', 
@@ -15,9 +14,7 @@ keep_cols = [
     'turnover_worthy_plays', 'btt_rate', 'twp_rate', 'grades_pass', 
     'grades_offense'
 ]
-df = df[keep_cols]
-
-df.rename(columns={
+pass_rename = {
     'player': 'Player', 'team_name': 'Team', 'position': 'Position',
     'dropbacks': 'Dropbacks', 'attempts': 'Attempts', 'completions': 'Completions',
     'yards': 'PassingYards', 'touchdowns': 'PassingTDs', 'interceptions': 'INTs',
@@ -26,25 +23,17 @@ df.rename(columns={
     'def_gen_pressures': 'PressuresFaced', 'big_time_throws': 'BigTimeThrows',
     'turnover_worthy_plays': 'TurnoverWorthyPlays', 'btt_rate': 'BTT_Rate',
     'twp_rate': 'TWP_Rate', 'grades_pass': 'PFF_PassGrade', 'grades_offense': 'PFF_OffenseGrade'
-}, inplace=True)
-
-# Cleaning
-df.replace([float('inf'), -float('inf')], pd.NA, inplace=True)
-df.fillna(0, inplace=True)
-df['CompletionPercent'] = df['CompletionPercent'].clip(0, 100)
-df['YardsPerAttempt'] = df['YardsPerAttempt'].clip(lower=0, upper=20)
-for col in df.columns:
-    if any(k in col for k in ['Yards', 'TD', 'Rate']) and df[col].min() < 0:
-        df[col] = df[col].clip(lower=0)
-rate_cols = [c for c in df.columns if 'Rate' in c or 'Percent' in c]
-df[rate_cols] = df[rate_cols].apply(lambda x: x / 100 if x.max() > 1 else x)
+}
+
+# Cleaning: inf/NaN → 0, bound completion % and YPA, clip negative Yards/TD/Rate, 0–100 rates → 0–1
+df = to_pandas(clean_pff(file_path, keep=keep_cols, rename=pass_rename,
+                         bounds={'CompletionPercent': (0, 100), 'YardsPerAttempt': (0, 20)},
+                         clip_keys=('Yards', 'TD', 'Rate')))
 
 # ==========================
 # PART 2: RUSHING (PFF)
 # ==========================
 rush_path = "/Users/anokhpalakurthi/Downloads/Rushing (PFF).csv"
-rush_df = pd.read_csv(rush_path)
-rush_df.columns = rush_df.columns.str.strip().str.lower()
 
 rush_keep_cols = [
     'player', 'team_name', 'position',
@@ -52,30 +41,24 @@ rush_keep_cols = [
     'yards_after_contact', 'breakaway_yards', 'fumbles',
     'grades_run', 'grades_offense'
 ]
-rush_df = rush_df[rush_keep_cols].rename(columns={
+rush_rename = {
     'player': 'Player', 'team_name': 'Team', 'position': 'Position',
     'attempts': 'RushAttempts', 'yards': 'RushYards',
     'touchdowns': 'RushTDs', 'first_downs': 'RushFirstDowns',
     'yards_after_contact': 'YardsAfterContact', 'breakaway_yards': 'BreakawayYards',
     'fumbles': 'Fumbles', 'grades_run': 'PFF_RunGrade', 'grades_offense': 'PFF_OffenseGrade'
-})
-
-rush_df['YardsPerAttempt'] = rush_df['RushYards'] / rush_df['RushAttempts']
-rush_df['YAC_PerAttempt'] = rush_df['YardsAfterContact'] / rush_df['RushAttempts']
-rush_df['ExplosiveRunRate'] = rush_df['BreakawayYards'] / rush_df['RushYards']
-rush_df.replace([float('inf'), -float('inf')], pd.NA, inplace=True)
-rush_df.fillna(0, inplace=True)
-for col in rush_df.columns:
-    if any(k in col for k in ['Yards', 'TD', 'Rate']) and rush_df[col].min() < 0:
-        rush_df[col] = rush_df[col].clip(lower=0)
-rate_cols = [c for c in rush_df.columns if 'Rate' in c or 'Percent' in c]
-rush_df[rate_cols] = rush_df[rate_cols].apply(lambda x: x / 100 if x.max() > 1 else x)
+}
+
+rush_df = to_pandas(clean_pff(rush_path, keep=rush_keep_cols, rename=rush_rename, lower=True,
+                              ratios={'YardsPerAttempt': ('RushYards', 'RushAttempts'),
+                                      'YAC_PerAttempt': ('YardsAfterContact', 'RushAttempts'),
+                                      'ExplosiveRunRate': ('BreakawayYards', 'RushYards')},
+                              clip_keys=('Yards', 'TD', 'Rate')))
 
 # ==========================
 # PART 3: RECEIVING (PFF)
 # ==========================
 receive_path = "/Users/anokhpalakurthi/Downloads/Receiving (PFF).csv"
-receive_df = pd.read_csv(receive_path)
 
 receive_keep_cols = [
     'player', 'team_name', 'position',
@@ -85,7 +68,7 @@ receive_keep_cols = [
     'pass_block_rate', 'pass_blocks', 'grades_pass_route', 'grades_offense'
 ]
 
-receive_df.rename(columns={
+receive_rename = {
     'player': 'Player', 'team_name': 'Team', 'position': 'Position',
     'targets': 'Targets', 'receptions': 'Receptions', 'yards': 'ReceivingYards',
     'touchdowns': 'ReceivingTDs', 'first_downs': 'ReceivingFirstDowns',
@@ -94,28 +77,18 @@ receive_df.rename(columns={
     'contested_targets': 'ContestedTargets', 'contested_receptions': 'ContestedReceptions',
     'pass_block_rate': 'PassBlockRate', 'pass_blocks': 'PassBlocks',
     'grades_pass_route': 'PFF_RouteGrade', 'grades_offense': 'PFF_OffenseGrade'
-}, inplace=True)
+}
 
-receive_df.replace([float('inf'), -float('inf')], pd.NA, inplace=True)
-receive_df.fillna(0, inplace=True)
-
-# Apply abs() only to true yardage metrics
-for col in ['ReceivingYards', 'YardsAfterCatch', 'YardsPerRouteRun']:
-    if col in receive_df.columns:
-        receive_df[col] = receive_df[col].abs()
-
-# Do not abs() AvgDepthTarget — negatives indicate direction
-for col in receive_df.columns:
-    if any(k in col for k in ['TD', 'Rate']) and receive_df[col].min() < 0:
-        receive_df[col] = receive_df[col].clip(lower=0)
-rate_cols = [c for c in receive_df.columns if 'Rate' in c or 'Percent' in c]
-receive_df[rate_cols] = receive_df[rate_cols].apply(lambda x: x / 100 if x.max() > 1 else x)
+# All columns are kept (receive_keep_cols documents the ones the model uses).
+# abs() only on true yardage metrics; AvgDepthTarget keeps its sign (direction)
+receive_df = to_pandas(clean_pff(receive_path, rename=receive_rename,
+                                 abs_cols=('ReceivingYards', 'YardsAfterCatch', 'YardsPerRouteRun'),
+                                 clip_keys=('TD', 'Rate')))
 
 # ==========================
 # PART 4: BLOCKING (PFF)
 # ==========================
 block_path = "/Users/anokhpalakurthi/Downloads/Blocking (PFF).csv"
-block_df = pd.read_csv(block_path)
 
 block_keep_cols = [
     'player', 'team_name', 'position', 'player_game_count',
@@ -124,10 +97,8 @@ block_keep_cols = [
     'pressures_allowed', 'hits_allowed', 'hurries_allowed', 'sacks_allowed',
     'pbe', 'penalties'
 ]
-existing_cols = [c for c in block_keep_cols if c in block_df.columns]
-block_df = block_df[existing_cols]
 
-block_df.rename(columns={
+block_rename = {
     'player': 'Player', 'team_name': 'Team', 'position': 'Position',
     'player_game_count': 'Games', 'snap_counts_block': 'TotalBlockSnaps',
     'snap_counts_pass_block': 'PassBlockSnaps', 'snap_counts_run_block': 'RunBlockSnaps',
@@ -135,18 +106,13 @@ block_df.rename(columns={
     'grades_offense': 'PFF_OffenseGrade', 'pressures_allowed': 'PressuresAllowed',
     'hits_allowed': 'HitsAllowed', 'hurries_allowed': 'HurriesAllowed',
     'sacks_allowed': 'SacksAllowed', 'pbe': 'PassBlockEfficiency', 'penalties': 'Penalties'
-}, inplace=True)
-
-block_df['PressureRateAllowed'] = block_df['PressuresAllowed'] / block_df['PassBlockSnaps']
-block_df['SackRateAllowed'] = block_df['SacksAllowed'] / block_df['PassBlockSnaps']
-block_df['PenaltyRate_Block'] = block_df['Penalties'] / block_df['TotalBlockSnaps']
-block_df.replace([float('inf'), -float('inf')], pd.NA, inplace=True)
-block_df.fillna(0, inplace=True)
-for col in block_df.columns:
-    if any(k in col for k in ['Yards', 'TD', 'Rate']) and block_df[col].min() < 0:
-        block_df[col] = block_df[col].clip(lower=0)
-rate_cols = [c for c in block_df.columns if 'Rate' in c or 'Percent' in c]
-block_df[rate_cols] = block_df[rate_cols].apply(lambda x: x / 100 if x.max() > 1 else x)
+}
+
+block_df = to_pandas(clean_pff(block_path, keep=block_keep_cols, rename=block_rename, missing_ok=True,
+                               ratios={'PressureRateAllowed': ('PressuresAllowed', 'PassBlockSnaps'),
+                                       'SackRateAllowed': ('SacksAllowed', 'PassBlockSnaps'),
+                                       'PenaltyRate_Block': ('Penalties', 'TotalBlockSnaps')},
+                               clip_keys=('Yards', 'TD', 'Rate')))
 
 # ==========================
 # FINAL EXPORTS
@@ -3,17 +3,24 @@
 # ======================================
 
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-import matplotlib.pyplot as plt
-import seaborn as sns
+from diagnostics import print_collinearity
+from dtypes import compact, memory_report, read_compact
+from figures import figure_spec, render_figures
+from frame_backend import merge_all
+from opponent_adjust import adjust_for_opponent, load_game_logs
+from runtime import DIAGNOSTICS, FIGURES, REPORT
+from scoring_kernel import TOM_POS_MAP
+from shrinkage import shrink_domain
+from standardize import composite_parts, group_zscore, save_group_stats
 
 # ---------- Load Cleaned Datasets ----------
 path_base = "/Users/anokhpalakurthi/Downloads/"
 
-passing   = pd.read_csv(path_base + "Passing_PFF_Clean.csv")
-rushing   = pd.read_csv(path_base + "Rushing_PFF_Clean.csv")
-receiving = pd.read_csv(path_base + "Receiving_PFF_Clean.csv")
-blocking  = pd.read_csv(path_base + "Blocking_PFF_Clean.csv")
+passing   = read_compact(path_base + "Passing_PFF_Clean.csv")
+rushing   = read_compact(path_base + "Rushing_PFF_Clean.csv")
+receiving = read_compact(path_base + "Receiving_PFF_Clean.csv")
+blocking  = read_compact(path_base + "Blocking_PFF_Clean.csv")
+memory_report("TOM Part 2", "ingest", passing=passing, rushing=rushing, receiving=receiving, blocking=blocking)
 
 print("✅ Datasets successfully loaded.")
 print(f"Passing: {passing.shape}, Rushing: {rushing.shape}, Receiving: {receiving.shape}, Blocking: {blocking.shape}")
@@ -25,19 +32,53 @@ for df_ in [passing, rushing, receiving, blocking]:
         if df_[c].min() < 0 and 'grade' not in c.lower():
             df_[c] = df_[c].clip(lower=0)
 
+# ---------- Opponent adjustment (only when game logs are present) ----------
+game_logs = load_game_logs()
+if game_logs is not None:
+    passing   = adjust_for_opponent(passing,   "passing",   game_logs)
+    rushing   = adjust_for_opponent(rushing,   "rushing",   game_logs)
+    receiving = adjust_for_opponent(receiving, "receiving", game_logs)
+    blocking  = adjust_for_opponent(blocking,  "blocking",  game_logs)
+
+# ---------- Empirical-Bayes shrinkage of rate stats (before z-scores) ----------
+# Low-volume rates are pulled toward their position-group mean so a 3-target
+# line can't stretch the standardization for everyone else.
+passing,   pri_pass = shrink_domain(passing,   "passing",   TOM_POS_MAP)
+rushing,   pri_rush = shrink_domain(rushing,   "rushing",   TOM_POS_MAP)
+receiving, pri_rec  = shrink_domain(receiving, "receiving", TOM_POS_MAP)
+blocking,  pri_blk  = shrink_domain(blocking,  "blocking",  TOM_POS_MAP)
+pd.concat([pri_pass, pri_rush, pri_rec, pri_blk], ignore_index=True).to_csv(
+    path_base + "UVM_Shrinkage_Priors.csv", index=False)
+
 # ---------- Utility: z-score normalization ----------
+# Z-scores are taken within position groups (QB/RB/WR/TE/OL), so a TE's
+# receiving line is compared to other TEs; groups under MIN_GROUP players use
+# league-wide stats. SNAP_WEIGHTED weights each group's mean/SD by the
+# domain's volume column. Group stats are saved for online scoring.
+SNAP_WEIGHTED = False
+VOLUME_COLS = {"Air": "Dropbacks", "Rush": "RushAttempts", "Receive": "Targets", "Block": "TotalBlockSnaps"}
+std_stats = []
+
 def normalize_features(df, feature_cols, new_prefix):
-    """Z-score normalize given columns and return average composite score."""
-    scaler = StandardScaler()
-    df_norm = df.copy()
+    """Z-score normalize given columns within position groups and return average composite score."""
     valid_cols = [col for col in feature_cols if col in df.columns]
+    weight_col = VOLUME_COLS.get(new_prefix) if SNAP_WEIGHTED else None
+    # copy only what this stage touches (keys, features, weight), not the whole table
+    keep = ["Player", "Team", "Position"] + valid_cols + ([weight_col] if weight_col in df.columns else [])
+    df_norm = df[list(dict.fromkeys(keep))].copy()
     if not valid_cols:
         print(f"⚠️ No valid columns found for {new_prefix}")
         df_norm[f"{new_prefix}Score"] = 0
         return df_norm
-    df_norm[valid_cols] = scaler.fit_transform(df_norm[valid_cols])
+    df_norm["PositionGroup"] = df_norm["Position"].map(TOM_POS_MAP).fillna("Other")
+    df_norm[valid_cols], stats = group_zscore(df_norm, valid_cols, "PositionGroup",
+                                              weight_col if weight_col in df_norm.columns else None)
+    std_stats.append(stats.assign(Domain=new_prefix))
     df_norm[f"{new_prefix}Score"] = df_norm[valid_cols].mean(axis=1)
-    print(f"✅ {new_prefix} normalized on {len(valid_cols)} features.")
+    # per-feature shares of the score ("<Domain>Score:<feature>") for the decomposition
+    df_norm = df_norm.join(composite_parts(df_norm, valid_cols, f"{new_prefix}Score"))
+    print(f"✅ {new_prefix} normalized on {len(valid_cols)} features "
+          f"({df_norm['PositionGroup'].nunique()} position groups).")
     return df_norm
 
 # ---------- Feature Selection per Domain ----------
@@ -64,32 +105,64 @@ blocking_features = [
     'PFF_PassBlockGrade', 'PFF_RunBlockGrade', 'PFF_OffenseGrade'
 ]
 
+# ---------- Raw-feature multicollinearity ----------
+if DIAGNOSTICS:
+    print_collinearity("Passing features",   passing,   passing_features)
+    print_collinearity("Rushing features",   rushing,   rushing_features)
+    print_collinearity("Receiving features", receiving, receiving_features)
+    print_collinearity("Blocking features",  blocking,  blocking_features)
+
 # ---------- Normalize Each Group ----------
 passing_norm   = normalize_features(passing,   passing_features,   "Air")
 rushing_norm   = normalize_features(rushing,   rushing_features,   "Rush")
 receiving_norm = normalize_features(receiving, receiving_features, "Receive")
 blocking_norm  = normalize_features(blocking,  blocking_features,  "Block")
 
+save_group_stats(pd.concat(std_stats, ignore_index=True), path_base + "UVM_Standardization_Stats.csv")
+
 # ---------- Merge All Players ----------
-def base_merge(df, key_cols):
-    return df[key_cols + [col for col in df.columns if "Score" in col]]
+# Volume columns ride along as raw counts (taken from the pre-z-score table,
+# since TotalBlockSnaps is also a blocking feature) so Part 5 can filter on them
+def base_merge(df, raw, key_cols, volume_col):
+    out = df[key_cols + [col for col in df.columns if "Score" in col]].copy()
+    if volume_col in raw.columns:
+        out[volume_col] = pd.to_numeric(raw[volume_col], errors="coerce")
+    return out
 
 key_cols = ["Player", "Team", "Position"]
 
-merged = (
-    base_merge(passing_norm, key_cols)
-    .merge(base_merge(rushing_norm, key_cols),   on=key_cols, how="outer")
-    .merge(base_merge(receiving_norm, key_cols), on=key_cols, how="outer")
-    .merge(base_merge(blocking_norm, key_cols),  on=key_cols, how="outer")
-)
+merged = merge_all([
+    base_merge(passing_norm,   passing,   key_cols, VOLUME_COLS["Air"]),
+    base_merge(rushing_norm,   rushing,   key_cols, VOLUME_COLS["Rush"]),
+    base_merge(receiving_norm, receiving, key_cols, VOLUME_COLS["Receive"]),
+    base_merge(blocking_norm,  blocking,  key_cols, VOLUME_COLS["Block"]),
+], on=key_cols)
 
-# ---------- Fill missing domain scores with 0 ----------
+# ---------- Fill missing domain scores / volumes with 0 ----------
 merged.fillna(0, inplace=True)
+part_cols = [c for c in merged.columns if ":" in c]
+contributions = merged[key_cols + part_cols]
+merged = merged.drop(columns=part_cols)
+vol_cols = [c for c in VOLUME_COLS.values() if c in merged.columns]
+merged = merged[[c for c in merged.columns if c not in vol_cols] + vol_cols]
+
+# ---------- Volume floor (evaluated here; Part 5 filters on the flag) ----------
+VOLUME_FLOOR = {"Dropbacks": 50, "RushAttempts": 30, "Targets": 30, "TotalBlockSnaps": 200}
+merged["MeetsVolumeFloor"] = False
+for col, minimum in VOLUME_FLOOR.items():
+    if col in merged.columns:
+        merged["MeetsVolumeFloor"] |= merged[col] >= minimum
+
+# merges fall back to plain strings when category sets differ; re-apply the policy
+merged, contributions = compact(merged), compact(contributions)
+memory_report("TOM Part 2", "merged", base=merged, contributions=contributions)
 
 # ---------- Export Clean Unified Dataset (no weighting yet) ----------
 out_path = path_base + "Unified_Value_Model_Base.csv"
 merged.to_csv(out_path, index=False)
 print(f"\n✅ Unified base dataset with domain scores saved to: {out_path}")
+# Row-aligned with the base file; each domain's feature shares sum to its score
+contributions.to_csv(path_base + "UVM_Feature_Contributions.csv", index=False)
 
 # ---------- Diagnostics ----------
 print(f"\nSummary Stats (Domain Scores Only):")
@@ -107,25 +180,13 @@ domain_scores = merged[['AirScore', 'RushScore', 'ReceiveScore', 'BlockScore']]
 means = domain_scores.mean()
 stds = domain_scores.std()
 
-plt.figure(figsize=(10, 6))
-sns.violinplot(data=domain_scores, inner='box', cut=0, palette='muted')
-plt.title("Distribution of Standardized Domain Scores (Z-Normalized)", fontsize=14, pad=15)
-plt.xlabel("Domain (Phase)", fontsize=12)
-plt.ylabel("Standardized Score (Z-Value)", fontsize=12)
-plt.axhline(0, color='gray', linestyle='--', linewidth=1)
-
-# Add annotations for mean ± std
-for i, col in enumerate(domain_scores.columns):
-    mean_val = means[col]
-    std_val = stds[col]
-    plt.text(
-        i, mean_val + 0.25,  # position slightly above the mean
-        f"μ={mean_val:.2f}\nσ={std_val:.2f}",
-        ha='center', va='bottom', fontsize=10, color='black', fontweight='medium'
-    )
-
-plt.tight_layout()
-plt.show()
+if FIGURES:
+    render_figures([
+        figure_spec("UVM_Domain_Distributions", "violin", domain_scores, figsize=(10, 6),
+                    title="Distribution of Standardized Domain Scores (Z-Normalized)",
+                    title_size=14, title_pad=15, xlabel="Domain (Phase)",
+                    ylabel="Standardized Score (Z-Value)", palette="muted", annotate=True),
+    ], path_base, report=REPORT)
 
 print("\n🔢 Domain Distribution Summary:")
 for col in domain_scores.columns:
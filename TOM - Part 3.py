@@ -4,43 +4,66 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.linear_model import RidgeCV
-from sklearn.preprocessing import StandardScaler
+from dtypes import memory_report, read_compact
+from figures import figure_spec, render_figures
+from runtime import FIGURES, OUT_OF_CORE, REPORT, SHARED, USE_DVOA_PROXY
+from shared_features import frame_arrays, publish
+from teams import fix_teams, load_dvoa
+if OUT_OF_CORE:
+    from out_of_core import SPILL_DIR, partition, team_aggregate
 
 # ---------- Paths ----------
 BASE = "/Users/anokhpalakurthi/Downloads/"
 UVM_PATH = BASE + "Unified_Value_Model_Base.csv"
-DVOA_PATH = BASE + "Offensive DVOA.csv"
+DVOA_PATH = BASE + ("Offensive DVOA Proxy.csv" if USE_DVOA_PROXY else "Offensive DVOA.csv")
 
 # ---------- Load ----------
-uvm = pd.read_csv(UVM_PATH)
-dvoa = pd.read_csv(DVOA_PATH)
+# Out-of-core runs stream the base table into team partitions below instead
+uvm = None if OUT_OF_CORE else read_compact(UVM_PATH)
+dvoa = load_dvoa(DVOA_PATH, "off")
 
 print("✅ Loaded:")
-print(f"UVM base: {uvm.shape} | DVOA: {dvoa.shape}")
+if uvm is not None:
+    memory_report("TOM Part 3", "ingest", base=uvm)
+    print(f"UVM base: {uvm.shape} | DVOA: {dvoa.shape}")
+else:
+    print(f"UVM base: streamed from {UVM_PATH} | DVOA: {dvoa.shape}")
 
-# ---------- Clean DVOA ----------
-dvoa.columns = dvoa.columns.str.strip().str.upper()
-rename = {"TEAM": "Team", "DVOA": "OffensiveDVOA", "OFF": "OffensiveDVOA",
-          "PASS": "PassDVOA", "RUSH": "RushDVOA"}
-dvoa.rename(columns=rename, inplace=True)
-dvoa = dvoa[["Team", "OffensiveDVOA", "PassDVOA", "RushDVOA"]]
-
-# ---------- Normalize team names ----------
-fix = {"ARZ": "ARI", "BLT": "BAL", "CLV": "CLE", "HST": "HOU", "SF": "SFO", "LA": "LAR"}
-uvm["Team"] = uvm["Team"].replace(fix).replace({"SFO": "SF"})
-dvoa["Team"] = dvoa["Team"].replace({"SFO": "SF"})
+# ---------- Normalize team names (DVOA already normalized by load_dvoa) ----------
+if uvm is not None:
+    uvm["Team"] = fix_teams(uvm["Team"])
 
 # ---------- Aggregate to team-level ----------
 domain_cols = ["AirScore", "RushScore", "ReceiveScore", "BlockScore"]
-team = uvm.groupby("Team")[domain_cols].mean().reset_index()
+if uvm is not None:
+    team = uvm.groupby("Team")[domain_cols].mean().reset_index()
+else:
+    spill = SPILL_DIR + "tom_base"
+    partition(UVM_PATH, "Team", spill, transform=lambda c: c.assign(Team=fix_teams(c["Team"])))
+    team = team_aggregate(spill, domain_cols)[["Team"] + domain_cols]
+    memory_report("TOM Part 3", "ingest", team=team)
 merged = team.merge(dvoa, on="Team", how="inner")
 print(f"✅ Merged to teams: {len(merged)} rows ({merged['Team'].nunique()} teams)")
 
+# ---------- Publish model matrices for parallel workers ----------
+if SHARED and uvm is None:
+    print("(Info) Shared features skipped: out-of-core run holds no player table")
+elif SHARED:
+    try:
+        targets = ["OffensiveDVOA", "PassDVOA", "RushDVOA"]
+        arrays = frame_arrays(uvm, domain_cols, prefix="player_") | frame_arrays(merged, domain_cols, ["Team"], prefix="team_")
+        arrays["player_team"] = pd.Index(merged["Team"]).get_indexer(uvm["Team"]).astype(np.int32)
+        arrays["team_y"] = merged[targets].to_numpy(dtype=np.float64)
+        arrays["team_y_columns"] = np.array(targets, dtype=str)
+        publish("tom", arrays)
+        print("✅ Shared feature matrices published (shared_features.attach(\"tom\"))")
+    except Exception as e:
+        print(f"(Info) Shared features skipped: {e}")
+
 # ---------- Ridge helper ----------
 def fit_ridge(X_df, y, alphas=np.logspace(-3, 3, 100)):
+    from sklearn.linear_model import RidgeCV
+    from sklearn.preprocessing import StandardScaler
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X_df)
     ridge = RidgeCV(alphas=alphas, store_cv_results=True).fit(X_scaled, y)
@@ -106,16 +129,13 @@ res_df = pd.DataFrame([
     {"Model": "All-Phase (Offense)", "Metric": k, "Weight": v} for k, v in coefs_all.items()
 ])
 
-plt.figure(figsize=(12, 6))
-sns.barplot(data=res_df, x="Metric", y="Weight", hue="Model", palette="Spectral")
-plt.title("Phase and Cross-Phase Ridge Coefficients Across Models", fontsize=14, weight='bold')
-plt.ylabel("Coefficient Weight (Importance)")
-plt.xlabel("Domain Metric")
-plt.axhline(0, color='black', linewidth=1)
-plt.legend(title="Model Type", fontsize=9)
-plt.grid(axis='y', linestyle='--', alpha=0.6)
-plt.tight_layout()
-plt.show()
+if FIGURES:
+    render_figures([
+        figure_spec("UVM_Ridge_Coefficients", "coef_bars", res_df, figsize=(12, 6), palette="Spectral",
+                    title="Phase and Cross-Phase Ridge Coefficients Across Models",
+                    ylabel="Coefficient Weight (Importance)", xlabel="Domain Metric",
+                    legend_title="Model Type"),
+    ], BASE, report=REPORT)
 
 # ======================================
 # 5️⃣ MODEL PERFORMANCE SUMMARY
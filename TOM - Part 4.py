@@ -4,119 +4,88 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from dtypes import memory_report, read_compact
+from figures import figure_spec, render_figures
+from permutation import correlation_table, print_correlation_table
+from runtime import FIGURES, OUT_OF_CORE, REPORT, SEASON, STORE, USE_DVOA_PROXY
+from score_store import DB_PATH, write_season
+from scoring_kernel import TOM_PASS_NEED, TOM_RUSH_NEED, coef_map, score_tom
+from teams import fix_teams, load_dvoa
+if OUT_OF_CORE:
+    from out_of_core import SPILL_DIR, partition, score_aggregate
 
 BASE = "/Users/anokhpalakurthi/Downloads/"
 UVM_PATH   = BASE + "Unified_Value_Model_Base.csv"
 WEIGHTS_SP = BASE + "UVM_Calibrated_Weights_SplitPhase.csv"
-DVOA_PATH  = BASE + "Offensive DVOA.csv"
+DVOA_PATH  = BASE + ("Offensive DVOA Proxy.csv" if USE_DVOA_PROXY else "Offensive DVOA.csv")
 
 # ---------- Load ----------
-uvm = pd.read_csv(UVM_PATH)
+# Out-of-core runs score the base table partition by partition below instead
+uvm = None if OUT_OF_CORE else read_compact(UVM_PATH)
 wts = pd.read_csv(WEIGHTS_SP)
-dvoa = pd.read_csv(DVOA_PATH)
+dvoa = load_dvoa(DVOA_PATH, "off")
 
 print("✅ Data loaded.")
-print(f"UVM: {uvm.shape}, Weights: {wts.shape}, DVOA: {dvoa.shape}")
+if uvm is not None:
+    memory_report("TOM Part 4", "ingest", base=uvm)
+    print(f"UVM: {uvm.shape}, Weights: {wts.shape}, DVOA: {dvoa.shape}")
+else:
+    print(f"UVM: streamed from {UVM_PATH}, Weights: {wts.shape}, DVOA: {dvoa.shape}")
 
-# ---------- Clean DVOA ----------
-dvoa.columns = dvoa.columns.str.strip().str.upper()
-dvoa.rename(columns={"TEAM":"Team","DVOA":"OffensiveDVOA",
-                     "PASS":"PassDVOA","RUSH":"RushDVOA"}, inplace=True)
-dvoa = dvoa[["Team","OffensiveDVOA","PassDVOA","RushDVOA"]]
-
-# ---------- Normalize team names ----------
-fix = {"ARZ":"ARI","BLT":"BAL","CLV":"CLE","HST":"HOU","SF":"SFO","LA":"LAR"}
-uvm["Team"] = uvm["Team"].replace(fix).replace({"SFO":"SF"})
-dvoa["Team"] = dvoa["Team"].replace({"SFO":"SF"})
+# ---------- Normalize team names (DVOA already normalized by load_dvoa) ----------
+if uvm is not None:
+    uvm["Team"] = fix_teams(uvm["Team"])
 
 # ---------- Build coefficient dicts ----------
-def coef_map(phase, needed):
-    sub = wts[(wts["Phase"]==phase) & (wts["Metric"].isin(needed))]
-    m = dict(zip(sub["Metric"], sub["Ridge"]))
-    for k in needed:
-        m.setdefault(k, 0.0)
-    return m
-
-pass_need = ["AirScore","ReceiveScore","BlockScore"]
-rush_need = ["RushScore","BlockScore"]
-
-beta_pass = coef_map("Pass", pass_need)
-beta_rush = coef_map("Rush", rush_need)
-
-# ---------- Compute per-player TOM ----------
-for c in ["AirScore","RushScore","ReceiveScore","BlockScore"]:
-    if c not in uvm.columns: 
-        uvm[c] = 0.0
-
-uvm["PassTOM"] = (
-    beta_pass["AirScore"]     * uvm["AirScore"] +
-    beta_pass["ReceiveScore"] * uvm["ReceiveScore"] +
-    beta_pass["BlockScore"]   * uvm["BlockScore"]
-)
-uvm["RushTOM"] = (
-    beta_rush["RushScore"]    * uvm["RushScore"] +
-    beta_rush["BlockScore"]   * uvm["BlockScore"]
-)
-uvm["TotalTOM"] = uvm["PassTOM"] + uvm["RushTOM"]
-
-# =====================================================
-# Phase-weighted calibration (post-hoc adjustments)
-# =====================================================
-
-PASS_WEIGHT = 1.5
-RUSH_WEIGHT = 1.0
-NUDGE_AIR   = 1.5
-NUDGE_REC   = 0.5
-
-uvm["PassTOM_Adjusted"] = (
-    NUDGE_AIR * beta_pass["AirScore"]     * uvm["AirScore"] +
-    NUDGE_REC * beta_pass["ReceiveScore"] * uvm["ReceiveScore"] +
-               beta_pass["BlockScore"]    * uvm["BlockScore"]
-)
-
-uvm["TotalTOM_Adjusted"] = (
-    PASS_WEIGHT * uvm["PassTOM_Adjusted"] +
-    RUSH_WEIGHT * uvm["RushTOM"]
-)
-
-# ---------- Team-level aggregation ----------
-team = (
-    uvm.groupby("Team", as_index=False)
-    [["PassTOM","RushTOM","TotalTOM","TotalTOM_Adjusted"]]
-    .sum()
-    .merge(dvoa, on="Team", how="inner")
-)
-
-# ---------- Correlations ----------
-corr_pass = team["PassTOM"].corr(team["PassDVOA"])
-corr_rush = team["RushTOM"].corr(team["RushDVOA"])
-corr_off  = team["TotalTOM"].corr(team["OffensiveDVOA"])
-corr_off_adj = team["TotalTOM_Adjusted"].corr(team["OffensiveDVOA"])
-
-print("\n📈 Correlations:")
-print(f"  PassTOM vs Pass DVOA: {corr_pass:.3f}")
-print(f"  RushTOM vs Rush DVOA: {corr_rush:.3f}")
-print(f"  TotalTOM vs Offensive DVOA: {corr_off:.3f}")
-print(f"  TotalTOM_Adjusted vs Offensive DVOA: {corr_off_adj:.3f}")
+beta_pass = coef_map(wts, "Pass", TOM_PASS_NEED)
+beta_rush = coef_map(wts, "Rush", TOM_RUSH_NEED)
+
+# ---------- Compute per-player TOM + team-level aggregation ----------
+# Core, nudged and phase-weighted variants come out of one kernel pass
+tom_cols = ["PassTOM","RushTOM","TotalTOM","TotalTOM_Adjusted","PassTOM_Adjusted"]
+if uvm is not None:
+    score_tom(uvm, beta_pass, beta_rush)
+    team = uvm.groupby("Team", as_index=False)[tom_cols].sum()
+else:
+    spill = SPILL_DIR + "tom_base"
+    partition(UVM_PATH, "Team", spill, transform=lambda c: c.assign(Team=fix_teams(c["Team"])))
+    team = score_aggregate(spill, lambda part, sketch, fold: score_tom(part, beta_pass, beta_rush, sketch=sketch, fold=fold),
+                           tom_cols, how="sum")[["Team"] + tom_cols]
+    memory_report("TOM Part 4", "ingest", team=team)
+team = team.merge(dvoa, on="Team", how="inner")
+
+# ---------- Correlations (with permutation p-values) ----------
+corr_pairs = {
+    "PassTOM vs Pass DVOA":                ("PassTOM",           "PassDVOA"),
+    "PassTOM_Adjusted vs Pass DVOA":       ("PassTOM_Adjusted",  "PassDVOA"),
+    "RushTOM vs Rush DVOA":                ("RushTOM",           "RushDVOA"),
+    "TotalTOM vs Offensive DVOA":          ("TotalTOM",          "OffensiveDVOA"),
+    "TotalTOM_Adjusted vs Offensive DVOA": ("TotalTOM_Adjusted", "OffensiveDVOA"),
+}
+corr_tbl = correlation_table(team, corr_pairs)
+
+print("\n📈 Correlations (* = permutation p < 0.05):")
+print_correlation_table(corr_tbl)
+
+corr_tbl.to_csv(BASE + "UVM_DVOA_Correlation_Tests.csv", index=False)
+print(f"📁 Saved: {BASE}UVM_DVOA_Correlation_Tests.csv")
+
+# ---------- Score store (season-keyed SQLite) ----------
+if STORE:
+    try:
+        write_season(team, "teams", SEASON, Side="off")
+        print(f"✅ Season {SEASON} offense team aggregates stored in {DB_PATH}")
+    except Exception as e:
+        print(f"(Info) Score store skipped: {e}")
 
 # ---------- Visualization ----------
-plt.figure(figsize=(11,6))
-team_sorted = team.sort_values("TotalTOM_Adjusted", ascending=False)
-
-sns.barplot(data=team_sorted, x="Team", y="TotalTOM_Adjusted",
-            color="#4B8BBE", alpha=0.8, label="TotalTOM_Adjusted")
-sns.lineplot(data=team_sorted, x="Team", y="OffensiveDVOA",
-             color="#E06C75", marker="o", label="OffensiveDVOA")
+if FIGURES:
+    team_sorted = team.sort_values("TotalTOM_Adjusted", ascending=False)
+    render_figures([
+        figure_spec("UVM_TeamRank_TOM_vs_DVOA", "team_bar_line",
+                    team_sorted[["Team", "TotalTOM_Adjusted", "OffensiveDVOA"]], dpi=300,
+                    bar="TotalTOM_Adjusted", line="OffensiveDVOA", figsize=(11, 6),
+                    title="Team-Level Comparison: Adjusted TOM vs Offensive DVOA",
+                    ylabel="Scaled Value", xlabel="Team (sorted by TotalTOM_Adjusted)"),
+    ], BASE, report=REPORT)
 
-plt.title("Team-Level Comparison: Adjusted TOM vs Offensive DVOA", fontsize=13, weight='bold')
-plt.ylabel("Scaled Value")
-plt.xlabel("Team (sorted by TotalTOM_Adjusted)")
-plt.xticks(rotation=45, ha="right", fontsize=8)
-plt.legend(frameon=False)
-plt.grid(axis='y', linestyle='--', alpha=0.6)
-plt.tight_layout()
-plt.savefig(BASE + "UVM_TeamRank_TOM_vs_DVOA.png", dpi=300)
-plt.close()
-print("📊 Saved: UVM_TeamRank_TOM_vs_DVOA.png")
\ No newline at end of file
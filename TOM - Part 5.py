@@ -4,69 +4,49 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from dtypes import memory_report, read_compact
+from figures import figure_spec, render_figures
+from replacement import TOM_ROSTER_SLOTS, replacement_baselines, update_baselines, value_over_replacement
+from runtime import FIGURES, REPORT, SEASON, STORE, USE_DVOA_PROXY
+from leaderboard import Leaderboard
+from score_store import DB_PATH, season_history, write_season
+from scoring_kernel import (
+    TOM_PASS_NEED, TOM_PHASES, TOM_POS_MAP, TOM_RUSH_NEED, TOM_ROLE_MULT, coef_map, decompose, feature_contributions,
+    role_calibrate, save_decomposition, score_tom
+)
+from teams import fix_teams, load_dvoa
 
 
 BASE = "/Users/anokhpalakurthi/Downloads/"
 UVM_PATH   = BASE + "Unified_Value_Model_Base.csv"
 WEIGHTS_SP = BASE + "UVM_Calibrated_Weights_SplitPhase.csv"
-DVOA_PATH  = BASE + "Offensive DVOA.csv"
+DVOA_PATH  = BASE + ("Offensive DVOA Proxy.csv" if USE_DVOA_PROXY else "Offensive DVOA.csv")
 
 # ---------- Load ----------
-uvm = pd.read_csv(UVM_PATH)
+uvm = read_compact(UVM_PATH)
 wts = pd.read_csv(WEIGHTS_SP)
+memory_report("TOM Part 5", "ingest", base=uvm)
 print(f"UVM: {uvm.shape}, Weights: {wts.shape}")
 
 # ---------- Build coefficient dicts ----------
-def coef_map(phase, needed):
-    sub = wts[(wts["Phase"] == phase) & (wts["Metric"].isin(needed))]
-    m = dict(zip(sub["Metric"], sub["Ridge"]))
-    for k in needed:
-        m.setdefault(k, 0.0)
-    return m
-
-pass_need = ["AirScore", "ReceiveScore", "BlockScore"]
-rush_need = ["RushScore", "BlockScore"]
-
-beta_pass = coef_map("Pass", pass_need)
-beta_rush = coef_map("Rush", rush_need)
+beta_pass = coef_map(wts, "Pass", TOM_PASS_NEED)
+beta_rush = coef_map(wts, "Rush", TOM_RUSH_NEED)
 
 print("Pass weights:", beta_pass)
 print("Rush weights:", beta_rush)
 
-# ---------- Ensure score cols exist ----------
-for c in ["AirScore", "RushScore", "ReceiveScore", "BlockScore"]:
-    if c not in uvm.columns:
-        uvm[c] = 0.0
-
-# ---------- Compute Split-Phase TOM ----------
-uvm["PassTOM"] = (
-    beta_pass["AirScore"] * uvm["AirScore"] +
-    beta_pass["ReceiveScore"] * uvm["ReceiveScore"] +
-    beta_pass["BlockScore"] * uvm["BlockScore"]
-)
-uvm["RushTOM"] = (
-    beta_rush["RushScore"] * uvm["RushScore"] +
-    beta_rush["BlockScore"] * uvm["BlockScore"]
-)
-uvm["TotalTOM"] = uvm["PassTOM"] + uvm["RushTOM"]
+# ---------- Compute Split-Phase + Phase-weighted TOM (one kernel pass) ----------
+C = score_tom(uvm, beta_pass, beta_rush)
 
 # =====================================================
-# NEW: Phase weighting (post-hoc calibration)
+# Optional tuning of phase weights (post-hoc calibration)
 # =====================================================
 USE_TUNER = False
-PASS_WEIGHT = 1.50
-RUSH_WEIGHT = 1.00
 
 # --- Optional tuning using team-level corr with DVOA ---
 if USE_TUNER:
-    dvoa = pd.read_csv(DVOA_PATH)
-    dvoa.columns = dvoa.columns.str.strip().str.upper()
-    dvoa.rename(columns={"TEAM": "Team", "DVOA": "OffensiveDVOA"}, inplace=True)
-    fix = {"ARZ": "ARI", "BLT": "BAL", "CLV": "CLE", "HST": "HOU", "SF": "SFO", "LA": "LAR"}
-    uvm["Team"] = uvm["Team"].replace(fix).replace({"SFO": "SF"})
-    dvoa["Team"] = dvoa["Team"].replace({"SFO": "SF"})
+    dvoa = load_dvoa(DVOA_PATH, "off")
+    uvm["Team"] = fix_teams(uvm["Team"])
 
     team_phase = uvm.groupby("Team", as_index=False)[["PassTOM", "RushTOM"]].sum()
     merged = team_phase.merge(dvoa[["Team", "OffensiveDVOA"]], on="Team", how="inner")
@@ -80,24 +60,9 @@ if USE_TUNER:
             r = total.corr(merged["OffensiveDVOA"])
             if pd.notna(r) and r > best["corr"]:
                 best = {"pw": pw, "rw": rw, "corr": r}
-    PASS_WEIGHT = best["pw"] if best["pw"] else PASS_WEIGHT
-    RUSH_WEIGHT = best["rw"] if best["rw"] else RUSH_WEIGHT
-    print(f"🔧 Tuned weights → PASS={PASS_WEIGHT}, RUSH={RUSH_WEIGHT} (corr≈{best['corr']:.3f})")
-
-# --- Radical intra-pass tilt ---
-NUDGE_AIR = 1.50
-NUDGE_REC = 0.50
-
-uvm["PassTOM_Adjusted"] = (
-    NUDGE_AIR * beta_pass["AirScore"] * uvm["AirScore"] +
-    NUDGE_REC * beta_pass["ReceiveScore"] * uvm["ReceiveScore"] +
-    beta_pass["BlockScore"] * uvm["BlockScore"]
-)
-
-uvm["TotalTOM_Adjusted"] = (
-    PASS_WEIGHT * uvm["PassTOM_Adjusted"] +
-    RUSH_WEIGHT * uvm["RushTOM"]
-)
+    if best["pw"]:
+        C = score_tom(uvm, beta_pass, beta_rush, pass_weight=best["pw"], rush_weight=best["rw"])
+        print(f"🔧 Tuned weights → PASS={best['pw']}, RUSH={best['rw']} (corr≈{best['corr']:.3f})")
 
 # =====================================================
 # ---------- Offense-only filter + optional volume floor ----------
@@ -107,50 +72,34 @@ off_positions = {"QB","HB","RB","FB","WR","TE","T","G","C","LT","LG","RT","RG","
 uvm_off = uvm[uvm["Position"].isin(off_positions)].copy()
 
 APPLY_VOLUME_FLOOR = True
-try:
-    if APPLY_VOLUME_FLOOR:
-        passing   = pd.read_csv(BASE + "Passing_PFF_Clean.csv")[["Player","Team","Position","Dropbacks"]]
-        rushing   = pd.read_csv(BASE + "Rushing_PFF_Clean.csv")[["Player","Team","Position","RushAttempts"]]
-        receiving = pd.read_csv(BASE + "Receiving_PFF_Clean.csv")[["Player","Team","Position","Targets"]]
-        blocking  = pd.read_csv(BASE + "Blocking_PFF_Clean.csv")[["Player","Team","Position","TotalBlockSnaps"]]
-
-        key = ["Player","Team","Position"]
-        vol = (
-            uvm_off[key].drop_duplicates()
-            .merge(passing, on=key, how="left")
-            .merge(rushing, on=key, how="left")
-            .merge(receiving, on=key, how="left")
-            .merge(blocking, on=key, how="left")
-        )
-        for c in ["Dropbacks", "RushAttempts", "Targets", "TotalBlockSnaps"]:
-            if c in vol.columns:
-                vol[c] = vol[c].fillna(0)
-        uvm_off = uvm_off.merge(vol, on=key, how="left")
-
-        floor = (
-            (uvm_off.get("Dropbacks", 0) >= 50)
-            | (uvm_off.get("RushAttempts", 0) >= 30)
-            | (uvm_off.get("Targets", 0) >= 30)
-            | (uvm_off.get("TotalBlockSnaps", 0) >= 200)
-        )
-        uvm_off = uvm_off[floor].copy()
-except Exception as e:
-    print(f"(Info) Volume merge/floor skipped: {e}")
+# Volumes and the floor flag come from Part 2's base table (no re-read of the clean CSVs)
+if APPLY_VOLUME_FLOOR:
+    if "MeetsVolumeFloor" in uvm_off.columns:
+        uvm_off = uvm_off[uvm_off["MeetsVolumeFloor"].astype(bool)]
+    else:
+        print("(Info) Volume floor skipped: base table has no MeetsVolumeFloor column (re-run Part 2)")
+uvm_off = uvm_off.drop(columns="MeetsVolumeFloor", errors="ignore")
+
+# --- Value over replacement (baselines from this season's score distribution) ---
+vor_in = uvm_off.assign(Season=str(SEASON), PositionGroup=uvm_off["Position"].map(TOM_POS_MAP).fillna("Other"))
+baselines = update_baselines(BASE + "Replacement_Baselines.csv",
+                             replacement_baselines(vor_in, "TotalTOM_Adjusted", TOM_ROSTER_SLOTS), "off")
+uvm_off["TOM_VOR"] = value_over_replacement(vor_in, baselines[baselines["Side"] == "off"], "TotalTOM_Adjusted")
+print(f"\n📏 Replacement baselines ({SEASON}, TotalTOM_Adjusted):")
+print(baselines[(baselines["Side"] == "off") & (baselines["Season"] == str(SEASON))]
+      [["PositionGroup", "Slots", "Rank", "Players", "Baseline"]].round(3).to_string(index=False))
 
 # --- QB premium (WAR-style, after volume filter) ---
-uvm_off["TotalTOM_Adjusted"] = np.where(
-    uvm_off["Position"] == "QB",
-    uvm_off["TotalTOM_Adjusted"] * 1.25,
-    uvm_off["TotalTOM_Adjusted"]
-)
+role_calibrate(uvm_off, "TotalTOM_Adjusted", "TotalTOM_Adjusted", TOM_ROLE_MULT, "Position")
 
 # =====================================================
 # ---------- Leaderboards ----------
 # =====================================================
 
-top25_total = uvm_off.sort_values("TotalTOM_Adjusted", ascending=False).head(25)
-top25_pass  = uvm_off.sort_values("PassTOM_Adjusted", ascending=False).head(25)
-top25_rush  = uvm_off.sort_values("RushTOM", ascending=False).head(25)
+board = Leaderboard(uvm_off, ["TotalTOM_Adjusted", "PassTOM_Adjusted", "RushTOM"])
+top25_total = board.top_k("TotalTOM_Adjusted", 25)
+top25_pass  = board.top_k("PassTOM_Adjusted", 25)
+top25_rush  = board.top_k("RushTOM", 25)
 
 def show(df, label):
     cols = [
@@ -167,36 +116,52 @@ show(top25_rush,  "RushTOM")
 
 # ---------- Diagnostics ----------
 print("\n📊 Positional Averages (mean TotalTOM_Adjusted):")
-print(uvm_off.groupby("Position")["TotalTOM_Adjusted"].mean().sort_values(ascending=False).round(2))
+print(board.group_summary("TotalTOM_Adjusted", "Position")["mean"].sort_values(ascending=False).round(2))
 
 # ---------- Export ----------
+memory_report("TOM Part 5", "leaderboard", leaderboard=uvm_off)
 uvm_off.to_csv(BASE + "UVM_Player_Leaderboard_PhaseWeighted.csv", index=False)
 top25_total.to_csv(BASE + "UVM_Player_Leaderboard_PhaseWeighted_Top25_Total.csv", index=False)
 top25_pass.to_csv(BASE + "UVM_Player_Leaderboard_PhaseWeighted_Top25_Pass.csv", index=False)
 top25_rush.to_csv(BASE + "UVM_Player_Leaderboard_PhaseWeighted_Top25_Rush.csv", index=False)
 print("\n✅ Exported phase-weighted player leaderboards.")
 
-# Sort descending so highest TOM is on top
-viz = top25_total.sort_values("TotalTOM_Adjusted", ascending=False)
-
-plt.figure(figsize=(10,8))
-sns.barplot(
-    data=viz,
-    y="Player",
-    x="TotalTOM_Adjusted",
-    hue="Position",
-    dodge=False,
-    palette="coolwarm",
-    order=viz["Player"]  # preserve sorted order
-)
-
-plt.title("Top 25 Offensive Players in 2024 by Adjusted TOM Score", fontsize=14, weight="bold")
-plt.xlabel("Adjusted TOM Score (Phase-weighted)")
-plt.ylabel("")
-plt.grid(axis="x", linestyle="--", alpha=0.5)
-plt.legend(title="Position", bbox_to_anchor=(1.05, 1), loc="upper left")
-plt.tight_layout()
-
-plt.savefig(BASE + "UVM_Top25_TotalTOM_BarChart.png", dpi=300)
-plt.show()
-print("📊 Saved Top 25 TotalTOM visualization.")
\ No newline at end of file
+# ---------- Score decomposition (player × term; explanations are a lookup) ----------
+feats = feature_contributions(BASE + "UVM_Feature_Contributions.csv", uvm_off)
+T, terms, levels = decompose(uvm_off, C, TOM_PHASES, "TotalTOM_Adjusted", feats)
+save_decomposition(BASE + "UVM_Score_Decomposition.npz", uvm_off, T, terms, levels)
+lead = int(np.argmax(uvm_off["TotalTOM_Adjusted"].to_numpy()))
+top_terms = pd.Series(T[lead], index=terms)[[lv != "feature" for lv in levels]]
+print(f"\n🧩 {uvm_off['Player'].iloc[lead]}: TotalTOM_Adjusted {uvm_off['TotalTOM_Adjusted'].iloc[lead]:.3f} =")
+print(top_terms[top_terms.abs() > 1e-9].round(3).to_string())
+
+# ---------- Score store (season-keyed SQLite) ----------
+if STORE:
+    try:
+        write_season(uvm_off, "players", SEASON, Side="off")
+        write_season(wts, "coefficients", SEASON, Side="off")
+        print(f"✅ Season {SEASON} offense players + weights stored in {DB_PATH}")
+    except Exception as e:
+        print(f"(Info) Score store skipped: {e}")
+
+# ---------- Comparables index (every stored season + this one) ----------
+try:
+    from similarity import OFF_VECTOR, build_index
+    history = season_history("players", "off", SEASON) if STORE else None
+    sim = build_index(uvm_off.assign(Season=SEASON), OFF_VECTOR, history)
+    sim.save(BASE + "UVM_Similarity_Index.npz")
+    lead = top25_total["Player"].iloc[0]
+    print(f"\n🔍 Most similar to {lead} ({len(sim.X)} player-seasons indexed):")
+    print(sim.similar(lead, 5).round(3))
+except Exception as e:
+    print(f"(Info) Similarity index skipped: {e}")
+
+# Top 25 chart (board order is already highest TOM first)
+if FIGURES:
+    render_figures([
+        figure_spec("UVM_Top25_TotalTOM_BarChart", "top_bar",
+                    top25_total[["Player", "TotalTOM_Adjusted", "Position"]], dpi=300,
+                    x="TotalTOM_Adjusted", hue="Position", palette="coolwarm",
+                    title="Top 25 Offensive Players in 2024 by Adjusted TOM Score",
+                    xlabel="Adjusted TOM Score (Phase-weighted)"),
+    ], BASE, report=REPORT)
@@ -0,0 +1,116 @@
+# ======================================
+# Diagnostics: multicollinearity for whole feature blocks
+# ======================================
+# VIF_j is the j-th diagonal entry of the inverse correlation matrix, so one
+# eigendecomposition of R gives every VIF plus the condition number
+# sqrt(λmax / λmin) with no per-column OLS refits. All array helpers work on
+# stacked (..., n, p) inputs, so seasons or bootstrap replicates go through
+# one batched eigh call.
+
+import numpy as np
+import pandas as pd
+
+EIG_TOL = 1e-12      # eigenvalues below EIG_TOL * λmax count as exact collinearity
+VIF_FLAG = 10.0      # conventional "worry" threshold
+TOP_PAIRS = 5
+
+
+def corr_stack(X):
+    """Correlation matrices for stacked (..., n, p) arrays (constant columns → 0 rows/cols)."""
+    X = np.asarray(X, dtype=float)
+    Z = X - X.mean(axis=-2, keepdims=True)
+    ss = np.sqrt((Z ** 2).sum(axis=-2, keepdims=True))
+    Z = Z / np.where(ss == 0, 1.0, ss)
+    return np.swapaxes(Z, -1, -2) @ Z
+
+
+def vif_cond(R):
+    """VIFs (diag of R⁻¹) and condition numbers for stacked (..., p, p) correlation matrices."""
+    w, V = np.linalg.eigh(R)
+    floor = np.maximum(w[..., -1:], EIG_TOL) * EIG_TOL
+    w = np.maximum(w, floor)
+    vif = (V ** 2 / w[..., None, :]).sum(axis=-1)
+    cond = np.sqrt(w[..., -1] / w[..., 0])
+    return vif, cond
+
+
+def _clean(df, cols):
+    cols = [c for c in cols if c in df.columns]
+    X = df[cols].apply(pd.to_numeric, errors="coerce").dropna()
+    keep = [c for c in cols if X[c].nunique() > 1]
+    return X[keep], [c for c in cols if c not in keep]
+
+
+def collinearity(df, cols):
+    """VIF table, condition number and correlation matrix for one feature block.
+
+    Rows with missing values are dropped; constant or absent columns are
+    reported in `dropped` instead of poisoning the inverse.
+    """
+    X, dropped = _clean(df, cols)
+    if X.shape[1] < 2 or len(X) <= X.shape[1]:
+        return {"vif": pd.DataFrame(columns=["Variable", "VIF", "MaxAbsCorr", "MostCorrelatedWith"]),
+                "cond": np.nan, "corr": pd.DataFrame(), "n": len(X), "dropped": dropped}
+    R = corr_stack(X.to_numpy())
+    vif, cond = vif_cond(R)
+    off = np.abs(R - np.eye(len(R)))
+    vif_df = pd.DataFrame({
+        "Variable": X.columns,
+        "VIF": vif,
+        "MaxAbsCorr": off.max(axis=1),
+        "MostCorrelatedWith": X.columns[off.argmax(axis=1)],
+    })
+    return {"vif": vif_df, "cond": float(cond), "corr": pd.DataFrame(R, index=X.columns, columns=X.columns),
+            "n": len(X), "dropped": dropped}
+
+
+def top_pairs(corr, k=TOP_PAIRS):
+    """Strongest pairwise correlations (upper triangle), by |r|."""
+    if corr.empty:
+        return pd.DataFrame(columns=["A", "B", "r"])
+    i, j = np.triu_indices(len(corr), k=1)
+    r = corr.to_numpy()[i, j]
+    order = np.argsort(-np.abs(r), kind="stable")[:k]
+    return pd.DataFrame({"A": corr.index[i[order]], "B": corr.columns[j[order]], "r": r[order]})
+
+
+def bootstrap_collinearity(df, cols, n_boot=500, seed=42, chunk=256):
+    """VIF / condition-number quantiles over bootstrap resamples of the rows.
+
+    Replicates are drawn as index arrays and evaluated in stacked chunks, so
+    the cost is a few batched matmuls + one batched eigh per chunk.
+    """
+    X, _ = _clean(df, cols)
+    A = X.to_numpy()
+    n, p = A.shape
+    rng = np.random.default_rng(seed)
+    vifs, conds = [], []
+    for start in range(0, n_boot, chunk):
+        idx = rng.integers(0, n, size=(min(chunk, n_boot - start), n))
+        v, c = vif_cond(corr_stack(A[idx]))
+        vifs.append(v)
+        conds.append(c)
+    vifs, conds = np.concatenate(vifs), np.concatenate(conds)
+    q = [0.05, 0.5, 0.95]
+    out = pd.DataFrame(np.quantile(vifs, q, axis=0).T, columns=["VIF_p05", "VIF_p50", "VIF_p95"])
+    out.insert(0, "Variable", X.columns)
+    out["P(VIF>10)"] = (vifs > VIF_FLAG).mean(axis=0)
+    return out, pd.Series(np.quantile(conds, q), index=["Cond_p05", "Cond_p50", "Cond_p95"])
+
+
+def print_collinearity(name, df, cols):
+    """Console report in the style of the Part scripts; returns the collinearity dict."""
+    rep = collinearity(df, cols)
+    print(f"\n🔎 Collinearity — {name} (n={rep['n']}, p={len(rep['vif'])}, "
+          f"condition number={rep['cond']:.1f})")
+    if rep["dropped"]:
+        print(f"   (Info) dropped constant/missing columns: {rep['dropped']}")
+    print(rep["vif"].round(3).to_string(index=False))
+    flagged = rep["vif"].loc[rep["vif"]["VIF"] > VIF_FLAG, "Variable"].tolist()
+    if flagged:
+        print(f"   ⚠️ VIF > {VIF_FLAG:g}: {flagged}")
+    pairs = top_pairs(rep["corr"])
+    if not pairs.empty:
+        print("   Strongest pairwise correlations:")
+        print(pairs.round(3).to_string(index=False))
+    return rep
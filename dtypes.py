@@ -0,0 +1,116 @@
+# ======================================
+# Dtypes: compact column policy and per-stage memory report
+# ======================================
+# read_csv hands back int64 / float64 / Python strings for everything. The
+# policy, applied wherever a stage reads a table (and again after merges,
+# which fall back to strings when category sets differ):
+#
+#   identifiers   Player / Team / Position / PositionGroup / ... → category
+#   counts        integer columns → narrowest int with HEADROOM× spare range,
+#                 so sums of a few snap columns can't wrap
+#   floats        stay float64 by default: a float32 column, even an exact one
+#                 such as a snap count read as 412.0, drags everything computed
+#                 from it (snap shares → weights → scores) into float32.
+#                 METRIC_FLOAT32=1 opts in: whole-number float columns become
+#                 narrow ints (int / int is still float64) and other non-model
+#                 floats float32 (anything named as a score, TOM/TDM component,
+#                 DVOA or weight stays float64 for the ridge math)
+#
+# By default the written CSVs are byte-identical to the uncompacted run.
+# memory_report() records deep frame sizes and peak RSS per script × stage in
+# Memory_Report.csv, one row per frame, replacing that stage's previous rows.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from runtime import FLOAT32
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+REPORT_PATH = BASE + "Memory_Report.csv"
+
+ID_COLS = ["Player", "Team", "Position", "PositionGroup", "PrimaryTeam", "Side", "PlayerID"]
+KEEP_FLOAT64 = ("Score", "TOM", "TDM", "DVOA", "Weight", "Ridge", "VOR")
+HEADROOM = 16
+INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def _narrow_int(v):
+    lo, hi = (int(v.min()), int(v.max())) if len(v) else (0, 0)
+    for t in INT_TYPES:
+        info = np.iinfo(t)
+        if lo * HEADROOM >= info.min and hi * HEADROOM <= info.max:
+            return t
+    return np.int64
+
+
+def compact(df, ids=ID_COLS, lossy_floats=FLOAT32):
+    """df with the dtype policy applied (values and float64 arithmetic unchanged unless lossy_floats)."""
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if c in ids and not pd.api.types.is_numeric_dtype(s):
+            out[c] = s.astype("category")
+        elif pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+            out[c] = s
+        elif pd.api.types.is_integer_dtype(s):
+            out[c] = s.astype(_narrow_int(s.to_numpy()))
+        elif s.dtype == np.float64 and lossy_floats and not any(k in c for k in KEEP_FLOAT64):
+            v = s.to_numpy()
+            whole = len(v) and not np.isnan(v).any() and np.array_equal(v, np.round(v)) \
+                and np.abs(v).max() < np.iinfo(np.int64).max / HEADROOM
+            out[c] = s.astype(_narrow_int(v)) if whole else s.astype(np.float32)
+        else:
+            out[c] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def recode(s, *maps):
+    """s.replace(m1).replace(m2)... for plain or categorical labels (categoricals remap categories, not rows)."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        for m in maps:
+            s = s.replace(m)
+        return s
+    cats = s.cat.categories.to_series()
+    for m in maps:
+        cats = cats.replace(m)
+    # rebuild from plain labels so categories stay sorted (groupby order = string order)
+    return s.map(dict(zip(cats.index, cats.to_numpy()))).astype(object).astype("category")
+
+
+def read_compact(path, **kw):
+    """pd.read_csv with the dtype policy applied."""
+    return compact(pd.read_csv(path, **kw))
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10    # bytes on macOS, KiB on Linux
+
+
+def memory_report(script, stage, path=REPORT_PATH, **frames):
+    """Record this stage's frame sizes and peak RSS; returns the whole report."""
+    rows = pd.DataFrame([{
+        "Script": script, "Stage": stage, "Frame": name, "Rows": len(df), "Cols": df.shape[1],
+        "MB": frame_mb(df),
+        "Categorical": sum(isinstance(t, pd.CategoricalDtype) for t in df.dtypes),
+        "Narrowed": sum(t in (np.int8, np.int16, np.int32, np.float32) for t in df.dtypes),
+        "PeakRSS_MB": peak_rss_mb(),
+    } for name, df in frames.items()])
+    if os.path.exists(path):
+        old = pd.read_csv(path)
+        old = old[~((old["Script"] == script) & (old["Stage"] == stage))]
+        rows = pd.concat([old, rows], ignore_index=True)
+    rows.to_csv(path, index=False)
+    return rows
@@ -0,0 +1,142 @@
+# ======================================
+# DVOA Proxy: team efficiency splits from local play-by-play
+# ======================================
+# Builds drop-in replacements for "Offensive DVOA.csv" / "Defensive DVOA.csv"
+# (Team, DVOA, Pass, Rush in percent) for seasons or leagues without DVOA.
+#
+# Per play:
+#   success  = yards ≥ 40% of to-go on 1st, 60% on 2nd, 100% on 3rd/4th
+#   value    = (success − league success rate in the same down / distance
+#               bucket / play type) / league success rate
+#            (+ EPA over situational expectation, when an EPA column exists)
+# Team value = mean over its plays × 100 ("% better than an average play in
+# the same situation"). With GameID present, per-game values go through the
+# same SRS solve as opponent_adjust, so strength of schedule is removed the way
+# DVOA does. Defense is the offense value allowed (negative = better), matching
+# the DVOA sign convention the Part 3/4 scripts expect.
+#
+# Everything is bincount over integer codes, so millions of plays take seconds.
+#
+#   python dvoa_proxy.py [season]   → Offensive / Defensive DVOA Proxy.csv
+
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from opponent_adjust import team_strengths
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+PBP_PATH = BASE + "Play_By_Play.csv"
+OFF_PROXY_PATH = BASE + "Offensive DVOA Proxy.csv"
+DEF_PROXY_PATH = BASE + "Defensive DVOA Proxy.csv"
+
+SUCCESS_FRAC = np.array([np.nan, 0.4, 0.6, 1.0, 1.0])      # index = down
+TOGO_BINS = np.array([0, 2, 4, 7, 10, 15])                  # distance buckets (right-open)
+EPA_WEIGHT = 0.5                                            # share of EPA in the blend when present
+
+# nflfastR-style names accepted as-is
+PBP_ALIASES = {
+    "posteam": "Offense", "defteam": "Defense", "play_type": "PlayType", "down": "Down",
+    "ydstogo": "ToGo", "yards_gained": "YardsGained", "epa": "EPA",
+    "game_id": "GameID", "season": "Season",
+}
+PBP_COLS = ["Offense", "Defense", "PlayType", "Down", "ToGo", "YardsGained", "EPA", "GameID", "Season"]
+
+
+def load_pbp(path=PBP_PATH, season=None):
+    """Read only the needed columns (pyarrow parser when installed)."""
+    head = pd.read_csv(path, nrows=0).columns
+    use = [c for c in head if PBP_ALIASES.get(c, c) in PBP_COLS]
+    engine = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+    pbp = pd.read_csv(path, usecols=use, engine=engine).rename(columns=PBP_ALIASES)
+    if season is not None and "Season" in pbp.columns:
+        pbp = pbp[pbp["Season"] == season]
+    return pbp
+
+
+def play_values(pbp):
+    """Success flag and situation-relative value for every scrimmage pass/run play."""
+    pt = pbp["PlayType"].astype(str).str.lower()
+    is_pass = pt.str.startswith("pass").to_numpy()
+    keep = is_pass | pt.isin(["run", "rush"]).to_numpy()
+    down = pd.to_numeric(pbp["Down"], errors="coerce").to_numpy()
+    keep &= np.isin(down, [1, 2, 3, 4])
+    plays = pbp.loc[keep, [c for c in PBP_COLS if c in pbp.columns]].reset_index(drop=True)
+    is_pass, down = is_pass[keep], down[keep].astype(int)
+
+    togo = pd.to_numeric(plays["ToGo"], errors="coerce").fillna(10).clip(lower=0).to_numpy()
+    gained = pd.to_numeric(plays["YardsGained"], errors="coerce").fillna(0).to_numpy()
+    success = (gained >= SUCCESS_FRAC[down] * togo).astype(float)
+
+    # situational baseline: down × distance bucket × play type
+    sit = (down - 1) * len(TOGO_BINS) * 2 + (np.digitize(togo, TOGO_BINS) - 1) * 2 + is_pass
+    n_sit = 4 * len(TOGO_BINS) * 2
+    cnt = np.bincount(sit, minlength=n_sit)
+    base = np.bincount(sit, weights=success, minlength=n_sit) / np.maximum(cnt, 1)
+    sr = success.mean()
+    value = (success - base[sit]) / sr
+    if "EPA" in plays.columns:
+        epa = pd.to_numeric(plays["EPA"], errors="coerce").fillna(0).to_numpy()
+        epa_oe = epa - (np.bincount(sit, weights=epa, minlength=n_sit) / np.maximum(cnt, 1))[sit]
+        value = (1 - EPA_WEIGHT) * value + EPA_WEIGHT * epa_oe / np.abs(epa).mean()
+
+    plays["IsPass"] = is_pass
+    plays["Success"] = success
+    plays["Value"] = value
+    return plays
+
+
+def _split_means(codes, n, value, splits):
+    """Per-group mean value for each split mask (NaN where a group has no plays)."""
+    out = {}
+    for k, m in splits.items():
+        cnt = np.bincount(codes, weights=m, minlength=n)
+        tot = np.bincount(codes, weights=value * m, minlength=n)
+        out[k] = np.where(cnt > 0, tot / np.maximum(cnt, 1), np.nan)
+    return pd.DataFrame(out)
+
+
+def efficiency(plays, adjust=True):
+    """(offense, defense) tables in the Team / DVOA / Pass / Rush source shape (percent)."""
+    is_pass = plays["IsPass"].to_numpy().astype(float)
+    splits = {"DVOA": np.ones(len(plays)), "Pass": is_pass, "Rush": 1.0 - is_pass}
+    v = plays["Value"].to_numpy()
+    tables = []
+    for col in ("Offense", "Defense"):
+        codes, teams = pd.factorize(plays[col])
+        t = _split_means(codes, len(teams), v, splits)
+        t.index = pd.Index(teams, name="Team")
+        tables.append(t)
+    off, dfn = tables
+
+    if adjust and "GameID" in plays.columns:
+        keys = ["GameID", "Offense", "Defense"]
+        g = plays.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+        games = plays[keys].drop_duplicates().reset_index(drop=True)
+        games = games.rename(columns={"Offense": "Team", "Defense": "Opponent"})
+        games = pd.concat([games, _split_means(g, len(games), v, splits)], axis=1)
+        for k in splits:
+            st, mu = team_strengths(games.loc[games[k].notna(), ["Team", "Opponent", k]], [k])
+            off[k] = (mu[k] + st[f"{k}_Off"]).reindex(off.index.astype(str)).to_numpy()
+            dfn[k] = (mu[k] - st[f"{k}_Def"]).reindex(dfn.index.astype(str)).to_numpy()
+
+    return tuple((t * 100).round(1).reset_index().sort_values("Team", ignore_index=True) for t in (off, dfn))
+
+
+if __name__ == "__main__":
+    if not os.path.exists(PBP_PATH):
+        print(f"(Info) DVOA proxy skipped: no play-by-play at {PBP_PATH}")
+    else:
+        pbp = load_pbp()
+        season = int(sys.argv[1]) if len(sys.argv) > 1 else (
+            int(pbp["Season"].max()) if "Season" in pbp.columns else None)
+        if season is not None and "Season" in pbp.columns:
+            pbp = pbp[pbp["Season"] == season]
+        plays = play_values(pbp)
+        off, dfn = efficiency(plays)
+        off.to_csv(OFF_PROXY_PATH, index=False)
+        dfn.to_csv(DEF_PROXY_PATH, index=False)
+        print(f"✅ DVOA proxy from {len(plays):,} plays (season {season}) → {OFF_PROXY_PATH}, {DEF_PROXY_PATH}")
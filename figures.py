@@ -0,0 +1,239 @@
+# ======================================
+# Figure Stage: off-screen rendering from lightweight plot specs
+# ======================================
+# Scripts hand over small specs (kind + the few columns a chart needs +
+# styling params) once their exports are written. Specs render on the Agg
+# backend in a process pool; a figure whose data/params hash matches the
+# manifest and whose PNG still exists is skipped. Optionally every figure in
+# the manifest is bundled into one static HTML report.
+#
+# Importing this module does not import matplotlib; only the workers do.
+
+import base64
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import pandas as pd
+
+MANIFEST = "figure_manifest.json"
+REPORT = "Metric_Figures_Report.html"
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def figure_spec(name, kind, data, dpi=150, **params):
+    """One chart: output name (no extension), renderer kind, plotting columns, styling."""
+    return {"name": name, "kind": kind, "data": data.reset_index(drop=True), "dpi": dpi, "params": params}
+
+
+def spec_hash(spec):
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(spec["data"], index=True).to_numpy().tobytes())
+    h.update(json.dumps([list(map(str, spec["data"].columns)), spec["kind"], spec["dpi"],
+                         spec["params"]], sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+# ---------- Renderers (run inside workers) ----------
+def _violin(plt, sns, df, p):
+    plt.figure(figsize=p.get("figsize", (10, 6)))
+    sns.violinplot(data=df, inner="box", cut=0, palette=p.get("palette", "muted"))
+    plt.title(p.get("title", ""), fontsize=p.get("title_size", 12), pad=p.get("title_pad", 6))
+    if "xlabel" in p:
+        plt.xlabel(p["xlabel"], fontsize=12)
+    if "ylabel" in p:
+        plt.ylabel(p["ylabel"], fontsize=12)
+    plt.axhline(0, color="gray", linestyle="--", linewidth=1)
+    if p.get("annotate"):
+        # mean ± std slightly above each mean
+        for i, col in enumerate(df.columns):
+            plt.text(i, df[col].mean() + 0.25, f"μ={df[col].mean():.2f}\nσ={df[col].std():.2f}",
+                     ha="center", va="bottom", fontsize=10, color="black", fontweight="medium")
+
+
+def _coef_bars(plt, sns, df, p):
+    plt.figure(figsize=p.get("figsize", (12, 6)))
+    sns.barplot(data=df, x="Metric", y="Weight", hue="Model", palette=p.get("palette", "viridis"))
+    plt.title(p.get("title", ""), fontsize=14, weight="bold")
+    if "ylabel" in p:
+        plt.ylabel(p["ylabel"])
+    if "xlabel" in p:
+        plt.xlabel(p["xlabel"])
+    plt.axhline(0, color="black", linewidth=1)
+    if "legend_title" in p:
+        plt.legend(title=p["legend_title"], fontsize=9)
+    plt.grid(axis="y", linestyle="--", alpha=0.6)
+
+
+def _regplot(plt, sns, df, p):
+    plt.figure(figsize=p.get("figsize", (6, 5)))
+    sns.regplot(data=df, x="Actual", y="Predicted", scatter_kws={"s": 70}, line_kws={"color": "red"})
+    plt.xlabel(p.get("xlabel", "Actual"))
+    plt.ylabel(p.get("ylabel", "Predicted"))
+    plt.title(p.get("title", ""))
+    plt.grid(True, ls="--", alpha=0.5)
+
+
+def _heatmap(plt, sns, df, p):
+    plt.figure(figsize=p.get("figsize", (6, 5)))
+    sns.heatmap(df.set_index(df.columns[0]), annot=True, cmap="coolwarm", center=0, fmt=".2f")
+    plt.title(p.get("title", ""))
+
+
+def _team_bar_line(plt, sns, df, p):
+    """Team bars for the metric plus the DVOA line (own y-axis when twin=True)."""
+    bar, line = p["bar"], p["line"]
+    if p.get("twin"):
+        sns.set_theme(style="whitegrid")
+        plt.rcParams.update({
+            "axes.edgecolor": "0.3", "axes.linewidth": 0.8, "axes.labelweight": "semibold",
+            "axes.titleweight": "bold", "font.size": 11,
+            "figure.facecolor": "white", "axes.facecolor": "white"
+        })
+    fig, ax1 = plt.subplots(figsize=p.get("figsize", (11, 6)))
+    sns.barplot(data=df, x="Team", y=bar, color=p.get("bar_color", "#4B8BBE"),
+                alpha=p.get("bar_alpha", 0.8), ax=ax1, **({} if p.get("twin") else {"label": bar}))
+    ax2 = ax1.twinx() if p.get("twin") else ax1
+    sns.lineplot(data=df, x="Team", y=line, color=p.get("line_color", "#E06C75"), marker="o",
+                 ax=ax2, **({"markersize": 5, "linewidth": 2} if p.get("twin") else {"label": line}))
+    if p.get("twin"):
+        ax1.set_ylabel(p.get("ylabel", bar), fontsize=12, labelpad=10, weight="semibold")
+        ax1.set_xlabel("")
+        ax1.grid(axis="y", linestyle="--", alpha=0.4)
+        ax2.set_ylabel(p.get("ylabel2", line), fontsize=12, color=p.get("line_color"), weight="semibold")
+        ax2.tick_params(axis="y", colors=p.get("line_color"))
+        ax2.grid(False)
+        plt.title(p.get("title", ""), fontsize=14, weight="bold", pad=12)
+        plt.xticks(rotation=0)
+    else:
+        plt.title(p.get("title", ""), fontsize=13, weight="bold")
+        plt.ylabel(p.get("ylabel", ""))
+        plt.xlabel(p.get("xlabel", ""))
+        plt.xticks(rotation=45, ha="right", fontsize=8)
+        plt.legend(frameon=False)
+        plt.grid(axis="y", linestyle="--", alpha=0.6)
+
+
+def _top_bar(plt, sns, df, p):
+    """Horizontal top-N bars, preserving the row order of df."""
+    plt.figure(figsize=p.get("figsize", (10, 8)))
+    sns.barplot(data=df, y="Player", x=p["x"], hue=p["hue"], dodge=False,
+                palette=p.get("palette", "viridis"), order=df["Player"])
+    plt.title(p.get("title", ""), fontsize=14, weight="bold")
+    plt.xlabel(p.get("xlabel", p["x"]))
+    plt.ylabel("")
+    plt.grid(axis="x", linestyle="--", alpha=0.5)
+    plt.legend(title=p.get("legend_title", p["hue"]), bbox_to_anchor=(1.05, 1), loc="upper left")
+
+
+RENDERERS = {
+    "violin": _violin, "coef_bars": _coef_bars, "regplot": _regplot,
+    "heatmap": _heatmap, "team_bar_line": _team_bar_line, "top_bar": _top_bar,
+}
+
+
+def _render_one(spec, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    RENDERERS[spec["kind"]](plt, sns, spec["data"], spec["params"])
+    plt.tight_layout()
+    plt.savefig(path, dpi=spec["dpi"])
+    plt.close("all")
+    return path
+
+
+# ---------- Manifest / report ----------
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir, entries):
+    m = _load_manifest(out_dir)
+    m.update(entries)
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(m, f, indent=1, sort_keys=True)
+
+
+def write_html_report(out_dir, path=None, title="TOM / TDM Figures"):
+    """Single static HTML page embedding every figure recorded in the manifest."""
+    path = path or os.path.join(out_dir, REPORT)
+    parts = [f"<!doctype html><html><head><meta charset='utf-8'><title>{title}</title>",
+             "<style>body{font-family:sans-serif;margin:2em}img{max-width:100%;"
+             "border:1px solid #ddd;margin-bottom:2em}</style></head><body>", f"<h1>{title}</h1>"]
+    for name in sorted(_load_manifest(out_dir)):
+        png = os.path.join(out_dir, name + ".png")
+        if os.path.exists(png):
+            with open(png, "rb") as f:
+                b64 = base64.b64encode(f.read()).decode()
+            parts.append(f"<h2>{name}</h2><img src='data:image/png;base64,{b64}' alt='{name}'>")
+    parts.append("</body></html>")
+    with open(path, "w") as f:
+        f.write("\n".join(parts))
+    return path
+
+
+# ---------- Entry point ----------
+def render_figures(specs, out_dir, report=False, workers=MAX_WORKERS, block=False):
+    """Render changed specs in a background process pool; returns the finishing thread.
+
+    Workers are forked from the calling (main) thread; the scripts have no
+    __main__ guard, so spawn-style pools would re-run them. Where fork is
+    unavailable, figures render inline. The interpreter waits for the
+    finishing thread at exit, so callers hand off and continue.
+    """
+    manifest = _load_manifest(out_dir)
+    todo = []
+    for spec in specs:
+        h = spec_hash(spec)
+        path = os.path.join(out_dir, spec["name"] + ".png")
+        if manifest.get(spec["name"]) == h and os.path.exists(path):
+            continue
+        todo.append((spec, path, h))
+    print(f"🖼️  Figures: {len(todo)} to render, {len(specs) - len(todo)} unchanged")
+
+    pool, futs = None, {}
+    if todo and "fork" in mp.get_all_start_methods():
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(todo)), mp_context=mp.get_context("fork"))
+        futs = {pool.submit(_render_one, s, p): (s["name"], h) for s, p, h in todo}
+
+    def _finish():
+        done = {}
+        if pool is not None:
+            wait(futs)
+            pool.shutdown()
+            results = [(name, h, fut.exception()) for fut, (name, h) in futs.items()]
+        else:
+            results = []
+            for s, p, h in todo:
+                try:
+                    _render_one(s, p)
+                    results.append((s["name"], h, None))
+                except Exception as e:
+                    results.append((s["name"], h, e))
+        for name, h, err in results:
+            if err is None:
+                done[name] = h
+            else:
+                print(f"(Info) Figure {name} skipped:", err)
+        if done:
+            _save_manifest(out_dir, done)
+        if report:
+            write_html_report(out_dir)
+
+    if pool is None:
+        _finish()
+        return None
+    t = threading.Thread(target=_finish, daemon=False)
+    t.start()
+    if block:
+        t.join()
+    return t
@@ -0,0 +1,206 @@
+# ======================================
+# Frame Backend: lazy (Polars) or eager (pandas) ingest → clean → merge
+# ======================================
+# The Part 1 cleaning of every PFF export is the same recipe with different
+# column lists: project, rename, derive ratios, inf/NaN → 0, bound and clip,
+# rescale percentages stored as 0–100. clean_pff() takes that recipe as
+# arguments and runs it on either engine:
+#
+#   polars   pl.scan_csv → one LazyFrame plan. Only the kept columns are
+#            parsed (projection pushdown), every step is an expression, and
+#            chained outer merges stay lazy, so the optimizer fuses the whole
+#            ingest → merge into one pass with no intermediate copies.
+#   pandas   the original eager statements, step for step (fallback, and the
+#            reference the Polars path is checked against).
+#
+# METRIC_BACKEND=pandas|polars|auto (default auto: Polars when installed).
+# Frames stay backend-native between calls; to_pandas() collects at the end.
+# Position filters and snap floors stay where they are in Parts 2/5: the
+# z-scores and team aggregates before them depend on the rows they drop.
+#
+#   python frame_backend.py   → pandas vs Polars timing + equality check
+
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from runtime import FRAME_BACKEND
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+if FRAME_BACKEND == "polars" and pl is None:
+    print("(Info) Polars backend skipped: polars is not installed, using pandas")
+BACKEND = "polars" if FRAME_BACKEND in ("auto", "polars") and pl is not None else "pandas"
+
+RATE_KEYS = ("Rate", "Percent")
+
+
+def clean_pff(path, keep=None, rename=None, lower=False, missing_ok=False, ratios=None, safe_ratios=False,
+              drop_inf=True, bounds=None, abs_cols=(), clip_keys=(), rate_keys=RATE_KEYS, backend=None):
+    """One PFF export through the Part 1 cleaning recipe; backend-native frame.
+
+    keep         source columns to keep, in this order (None = all)
+    lower        strip/lower-case source headers first
+    missing_ok   silently skip kept columns the file lacks
+    ratios       {new: (numerator, denominator)} on renamed columns;
+                 safe_ratios gives 0 where the denominator is not positive
+    drop_inf     ±inf → missing before the fill with 0
+    bounds       {col: (lo, hi)} hard clips
+    abs_cols     columns forced non-negative by abs()
+    clip_keys    columns containing any key are clipped at 0 if they go negative
+    rate_keys    columns containing any key are /100 when their max exceeds 1
+    """
+    args = (path, keep, rename or {}, lower, missing_ok, ratios or {}, safe_ratios, drop_inf,
+            bounds or {}, abs_cols, clip_keys, rate_keys)
+    return (_clean_polars if (backend or BACKEND) == "polars" else _clean_pandas)(*args)
+
+
+def _project(names, keep, missing_ok):
+    if keep is None:
+        return list(names)
+    missing = [c for c in keep if c not in names]
+    if missing and not missing_ok:
+        raise KeyError(f"Columns not in file: {missing}")
+    return [c for c in keep if c in names]
+
+
+def _keyed(cols, keys):
+    return [c for c in cols if any(k in c for k in keys)]
+
+
+def _clean_pandas(path, keep, rename, lower, missing_ok, ratios, safe_ratios, drop_inf,
+                  bounds, abs_cols, clip_keys, rate_keys):
+    norm = (lambda c: c.strip().lower()) if lower else (lambda c: c)
+    usecols = None if keep is None else (lambda c: norm(c) in set(keep))
+    df = pd.read_csv(path, usecols=usecols)
+    df.columns = [norm(c) for c in df.columns]
+    df = df[_project(df.columns, keep, missing_ok)].rename(columns=rename)
+
+    for new, (num, den) in ratios.items():
+        df[new] = np.where(df[den] > 0, df[num] / df[den], 0) if safe_ratios else df[num] / df[den]
+    if drop_inf:
+        df.replace([float('inf'), -float('inf')], pd.NA, inplace=True)
+    df.fillna(0, inplace=True)
+    for c, (lo, hi) in bounds.items():
+        df[c] = df[c].clip(lo, hi)
+    for c in abs_cols:
+        if c in df.columns:
+            df[c] = df[c].abs()
+    for c in _keyed(df.columns, clip_keys):
+        if df[c].min() < 0:
+            df[c] = df[c].clip(lower=0)
+    rate_cols = _keyed(df.columns, rate_keys)
+    df[rate_cols] = df[rate_cols].apply(lambda x: x / 100 if x.max() > 1 else x)
+    return df
+
+
+def _clean_polars(path, keep, rename, lower, missing_ok, ratios, safe_ratios, drop_inf,
+                  bounds, abs_cols, clip_keys, rate_keys):
+    lf = pl.scan_csv(path, infer_schema_length=10000)
+    if lower:
+        lf = lf.rename(lambda c: c.strip().lower())
+    lf = lf.select(_project(lf.collect_schema().names(), keep, missing_ok))
+    lf = lf.rename({k: v for k, v in rename.items() if k in lf.collect_schema().names()})
+
+    if ratios:
+        lf = lf.with_columns([
+            (pl.when(pl.col(d) > 0).then(pl.col(n) / pl.col(d)).otherwise(0.0) if safe_ratios
+             else pl.col(n) / pl.col(d)).alias(new) for new, (n, d) in ratios.items()])
+    schema = lf.collect_schema()
+    floats = [c for c, t in schema.items() if t.is_float()]
+    ints = [c for c, t in schema.items() if t.is_numeric() and not t.is_float()]
+    text = [c for c, t in schema.items() if not t.is_numeric()]
+    bad = (lambda c: pl.col(c).is_nan() | pl.col(c).is_infinite()) if drop_inf else (lambda c: pl.col(c).is_nan())
+    lf = lf.with_columns([pl.when(bad(c)).then(None).otherwise(pl.col(c)).fill_null(0).alias(c) for c in floats]
+                         + [pl.col(c).fill_null(0) for c in ints] + [pl.col(c).fill_null("0") for c in text])
+
+    names = schema.names()
+    steps = [[pl.col(c).clip(lo, hi) for c, (lo, hi) in bounds.items()],
+             [pl.col(c).abs() for c in abs_cols if c in names],
+             [pl.when(pl.col(c).min() < 0).then(pl.col(c).clip(lower_bound=0)).otherwise(pl.col(c)).alias(c)
+              for c in _keyed(names, clip_keys)],
+             [pl.when(pl.col(c).max() > 1).then(pl.col(c) / 100).otherwise(pl.col(c)).alias(c)
+              for c in _keyed(names, rate_keys)]]
+    for exprs in steps:
+        if exprs:
+            lf = lf.with_columns(exprs)
+    return lf
+
+
+def merge_all(frames, on, how="outer"):
+    """Chained merges on `on` with pandas naming (_x/_y) and row order on both engines."""
+    if pl is None or not isinstance(frames[0], pl.LazyFrame):
+        return reduce(lambda a, b: a.merge(b, on=on, how=how), frames)
+
+    def join(a, b):
+        both = set(a.collect_schema().names()) & set(b.collect_schema().names()) - set(on)
+        a = a.rename({c: c + "_x" for c in both})
+        b = b.rename({c: c + "_y" for c in both})
+        return a.join(b, on=on, how="full" if how == "outer" else how, coalesce=True)
+    out = reduce(join, frames)
+    return out.sort(on) if how == "outer" else out
+
+
+def to_pandas(frame):
+    """Collect a backend-native frame into pandas (no pyarrow needed)."""
+    if pl is not None and isinstance(frame, (pl.LazyFrame, pl.DataFrame)):
+        df = frame.collect() if isinstance(frame, pl.LazyFrame) else frame
+        return pd.DataFrame({c: df[c].to_numpy() for c in df.columns})
+    return frame
+
+
+def frames_match(a, b, keys=None, rtol=1e-9):
+    """Same columns and values (dtype-agnostic: 5 == 5.0), optionally after sorting by keys."""
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    if keys:
+        a, b = a.sort_values(keys, ignore_index=True), b.sort_values(keys, ignore_index=True)
+    for c in a.columns:
+        x, y = pd.to_numeric(a[c], errors="coerce"), pd.to_numeric(b[c], errors="coerce")
+        if x.notna().any() or y.notna().any():
+            if not np.allclose(x.to_numpy(dtype=float), y.to_numpy(dtype=float), rtol=rtol, equal_nan=True):
+                return False
+        elif not (a[c].astype(str).to_numpy() == b[c].astype(str).to_numpy()).all():
+            return False
+    return True
+
+
+def benchmark(stage, repeat=5):
+    """Best-of-`repeat` seconds of stage(backend) per available backend, plus whether outputs match."""
+    backends = ["pandas"] + (["polars"] if pl is not None else [])
+    out, ref = [], None
+    for b in backends:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            res = stage(b)
+            best = min(best, time.perf_counter() - t0)
+        ref = res if ref is None else ref
+        out.append({"Backend": b, "Seconds": best, "Rows": len(res), "MatchesPandas": frames_match(ref, res)})
+    return pd.DataFrame(out)
+
+
+if __name__ == "__main__":
+    import os
+
+    BASE = "/Users/anokhpalakurthi/Downloads/"
+    path = BASE + "Blocking (PFF).csv"
+    if not os.path.exists(path):
+        print("(Info) Backend benchmark skipped: no Blocking (PFF).csv")
+    else:
+        def stage(backend):
+            return to_pandas(clean_pff(
+                path, keep=["player", "team_name", "position", "snap_counts_pass_block", "pressures_allowed"],
+                rename={"player": "Player", "team_name": "Team", "position": "Position",
+                        "snap_counts_pass_block": "PassBlockSnaps", "pressures_allowed": "PressuresAllowed"},
+                ratios={"PressureRateAllowed": ("PressuresAllowed", "PassBlockSnaps")},
+                clip_keys=("Rate",), backend=backend))
+        if pl is None:
+            print("(Info) polars not installed: timing the pandas path only")
+        print("⏱️ Blocking ingest → clean:")
+        print(benchmark(stage).round(4).to_string(index=False))
@@ -0,0 +1,92 @@
+# ======================================
+# Leaderboard Engine: indexed top-K slices by metric, position and team
+# ======================================
+# Partial selection (argpartition) instead of full sorts, with row indexes per
+# position / team / group built once. Scores can be updated in place without
+# rebuilding anything.
+
+import numpy as np
+import pandas as pd
+
+
+class Leaderboard:
+    """Top-K queries over a scored table (uvm_off, tdm, ...)."""
+
+    def __init__(self, df, metrics, index_cols=("Position", "Team", "PositionGroup")):
+        self.frame = df.reset_index(drop=True)
+        self.values = {m: self.frame[m].to_numpy(dtype=float).copy() for m in metrics}
+
+        # Row indexes per filter column: {col: {key: rows}} plus integer codes for group stats
+        self.index, self.codes, self.keys = {}, {}, {}
+        for col in index_cols:
+            if col not in self.frame.columns:
+                continue
+            codes, keys = pd.factorize(self.frame[col])
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+            self.index[col] = {k: order[bounds[i]:bounds[i + 1]] for i, k in enumerate(keys)}
+            self.codes[col], self.keys[col] = codes, keys
+
+    def __len__(self):
+        return len(self.frame)
+
+    # ---------- Filters ----------
+    def rows(self, **filters):
+        """Row positions matching every filter (scalar or list of accepted keys); None = all rows."""
+        out = None
+        for col, want in filters.items():
+            if want is None:
+                continue
+            idx = self.index[col]
+            keys = [want] if isinstance(want, str) or np.isscalar(want) else list(want)
+            hit = [idx[k] for k in keys if k in idx]
+            sel = np.sort(np.concatenate(hit)) if hit else np.empty(0, dtype=np.intp)
+            out = sel if out is None else np.intersect1d(out, sel, assume_unique=True)
+        return out
+
+    # ---------- Queries ----------
+    def top_k_rows(self, metric, k=25, ascending=False, **filters):
+        """Row positions of the top-k rows for metric, best first."""
+        rows = self.rows(**filters)
+        vals = self.values[metric] if rows is None else self.values[metric][rows]
+        key = vals if ascending else -vals
+        key = np.where(np.isnan(key), np.inf, key)
+
+        n = len(key)
+        k = min(k, n)
+        if k == 0:
+            return np.empty(0, dtype=np.intp)
+        part = np.argpartition(key, k - 1)[:k] if k < n else np.arange(n)
+        part = part[np.lexsort((part, key[part]))]
+        return part if rows is None else rows[part]
+
+    def top_k(self, metric, k=25, ascending=False, cols=None, **filters):
+        """Top-k rows for metric as a DataFrame slice, best first."""
+        out = self.frame.iloc[self.top_k_rows(metric, k, ascending, **filters)]
+        return out if cols is None else out[[c for c in cols if c in out.columns]]
+
+    def group_summary(self, metric, by):
+        """mean / std / count of metric per key of an indexed column (no groupby)."""
+        codes, keys = self.codes[by], self.keys[by]
+        vals = self.values[metric]
+        ok = ~np.isnan(vals) & (codes >= 0)      # missing keys factorize to -1
+        n = np.bincount(codes[ok], minlength=len(keys))
+        s = np.bincount(codes[ok], weights=vals[ok], minlength=len(keys))
+        ss = np.bincount(codes[ok], weights=vals[ok] ** 2, minlength=len(keys))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s / n
+            std = np.sqrt(np.maximum(ss - n * mean ** 2, 0) / (n - 1))
+        return pd.DataFrame({"mean": mean, "std": np.where(n > 1, std, np.nan), "count": n},
+                            index=pd.Index(keys, name=by))
+
+    # ---------- Incremental updates ----------
+    def update(self, metric, values, rows=None):
+        """Overwrite scores for metric (all rows, or the given row positions)."""
+        values = np.asarray(values, dtype=float)
+        if metric not in self.values:
+            self.values[metric] = np.full(len(self.frame), np.nan)
+        if rows is None:
+            self.values[metric][:] = values
+        else:
+            self.values[metric][rows] = values
+        self.frame[metric] = self.values[metric]
@@ -0,0 +1,249 @@
+# ======================================
+# Leaderboard Service: local HTTP/JSON queries over the scored tables
+# ======================================
+# Serves player lookup, top-K slices, team aggregates and score decomposition
+# from the TOM Part 5 / TDM Part 5 tables held in memory.
+#
+# Each loaded artifact set is an immutable Snapshot with its own LRU response
+# cache. Requests read `service.snapshot` once and never lock; /reload builds
+# a new Snapshot and swaps the reference, which also drops the old cache.
+#
+#   python leaderboard_service.py          → http://127.0.0.1:8050
+#   GET /top?side=off&metric=TotalTOM_Adjusted&k=10&position=QB,WR&team=KC
+#   GET /player?name=surtain&side=def      (exact → prefix → trigram match)
+#   GET /teams?side=def
+#   GET /explain?side=off&name=Josh Allen
+#   GET /health        POST /reload
+
+import json
+import os
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from leaderboard import Leaderboard
+from player_search import PREFIX_SCORE, PlayerIndex
+from scoring_kernel import (
+    TDM_PASS_NEED, TDM_RUSH_NEED, TOM_PASS_NEED, TOM_RUSH_NEED,
+    coef_map, load_decomposition, tdm_coef_matrix, tom_coef_matrix
+)
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+OFF_PATH = BASE + "UVM_Player_Leaderboard_PhaseWeighted.csv"
+DEF_PATH = BASE + "TDM_Player_Leaderboard_PhaseWeighted_RoleCalibrated.csv"
+OFF_WEIGHTS = BASE + "UVM_Calibrated_Weights_SplitPhase.csv"
+DEF_WEIGHTS = BASE + "TDM_Calibrated_Weights_SplitPhase.csv"
+PLAYERAGG_PATH = BASE + "TDM_Base_PlayerAgg.csv"
+OFF_DECOMP = BASE + "UVM_Score_Decomposition.npz"
+DEF_DECOMP = BASE + "TDM_Score_Decomposition.npz"
+
+HOST, PORT = "127.0.0.1", 8050
+CACHE_SIZE = 4096
+MAX_K = 500
+
+# Per side: final metric, decomposition base (pre-clip, pre-role), team aggregation
+SIDES = {
+    "off": {
+        "final": "TotalTOM_Adjusted", "base": "TotalTOM_Adjusted",
+        "metrics": ["TotalTOM_Adjusted", "PassTOM_Adjusted", "RushTOM", "PassTOM", "TotalTOM", "TOM_VOR"],
+        "team_agg": "sum", "team_cols": ["PassTOM", "RushTOM", "TotalTOM", "TotalTOM_Adjusted"],
+    },
+    "def": {
+        "final": "TotalTDM_Adjusted", "base": "TotalTDM",
+        "metrics": ["TotalTDM_Adjusted", "TotalTDM", "PassDef_TDM", "RushDef_TDM", "TotalTDM_core", "TDM_VOR"],
+        "team_agg": "mean", "team_cols": ["PassDef_TDM_core", "RushDef_TDM_core", "TotalTDM_core",
+                                          "TotalTDM", "TotalTDM_Adjusted"],
+    },
+}
+
+ID_COLS = ["Player", "Team", "Position", "PositionGroup"]
+
+
+def _records(df):
+    """JSON-safe list of row dicts (NaN → null)."""
+    df = df.replace([np.inf, -np.inf], np.nan)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+class Snapshot:
+    """One immutable artifact set: scored tables, indexes, coefficients and a response cache."""
+
+    def __init__(self, off, dfn, off_coef=None, def_coef=None, version=0, decomp=None):
+        self.version = version
+        self.tables = {"off": off.reset_index(drop=True), "def": dfn.reset_index(drop=True)}
+        self.coef = {"off": off_coef, "def": def_coef}
+        # Precomputed Part 5 decompositions, used only when row-aligned with the tables
+        self.decomp = {s: d for s, d in (decomp or {}).items()
+                       if len(d[0]) == len(self.tables[s])
+                       and (d[0]["Player"].to_numpy() == self.tables[s]["Player"].astype(str).to_numpy()).all()}
+        self.boards = {
+            side: Leaderboard(t, [m for m in SIDES[side]["metrics"] if m in t.columns])
+            for side, t in self.tables.items()
+        }
+        self.teams = {}
+        for side, t in self.tables.items():
+            cfg = SIDES[side]
+            cols = [c for c in cfg["team_cols"] if c in t.columns]
+            if "Team" in t.columns and cols:
+                agg = t.groupby("Team", as_index=False)[cols].agg(cfg["team_agg"])
+                self.teams[side] = agg.sort_values(cols[-1], ascending=False)
+        self.search = PlayerIndex.from_frames(**{s: t for s, t in self.tables.items()})
+        self.respond = lru_cache(maxsize=CACHE_SIZE)(self._respond)
+
+    # ---------- Endpoint bodies ----------
+    def top(self, side, metric=None, k=25, position=None, team=None, group=None):
+        board = self.boards[side]
+        metric = metric or SIDES[side]["final"]
+        if metric not in board.values:
+            raise KeyError(f"unknown metric {metric!r}")
+        if int(k) < 1:
+            raise ValueError(f"k must be at least 1, got {k!r}")
+        filters = {"Position": position, "Team": team, "PositionGroup": group}
+        filters = {c: v for c, v in filters.items() if v is not None and c in board.index}
+        out = board.top_k(metric, min(int(k), MAX_K), **filters)
+        return {"side": side, "metric": metric, "rows": _records(out)}
+
+    def player(self, name, side=None, k=10):
+        if int(k) < 1:
+            raise ValueError(f"k must be at least 1, got {k!r}")
+        hits = self.search.lookup(name, k=int(k) if side is None else len(self.search.names))
+        if side is not None:
+            hits = hits[hits["Source"] == side].head(int(k))
+        rows = []
+        for h in hits.itertuples():
+            row = _records(self.tables[h.Source].iloc[[h.Row]])[0]
+            rows.append({"side": h.Source, "match": round(h.Score, 3), **row})
+        return {"query": name, "rows": rows}
+
+    def team(self, side):
+        return {"side": side, "rows": _records(self.teams.get(side, pd.DataFrame()))}
+
+    def explain(self, name, side):
+        """Exact additive split of the final score: domain terms, clip residual, role term.
+
+        With a Part 5 decomposition loaded this is a row lookup that also
+        returns phase/calibration and per-feature terms.
+        """
+        t, C, cfg = self.tables[side], self.coef[side], SIDES[side]
+        rows = self.search.rows_for(name, side, min_score=PREFIX_SCORE)
+        if side in self.decomp:
+            frame, levels = self.decomp[side]
+            out = []
+            for r in rows:
+                vals = frame.iloc[r]
+                terms = {lv: {k: float(vals[k]) for k in levels.index[levels == lv]} for lv in levels.unique()}
+                out.append({**{c: t.at[r, c] for c in ID_COLS if c in t.columns},
+                            "Final": float(t.at[r, cfg["final"]]), "Terms": terms})
+            return {"query": name, "side": side, "rows": out}
+        if C is None:
+            raise KeyError(f"no coefficients loaded for side {side!r}")
+        hit = t.iloc[rows]
+        out = []
+        for _, r in hit.iterrows():
+            mult = float(r.get("RoleMult", 1.0))
+            terms = {d: float(r.get(d, 0.0)) * C.loc[d, cfg["base"]] for d in C.index}
+            base = float(r[cfg["base"]]) if side == "def" else float(r[cfg["final"]]) / mult
+            terms["Winsorization"] = base - sum(terms.values())
+            terms["RoleMult"] = (mult - 1.0) * base
+            out.append({**{c: r[c] for c in ID_COLS if c in r.index},
+                        "Final": float(r[cfg["final"]]), "Terms": terms})
+        return {"query": name, "side": side, "rows": out}
+
+    def health(self):
+        return {"version": self.version, "rows": {s: len(t) for s, t in self.tables.items()}}
+
+    # ---------- Cached dispatch ----------
+    def _respond(self, path, query):
+        """(status, body bytes) for one request; memoized per snapshot."""
+        q = dict(query)
+        side = q.get("side", "off")
+        try:
+            if side not in SIDES:
+                raise KeyError(f"unknown side {side!r}")
+            if path == "/top":
+                lists = {c: q[c].split(",") for c in ("position", "team", "group") if q.get(c)}
+                body = self.top(side, q.get("metric"), q.get("k", 25), **lists)
+            elif path == "/player":
+                body = self.player(q["name"], q.get("side"), q.get("k", 10))
+            elif path == "/teams":
+                body = self.team(side)
+            elif path == "/explain":
+                body = self.explain(q["name"], side)
+            elif path == "/health":
+                body = self.health()
+            else:
+                return 404, json.dumps({"error": f"no endpoint {path}"}).encode()
+        except (KeyError, ValueError) as e:
+            return 400, json.dumps({"error": str(e.args[0]) if e.args else repr(e)}).encode()
+        return 200, json.dumps(body, default=str).encode()
+
+
+# ---------- Loading ----------
+def load_snapshot(version=0, off_path=OFF_PATH, def_path=DEF_PATH,
+                  off_weights=OFF_WEIGHTS, def_weights=DEF_WEIGHTS):
+    """Read the Part 5 leaderboards (and ridge weights, if present) into a Snapshot."""
+    off, dfn = pd.read_csv(off_path), pd.read_csv(def_path)
+    if "Team" not in dfn.columns and os.path.exists(PLAYERAGG_PATH):
+        teams = pd.read_csv(PLAYERAGG_PATH)[["Player", "PrimaryTeam"]].drop_duplicates("Player")
+        dfn = dfn.merge(teams.rename(columns={"PrimaryTeam": "Team"}), on="Player", how="left")
+    off_coef = def_coef = None
+    if os.path.exists(off_weights):
+        w = pd.read_csv(off_weights)
+        off_coef = tom_coef_matrix(coef_map(w, "Pass", TOM_PASS_NEED), coef_map(w, "Rush", TOM_RUSH_NEED))
+    if os.path.exists(def_weights):
+        w = pd.read_csv(def_weights)
+        def_coef = tdm_coef_matrix(coef_map(w, "PassDef", TDM_PASS_NEED), coef_map(w, "RushDef", TDM_RUSH_NEED))
+    decomp = {s: load_decomposition(p) for s, p in (("off", OFF_DECOMP), ("def", DEF_DECOMP)) if os.path.exists(p)}
+    return Snapshot(off, dfn, off_coef, def_coef, version, decomp)
+
+
+class LeaderboardService(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, loader=load_snapshot, host=HOST, port=PORT):
+        self.loader = loader
+        self.snapshot = loader(version=0)
+        super().__init__((host, port), _Handler)
+
+    def reload(self):
+        """Load a new artifact set; in-flight requests finish on the old snapshot."""
+        self.snapshot = self.loader(version=self.snapshot.version + 1)
+        return self.snapshot.health()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = tuple(sorted(parse_qsl(url.query)))
+        snap = self.server.snapshot
+        self._send(*snap.respond(url.path, query))
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/reload":
+            return self._send(404, b'{"error": "POST /reload only"}')
+        try:
+            self._send(200, json.dumps(self.server.reload()).encode())
+        except Exception as e:
+            self._send(500, json.dumps({"error": str(e)}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    server = LeaderboardService()
+    print(f"✅ Serving leaderboards on http://{HOST}:{PORT} (snapshot v{server.snapshot.version})")
+    server.serve_forever()
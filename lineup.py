@@ -0,0 +1,235 @@
+# ======================================
+# Lineup: best 11-on-11 under position-slot and cap constraints
+# ======================================
+# Pool = the Part 5 leaderboards (offense: off_positions via TOM_POS_MAP;
+# defense: TDM PositionGroup), one row per player. Each player's value is
+# their VOR (replacement.py) divided by their side's VOR SD, so a tackle and
+# a corner are traded on one scale; cost is an optional cap hit ($M).
+#
+#   slots   exactly TOM_ROSTER_SLOTS on offense, TDM_ROSTER_SLOTS on defense
+#   cap     Σ cost ≤ cap (ignored without a cap file)
+#   force / exclude   what-if pins by player name
+#
+# Exact: a 0/1 program solved by branch-and-bound (scipy milp / HiGHS) after
+# dropping every player with `need` slot-mates who are better and no dearer;
+# a few ms for the whole league.
+# Heuristic: Lagrangian relaxation — for a price λ the best lineup is each
+# group's top-s by value − λ·cost (one lexsort), λ bisected to the cap, then
+# greedy same-group upgrade swaps spend what is left. Without a cap both are
+# just the top-s per group, which is exact.
+#
+#   python lineup.py   → Optimal_Lineup.csv, Lineup_What_If.csv
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from player_search import normalize_name
+from replacement import TDM_ROSTER_SLOTS, TOM_ROSTER_SLOTS
+from scoring_kernel import TOM_POS_MAP
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+OFF_PATH = BASE + "UVM_Player_Leaderboard_PhaseWeighted.csv"
+DEF_PATH = BASE + "TDM_Player_Leaderboard_PhaseWeighted_RoleCalibrated.csv"
+CAP_PATH = BASE + "Player_Cap.csv"     # optional: Player, CapHit ($M)
+
+SLOTS = {**{f"O:{g}": n for g, n in TOM_ROSTER_SLOTS.items()},
+         **{f"D:{g}": n for g, n in TDM_ROSTER_SLOTS.items()}}
+STARTER_CAP = 150.0     # $M for the 22 starters (~60% of the 2024 cap)
+EXACT_MAX_POOL = 2000   # "auto" switches to the heuristic above this
+
+
+def build_pool(off, dfn, cap=None):
+    """Player, Team, Position, Side, Slot, Value, Cost — one row per player."""
+    parts = []
+    for side, df, group, vor, total in (
+            ("O", off, off["Position"].map(TOM_POS_MAP), "TOM_VOR", "TotalTOM_Adjusted"),
+            ("D", dfn, dfn.get("PositionGroup", dfn["Position"]), "TDM_VOR", "TotalTDM_Adjusted")):
+        v = df[vor] if vor in df.columns else df[total]
+        v = pd.to_numeric(v, errors="coerce")
+        parts.append(pd.DataFrame({
+            "Player": df["Player"], "Team": df["Team"] if "Team" in df.columns else "",
+            "Position": df["Position"], "Side": side, "Slot": side + ":" + group.astype(str),
+            "Value": v / (v.std() or 1.0)}))
+    pool = pd.concat(parts, ignore_index=True)
+    pool = pool[pool["Slot"].isin(list(SLOTS)) & pool["Value"].notna()]
+    pool["PlayerID"] = pool["Player"].map(normalize_name)
+    # same name on another team or side is another player; only true repeats collapse
+    pool = pool.sort_values("Value", ascending=False).drop_duplicates(["PlayerID", "Side", "Team"])
+
+    pool["Cost"] = 0.0
+    if cap is not None:
+        c = cap.assign(PlayerID=cap["Player"].map(normalize_name)).drop_duplicates("PlayerID")
+        pool["Cost"] = pool["PlayerID"].map(c.set_index("PlayerID")["CapHit"]).fillna(0.0).to_numpy(dtype=float)
+    return pool.reset_index(drop=True)
+
+
+def _prepare(pool, slots, force, exclude):
+    """Slot codes, per-slot counts and pin masks; errors on an unfillable slot."""
+    names = list(slots)
+    codes = pd.Index(names).get_indexer(pool["Slot"])
+    need = np.array([slots[s] for s in names])
+    ids = pool["PlayerID"].to_numpy()
+    pinned = np.isin(ids, [normalize_name(p) for p in force])
+    banned = np.isin(ids, [normalize_name(p) for p in exclude]) | (codes < 0)
+    have = np.bincount(codes[~banned], minlength=len(names))
+    short = [f"{s} ({h}/{n})" for s, h, n in zip(names, have, need) if h < n]
+    if short:
+        raise ValueError("Not enough players for: " + ", ".join(short))
+    return codes, need, pinned, banned
+
+
+def _top_per_slot(score, codes, need):
+    """Mask of each slot's `need` highest scores (one lexsort over the pool)."""
+    order = np.lexsort((-score, codes))
+    start = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(need)))[:-1]]
+    rank = np.empty(len(score), dtype=int)
+    rank[order] = np.arange(len(score)) - start[codes[order]]
+    return rank < need[codes]
+
+
+def _undominated(value, cost, codes, need, banned):
+    """Players with fewer than `need` slot-mates at least as good and no dearer.
+
+    Anyone else can be swapped for a dominating slot-mate without losing value
+    or cap room, so dropping them keeps the program exact and much smaller.
+    """
+    ok = ~banned
+    idx = np.flatnonzero(ok)
+    keep = np.zeros(len(value), dtype=bool)
+    for g in np.unique(codes[idx]):
+        m = idx[codes[idx] == g]
+        v, c = value[m], cost[m]
+        better = (v[None, :] > v[:, None]) | ((v[None, :] == v[:, None]) & (m[None, :] < m[:, None]))
+        dominated_by = (better & (c[None, :] <= c[:, None])).sum(axis=1)
+        keep[m] = dominated_by < need[g]
+    return keep
+
+
+def _lineup(pool, pick, slots, method, t0):
+    out = pool[pick].copy()
+    out["Slot"] = pd.Categorical(out["Slot"], categories=list(slots), ordered=True)
+    out = out.sort_values(["Slot", "Value"], ascending=[True, False], ignore_index=True)
+    out.attrs.update(value=float(out["Value"].sum()), cost=float(out["Cost"].sum()),
+                     method=method, seconds=time.perf_counter() - t0)
+    return out
+
+
+def solve_exact(pool, slots=SLOTS, cap=None, force=(), exclude=()):
+    """Optimal lineup by branch-and-bound over x ∈ {0,1}^players."""
+    t0 = time.perf_counter()
+    codes, need, pinned, banned = _prepare(pool, slots, force, exclude)
+    value, cost = pool["Value"].to_numpy(dtype=float), pool["Cost"].to_numpy(dtype=float)
+    if cap is None or not cost.any():
+        score = np.where(banned, -np.inf, np.where(pinned, np.inf, value))
+        return _lineup(pool, _top_per_slot(score, np.maximum(codes, 0), need) & ~banned, slots, "exact", t0)
+
+    live = np.flatnonzero(_undominated(value, cost, codes, need, banned) | pinned)
+    n = len(live)
+    A = sp.csr_matrix((np.ones(n), (codes[live], np.arange(n))), shape=(len(need), n))
+    cons = [LinearConstraint(A, need, need), LinearConstraint(cost[live][None, :], -np.inf, cap)]
+    res = milp(-value[live], constraints=cons, integrality=np.ones(n),
+               bounds=Bounds(pinned[live].astype(float), np.ones(n)))
+    if res.x is None:
+        raise ValueError(f"No lineup fits: {res.message}")
+    x = np.zeros(len(pool), dtype=bool)
+    x[live[res.x > 0.5]] = True
+    return _lineup(pool, x, slots, "exact", t0)
+
+
+def solve_heuristic(pool, slots=SLOTS, cap=None, force=(), exclude=(), iters=40):
+    """Lagrangian top-s per slot with λ bisected to the cap, then greedy upgrades."""
+    t0 = time.perf_counter()
+    codes, need, pinned, banned = _prepare(pool, slots, force, exclude)
+    codes = np.maximum(codes, 0)
+    value, cost = pool["Value"].to_numpy(dtype=float), pool["Cost"].to_numpy(dtype=float)
+    big = np.abs(value).sum() + 1.0
+
+    def pick(lam):
+        score = np.where(banned, -np.inf, value - lam * cost + big * pinned)
+        return _top_per_slot(score, codes, need) & ~banned
+
+    x = pick(0.0)
+    if cap is None or cost[x].sum() <= cap:
+        return _lineup(pool, x, slots, "heuristic", t0)
+
+    lo, hi = 0.0, 1.0
+    while cost[pick(hi)].sum() > cap:
+        hi *= 4.0
+        if hi > 1e12:
+            raise ValueError("No lineup fits under the cap")
+    for _ in range(iters):
+        mid = 0.5 * (lo + hi)
+        lo, hi = (mid, hi) if cost[pick(mid)].sum() > cap else (lo, mid)
+    x = pick(hi)
+
+    # same-slot swaps out → in, best value gain that still fits, until none left
+    movable = ~banned & ~pinned
+    while True:
+        slack = cap - cost[x].sum()
+        out_i = np.flatnonzero(x & movable)
+        in_j = np.flatnonzero(~x & movable)
+        gain = value[in_j][None, :] - value[out_i][:, None]
+        fits = (cost[in_j][None, :] - cost[out_i][:, None] <= slack) & (codes[out_i][:, None] == codes[in_j][None, :])
+        gain = np.where(fits, gain, 0.0)
+        if gain.size == 0 or gain.max() <= 1e-12:
+            break
+        a, b = np.unravel_index(gain.argmax(), gain.shape)
+        x[out_i[a]], x[in_j[b]] = False, True
+    return _lineup(pool, x, slots, "heuristic", t0)
+
+
+def solve(pool, slots=SLOTS, cap=None, force=(), exclude=(), method="auto"):
+    """Exact for pools up to EXACT_MAX_POOL players (or method="exact"), else the heuristic."""
+    if method == "auto":
+        method = "exact" if len(pool) <= EXACT_MAX_POOL else "heuristic"
+    fn = solve_exact if method == "exact" else solve_heuristic
+    return fn(pool, slots, cap, force, exclude)
+
+
+def what_if(pool, scenarios, **defaults):
+    """Run many scenarios ({name: solve kwargs}); returns (summary, {name: lineup})."""
+    rows, lineups = [], {}
+    for name, kw in scenarios.items():
+        try:
+            lu = solve(pool, **{**defaults, **kw})
+        except ValueError as e:
+            rows.append({"Scenario": name, "Status": str(e)})
+            continue
+        lineups[name] = lu
+        rows.append({"Scenario": name, "Status": "ok", "Method": lu.attrs["method"], "Value": lu.attrs["value"],
+                     "Cost": lu.attrs["cost"], "Ms": 1000 * lu.attrs["seconds"],
+                     "Lineup": "; ".join(lu["Slot"].astype(str) + " " + lu["Player"])})
+    return pd.DataFrame(rows), lineups
+
+
+if __name__ == "__main__":
+    if not (os.path.exists(OFF_PATH) and os.path.exists(DEF_PATH)):
+        print("(Info) Lineup skipped: run TOM/TDM Part 5 first")
+    else:
+        cap_table = pd.read_csv(CAP_PATH) if os.path.exists(CAP_PATH) else None
+        if cap_table is None:
+            print(f"(Info) No cap file at {CAP_PATH}: optimizing on value alone")
+        pool = build_pool(pd.read_csv(OFF_PATH), pd.read_csv(DEF_PATH), cap_table)
+        cap = STARTER_CAP if cap_table is not None else None
+
+        best = solve(pool, cap=cap)
+        print(f"🏈 Optimal 11-on-11 ({best.attrs['method']}, {1000 * best.attrs['seconds']:.1f} ms): "
+              f"value {best.attrs['value']:.2f}, cost {best.attrs['cost']:.1f}")
+        print(best[["Slot", "Player", "Team", "Position", "Value", "Cost"]].round(3).to_string(index=False))
+
+        top_qb = best.loc[best["Slot"] == "O:QB", "Player"].iloc[0]
+        scenarios = {"Best": {}, "Heuristic": {"method": "heuristic"}, f"Without {top_qb}": {"exclude": [top_qb]}}
+        if cap is not None:
+            scenarios.update({f"Cap {c:.0f}": {"cap": c} for c in (0.5 * cap, 0.75 * cap, 1.25 * cap)})
+        summary, _ = what_if(pool, scenarios, cap=cap)
+        print("\n📊 What-if runs:")
+        print(summary.drop(columns="Lineup", errors="ignore").round(3).to_string(index=False))
+
+        best.to_csv(BASE + "Optimal_Lineup.csv", index=False)
+        summary.to_csv(BASE + "Lineup_What_If.csv", index=False)
+        print(f"\n📁 Saved: {BASE}Optimal_Lineup.csv, Lineup_What_If.csv")
@@ -0,0 +1,167 @@
+# ======================================
+# One Metric: joint offense + defense team model on a single player scale
+# ======================================
+# One team-level design over a shared team index:
+#     offense columns  = mean domain score of the team's offensive players (TOM Part 3)
+#     defense columns  = snap-weighted mean domain score of its defenders (TDM Part 3)
+# fit against total efficiency, Offensive DVOA − Defensive DVOA (defense is
+# negative-is-good, so a great defense adds to the total).
+#
+# Ridge for every alpha and every target (Total, Offense, −Defense) comes from
+# one SVD of the standardized design: fitted values, exact leave-one-out
+# errors (h_ii from the same SVD) and coefficients are array expressions over
+# the alpha grid, so there is no per-alpha refit.
+#
+# Each player's value is their share of their team's fitted total:
+#     offense: β_d · score_d / (offensive players on the team)
+#     defense: β_d · score_d · snaps / (team defensive snaps)
+# so a team's players add up exactly to its fitted DVOA above the intercept,
+# and offensive and defensive players sit on the same "DVOA points" scale.
+#
+# This is an offline script, not a pipeline stage: no TOM/TDM part holds both
+# sides' tables, so it reads the two Part 2 bases from disk once both exist.
+#   python one_metric.py   → One_Metric_Player_Values.csv, One_Metric_Team_Fit.csv, One_Metric_Weights.csv
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from runtime import USE_DVOA_PROXY
+from scoring_kernel import TDM_DOMAINS, TOM_DOMAINS
+from teams import fix_teams, load_dvoa
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+OFF_PATH = BASE + "Unified_Value_Model_Base.csv"
+DEF_PATH = BASE + "TDM_Base_Weighted.csv"
+PLAYERAGG_PATH = BASE + "TDM_Base_PlayerAgg.csv"
+OFF_DVOA_PATH = BASE + ("Offensive DVOA Proxy.csv" if USE_DVOA_PROXY else "Offensive DVOA.csv")
+DEF_DVOA_PATH = BASE + ("Defensive DVOA Proxy.csv" if USE_DVOA_PROXY else "Defensive DVOA.csv")
+
+ALPHAS = np.logspace(-3, 3, 200)
+TARGETS = ["TotalDVOA", "OffensiveDVOA", "DefensiveDVOA_Positive"]
+
+
+def team_design(off, dfn, off_domains=TOM_DOMAINS, def_domains=TDM_DOMAINS):
+    """(X teams × "Off:/Def:" domain columns, per-player team shares for off and def)."""
+    off_team = fix_teams(off["Team"])
+    def_team = fix_teams(dfn["Team"])
+    teams = pd.Index(sorted(set(off_team.dropna()) | set(def_team.dropna())), name="Team")
+    oc, dc = teams.get_indexer(off_team), teams.get_indexer(def_team)
+    o_ok, d_ok = oc >= 0, dc >= 0
+
+    n_off = np.bincount(oc[o_ok], minlength=len(teams)).astype(float)
+    snaps = dfn["TotalSnaps"].to_numpy(dtype=float) if "TotalSnaps" in dfn.columns else np.ones(len(dfn))
+    snaps = np.where(d_ok, snaps, 0.0)
+    w_def = np.bincount(dc[d_ok], weights=snaps[d_ok], minlength=len(teams))
+
+    off_share = np.where(o_ok, 1.0 / np.maximum(n_off[np.maximum(oc, 0)], 1), 0.0)
+    def_share = np.where(d_ok, snaps / np.maximum(w_def[np.maximum(dc, 0)], 1e-12), 0.0)
+
+    X = pd.DataFrame(index=teams)
+    for d in off_domains:
+        X[f"Off:{d}"] = np.bincount(oc[o_ok], weights=(off[d].to_numpy(dtype=float) * off_share)[o_ok],
+                                    minlength=len(teams))
+    for d in def_domains:
+        X[f"Def:{d}"] = np.bincount(dc[d_ok], weights=(dfn[d].to_numpy(dtype=float) * def_share)[d_ok],
+                                    minlength=len(teams))
+    return X, off_share, def_share
+
+
+def ridge_svd(X, Y, alphas=ALPHAS):
+    """Ridge on standardized X for all alphas and all Y columns from one SVD.
+
+    Returns dict with per-target best alpha, whether it sits at either end of
+    the grid, LOO MSE curve, standardized and raw-scale coefficients, intercept,
+    fitted values and R².
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float).reshape(len(X), -1)
+    mu, sd = X.mean(axis=0), X.std(axis=0)
+    sd = np.where(sd > 0, sd, 1.0)
+    Z = (X - mu) / sd
+    y_mu = Y.mean(axis=0)
+    Yc = Y - y_mu
+
+    U, s, Vt = np.linalg.svd(Z, full_matrices=False)
+    UtY = U.T @ Yc                                        # k × m
+    shrink = s ** 2 / (s[None, :] ** 2 + alphas[:, None])  # A × k
+    fitted = np.einsum("nk,ak,km->anm", U, shrink, UtY)   # A × n × m
+    h = (U ** 2) @ shrink.T + 1.0 / len(X)                # n × A (+1/n: the fitted intercept)
+    loo = (Yc[None] - fitted) / (1.0 - h.T)[:, :, None]
+    cv = (loo ** 2).mean(axis=1)                          # A × m
+    best = cv.argmin(axis=0)
+
+    a = alphas[best]                                      # m
+    beta_z = np.einsum("jk,km->jm", Vt.T, (s[:, None] / (s[:, None] ** 2 + a[None, :])) * UtY)
+    beta = beta_z / sd[:, None]
+    intercept = y_mu - mu @ beta
+    yhat = X @ beta + intercept
+    r2 = 1.0 - ((Y - yhat) ** 2).sum(axis=0) / (Yc ** 2).sum(axis=0)
+    return {"alpha": a, "at_edge": (best == 0) | (best == len(alphas) - 1), "cv": cv, "beta_std": beta_z, "beta": beta, "intercept": intercept,
+            "fitted": yhat, "r2": r2}
+
+
+def fit_one_metric(off, dfn, off_dvoa, def_dvoa, alphas=ALPHAS):
+    """Joint fit + player scale on the load_inputs() tables; returns (players, teams, weights, summary)."""
+    X, off_share, def_share = team_design(off, dfn)
+    dvoa = off_dvoa[["Team", "OffensiveDVOA"]].merge(def_dvoa[["Team", "DefensiveDVOA"]], on="Team", how="inner")
+    dvoa["DefensiveDVOA_Positive"] = -dvoa["DefensiveDVOA"]
+    dvoa["TotalDVOA"] = dvoa["OffensiveDVOA"] + dvoa["DefensiveDVOA_Positive"]
+    teams = X.join(dvoa.set_index("Team"), how="inner")
+    fit = ridge_svd(teams[X.columns], teams[TARGETS], alphas)
+    for t, a in zip(np.array(TARGETS)[fit["at_edge"]], fit["alpha"][fit["at_edge"]]):
+        print(f"⚠️ {t}: LOO alpha {a:g} is at the end of the grid ({alphas[0]:g}–{alphas[-1]:g}); "
+              "the optimum may lie outside it")
+
+    for j, t in enumerate(TARGETS):
+        teams[f"{t}_Fit"] = fit["fitted"][:, j]
+    weights = pd.DataFrame({"Feature": np.tile(X.columns, len(TARGETS)),
+                            "Target": np.repeat(TARGETS, X.shape[1]),
+                            "Ridge": fit["beta"].T.ravel(), "Ridge_Std": fit["beta_std"].T.ravel()})
+    summary = pd.DataFrame({"Target": TARGETS, "Alpha": fit["alpha"], "R2": fit["r2"],
+                            "Intercept": fit["intercept"]})
+
+    # Player scale from the Total model
+    beta = pd.Series(fit["beta"][:, 0], index=X.columns)
+    out = []
+    for side, df, share, doms in (("Offense", off, off_share, TOM_DOMAINS), ("Defense", dfn, def_share, TDM_DOMAINS)):
+        prefix = "Off:" if side == "Offense" else "Def:"
+        S = df[doms].to_numpy(dtype=float) * share[:, None]
+        contrib = S * beta[[prefix + d for d in doms]].to_numpy()
+        p = df[[c for c in ["Player", "Team", "Position"] if c in df.columns]].copy()
+        p["Team"] = fix_teams(p["Team"])
+        p["Side"] = side
+        p[[prefix + d for d in doms]] = contrib
+        p["OneMetric"] = contrib.sum(axis=1)
+        out.append(p)
+    players = pd.concat(out, ignore_index=True).fillna({c: 0.0 for c in X.columns})
+    players = players.sort_values("OneMetric", ascending=False, ignore_index=True)
+    return players, teams.reset_index(), weights, summary
+
+
+def load_inputs():
+    """Part 2 bases (offense with Team; defense with PlayerAgg primary team) and both DVOA tables."""
+    off = pd.read_csv(OFF_PATH)
+    dfn = pd.read_csv(DEF_PATH)
+    if "Team" not in dfn.columns and os.path.exists(PLAYERAGG_PATH):
+        teams = pd.read_csv(PLAYERAGG_PATH)[["Player", "PrimaryTeam"]].drop_duplicates("Player")
+        dfn = dfn.merge(teams.rename(columns={"PrimaryTeam": "Team"}), on="Player", how="left")
+    return off, dfn, load_dvoa(OFF_DVOA_PATH, "off"), load_dvoa(DEF_DVOA_PATH, "def")
+
+
+if __name__ == "__main__":
+    if not all(os.path.exists(p) for p in (OFF_PATH, DEF_PATH, OFF_DVOA_PATH, DEF_DVOA_PATH)):
+        print("(Info) One metric skipped: run TOM/TDM Part 2 first and provide both DVOA files")
+    else:
+        players, teams, weights, summary = fit_one_metric(*load_inputs())
+        print("📊 Joint team fit (one SVD, LOO-selected alpha per target):")
+        print(summary.round(3).to_string(index=False))
+        print("\nTotal-model weights (DVOA points per unit team domain score):")
+        print(weights[weights["Target"] == "TotalDVOA"].round(3).to_string(index=False))
+        print("\n🏈 Top 15 players, both sides (DVOA points):")
+        print(players.head(15)[["Player", "Team", "Position", "Side", "OneMetric"]].round(3).to_string(index=False))
+        players.to_csv(BASE + "One_Metric_Player_Values.csv", index=False)
+        teams.to_csv(BASE + "One_Metric_Team_Fit.csv", index=False)
+        weights.to_csv(BASE + "One_Metric_Weights.csv", index=False)
+        print(f"\n📁 Saved: {BASE}One_Metric_Player_Values.csv, One_Metric_Team_Fit.csv, One_Metric_Weights.csv")
@@ -0,0 +1,156 @@
+# ======================================
+# Opponent Adjustment: SRS-style team strengths → opponent-adjusted player inputs
+# ======================================
+# For every team-game stat y (from the offense's point of view)
+#     y[team vs opp] = μ + O[team] − D[opp] + ε
+# O/D come from one sparse ridge system per log: the normal matrix is the
+# same for every stat, so it is factorized once and all stats are solved as
+# right-hand sides. With a Season column, strengths are per team-season, so a
+# multi-season log is still a single (2T+1)-unknown solve.
+#
+# A player's season stat is then divided by the average "expected production"
+# factor of the opponents they actually faced:
+#     offense: f = (μ − D[opp]) / μ      (tough defenses → f < 1 → credit up)
+#     defense: f = (μ + O[opp]) / μ      (strong offenses → f > 1 → allowed stats discounted)
+# so the adjustment is scale-free and works for counts and rates alike.
+#
+# Expected local inputs (skipped entirely when absent):
+#   Team_Game_Log.csv    GameID, Team, Opponent [, Season], offensive team stats
+#   Player_Game_Log.csv  Player, GameID, Team, Opponent [, Season] [, Snaps]
+
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import factorized
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+TEAM_LOG_PATH = BASE + "Team_Game_Log.csv"
+PLAYER_LOG_PATH = BASE + "Player_Game_Log.csv"
+
+RIDGE = 1e-3                 # pins the O/D level split; negligible otherwise
+FACTOR_CLIP = (0.5, 2.0)
+
+# Per domain table: player column → (team-log offensive stat, side the player is on)
+STAT_MAPS = {
+    "passing": {
+        "PassingYards": ("PassingYards", "off"), "PassingTDs": ("PassingTDs", "off"),
+        "INTs": ("INTs", "off"), "CompletionPercent": ("CompletionPercent", "off"),
+        "YardsPerAttempt": ("YardsPerPassAttempt", "off"),
+    },
+    "rushing": {
+        "RushYards": ("RushYards", "off"), "RushTDs": ("RushTDs", "off"),
+        "YardsPerAttempt": ("YardsPerRush", "off"),
+    },
+    "receiving": {
+        "ReceivingYards": ("PassingYards", "off"), "ReceivingTDs": ("PassingTDs", "off"),
+        "CatchPercent": ("CompletionPercent", "off"),
+    },
+    "blocking": {
+        "PressuresAllowed": ("PressuresAllowed", "off"), "SacksAllowed": ("SacksAllowed", "off"),
+    },
+    "passrush": {
+        "Sacks": ("SacksAllowed", "def"), "Pressures": ("PressuresAllowed", "def"),
+        "Hurries": ("PressuresAllowed", "def"),
+    },
+    "coverage": {
+        "YardsAllowed": ("PassingYards", "def"), "TDsAllowed": ("PassingTDs", "def"),
+        "YardsPerTarget": ("YardsPerPassAttempt", "def"), "INTs": ("INTs", "def"),
+    },
+    "rundef": {
+        "Stops": ("RushAttempts", "def"),
+    },
+}
+
+
+def _entity_keys(df, team_col):
+    if "Season" in df.columns:
+        return df[team_col].astype(str) + "|" + df["Season"].astype(str)
+    return df[team_col].astype(str)
+
+
+def team_strengths(team_log, stats, ridge=RIDGE):
+    """O/D strengths per team (or team-season) for each stat, plus the league mean μ.
+
+    Returns (strengths, mu): strengths is indexed by entity with columns
+    "<stat>_Off" / "<stat>_Def" (higher Def = allows less).
+    """
+    stats = [s for s in stats if s in team_log.columns]
+    team_key, opp_key = _entity_keys(team_log, "Team"), _entity_keys(team_log, "Opponent")
+    ents = pd.Index(pd.unique(np.concatenate([team_key.to_numpy(), opp_key.to_numpy()])))
+    T, n = len(ents), len(team_log)
+    ti, oi = ents.get_indexer(team_key), ents.get_indexer(opp_key)
+
+    rows = np.repeat(np.arange(n), 3)
+    cols = np.column_stack([np.zeros(n, dtype=int), 1 + ti, 1 + T + oi]).ravel()
+    vals = np.tile([1.0, 1.0, -1.0], n)
+    X = sp.csr_matrix((vals, (rows, cols)), shape=(n, 1 + 2 * T))
+    pen = sp.diags(np.r_[0.0, np.full(2 * T, ridge)])
+
+    Y = team_log[stats].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    full = ~np.isnan(Y).any(axis=0)
+    out = np.full((1 + 2 * T, len(stats)), np.nan)
+    if full.any():
+        solve = factorized((X.T @ X + pen).tocsc())
+        XtY = X.T @ Y[:, full]
+        out[:, full] = np.column_stack([solve(XtY[:, j]) for j in range(XtY.shape[1])])
+    for j in np.flatnonzero(~full):
+        ok = ~np.isnan(Y[:, j])
+        Xj = X[ok]
+        out[:, j] = factorized((Xj.T @ Xj + pen).tocsc())(Xj.T @ Y[ok, j])
+
+    mu = pd.Series(out[0], index=stats)
+    strengths = pd.DataFrame(index=ents)
+    for j, s in enumerate(stats):
+        strengths[f"{s}_Off"] = out[1:1 + T, j]
+        strengths[f"{s}_Def"] = out[1 + T:, j]
+    return strengths, mu
+
+
+def opponent_factors(player_log, strengths, mu, stat_map, weight_col="Snaps"):
+    """Per-player mean expected-production factor of the opponents faced, per mapped column."""
+    opp = strengths.index.get_indexer(_entity_keys(player_log, "Opponent"))
+    w = (pd.to_numeric(player_log[weight_col], errors="coerce").fillna(0).to_numpy(dtype=float)
+         if weight_col in player_log.columns else np.ones(len(player_log)))
+    w = np.where(opp >= 0, w, 0.0)
+    codes, players = pd.factorize(player_log["Player"])
+    wsum = np.bincount(codes, weights=w, minlength=len(players))
+    out = pd.DataFrame(index=pd.Index(players, name="Player"))
+    for col, (stat, side) in stat_map.items():
+        if stat not in mu.index or not np.isfinite(mu[stat]) or mu[stat] == 0:
+            continue
+        if side == "off":
+            eff = -strengths[f"{stat}_Def"].to_numpy()
+        else:
+            eff = strengths[f"{stat}_Off"].to_numpy()
+        f = np.clip((mu[stat] + np.where(opp >= 0, eff[opp], 0.0)) / mu[stat], *FACTOR_CLIP)
+        out[col] = np.bincount(codes, weights=w * f, minlength=len(players)) / np.where(wsum > 0, wsum, 1)
+        out.loc[wsum == 0, col] = 1.0
+    return out
+
+
+def load_game_logs(team_path=TEAM_LOG_PATH, player_path=PLAYER_LOG_PATH):
+    """(team_log, player_log) when both files exist, else None."""
+    if not (os.path.exists(team_path) and os.path.exists(player_path)):
+        return None
+    return pd.read_csv(team_path), pd.read_csv(player_path)
+
+
+def adjust_for_opponent(df, domain, logs, stat_map=None):
+    """Copy of a domain table with mapped columns divided by the player's opponent factor."""
+    stat_map = {c: v for c, v in (stat_map or STAT_MAPS[domain]).items() if c in df.columns}
+    if logs is None or not stat_map:
+        return df
+    team_log, player_log = logs
+    strengths, mu = team_strengths(team_log, sorted({s for s, _ in stat_map.values()}))
+    fac = opponent_factors(player_log, strengths, mu, stat_map)
+    if fac.empty or fac.shape[1] == 0:
+        return df
+    df = df.copy()
+    f = fac.reindex(df["Player"]).fillna(1.0)
+    for col in fac.columns:
+        df[col] = df[col].to_numpy() / f[col].to_numpy()
+    matched = df["Player"].isin(fac.index).sum()
+    print(f"✅ Opponent-adjusted {domain}: {list(fac.columns)} ({matched}/{len(df)} players in game log)")
+    return df
@@ -0,0 +1,361 @@
+# ======================================
+# Out-of-core: partitioned, memory-capped execution for college-scale inputs
+# ======================================
+# College PFF exports (130+ FBS teams, tens of thousands of player rows per
+# season, several seasons or leagues at once) do not fit the eager Part 1–5
+# flow. Here every input is streamed in row chunks sized to MEMORY_MB and
+# spilled to a partition directory keyed by team (or conference):
+#
+#   <spill>/<key>/<piece>/<column>.npy     one columnar .npy per column
+#
+# so a partition can be read back (or memory-mapped) column by column.
+#
+# Statistics combine exactly across chunks and partitions. Moments keeps a
+# weighted count / mean / M2 per group × feature and merges partials with
+# the parallel-variance update (Chan et al.):
+#     W = Wa + Wb,  δ = μb − μa,  μ = μa + δ·Wb/W,  M2 = M2a + M2b + δ²·Wa·Wb/W
+# which gives the same stats table as standardize.group_stats (to rounding)
+# for within-group z-scores, and the same (snap-weighted) team means as a
+# full-table groupby. Merges keyed on Team run partition by partition;
+# player-keyed merges hash the key into a fixed number of buckets instead.
+#
+# METRIC_OUT_OF_CORE=1 switches Parts 3–4 onto these paths (Parts 1–2 and 5
+# still load their tables whole):
+#   Part 3/4  team aggregates streamed from the base CSVs (team_aggregate;
+#             score_aggregate for Part 4 scoring, winsorized at exact
+#             league-wide bounds), TDM player → team links via merge_on(); no player
+#             table is held, so Part 3 publishes no shared player matrices
+# The DVOA joins stay in memory: they are 32-row team tables.
+
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from runtime import MEMORY_MB
+from standardize import LEAGUE, MIN_GROUP, apply_group_stats
+from winsorize import TailQuantiles
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+SPILL_DIR = BASE + "Out_Of_Core/"
+SAFETY = 4          # working copies per chunk (parse, numeric copy, result, spill)
+SAMPLE_ROWS = 2000
+MIN_ROWS = 1000     # chunk floor, whatever the cap
+BUCKETS = 64        # hash partitions for keys with too many values (Player)
+
+
+# ---------- Chunked reading ----------
+def chunk_rows(source, cap_mb=MEMORY_MB, usecols=None):
+    """Rows per chunk so SAFETY working copies of a chunk stay under cap_mb."""
+    if isinstance(source, pd.DataFrame):
+        sample = source.iloc[:SAMPLE_ROWS] if usecols is None else source[usecols].iloc[:SAMPLE_ROWS]
+    else:
+        sample = pd.read_csv(source, nrows=SAMPLE_ROWS, usecols=usecols)
+    per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1.0)
+    return max(int(cap_mb * 2 ** 20 / (SAFETY * per_row)), MIN_ROWS)
+
+
+def iter_chunks(source, cap_mb=MEMORY_MB, usecols=None, **kw):
+    """Memory-capped row chunks of a CSV path (pd.read_csv) or an in-memory frame."""
+    rows = chunk_rows(source, cap_mb, usecols)
+    if isinstance(source, pd.DataFrame):
+        frame = source if usecols is None else source[usecols]
+        for start in range(0, len(frame), rows):
+            yield frame.iloc[start:start + rows]
+        return
+    yield from pd.read_csv(source, chunksize=rows, usecols=usecols, **kw)
+
+
+# ---------- Columnar spill ----------
+def _safe(key):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(key)) or "_"
+
+
+def write_piece(df, folder):
+    """One chunk of one partition → one .npy per column (+ schema.json)."""
+    os.makedirs(folder, exist_ok=True)
+    schema = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            arr, kind = s.to_numpy(), "num"
+        else:
+            arr, kind = s.fillna("").astype(str).to_numpy(dtype=str), "str"
+        schema[c] = kind
+        np.save(os.path.join(folder, f"{_safe(c)}.npy"), arr)
+    with open(os.path.join(folder, "schema.json"), "w") as f:
+        json.dump(schema, f)
+
+
+def read_piece(folder, columns=None, mmap=False):
+    with open(os.path.join(folder, "schema.json")) as f:
+        schema = json.load(f)
+    out = {}
+    for c, kind in schema.items():
+        if columns is not None and c not in columns:
+            continue
+        arr = np.load(os.path.join(folder, f"{_safe(c)}.npy"), mmap_mode="r" if mmap else None)
+        out[c] = pd.Series(arr).replace("", np.nan) if kind == "str" else arr
+    return pd.DataFrame(out)
+
+
+def _bucket(values, buckets):
+    """Stable hash bucket of each key (same on every run and machine)."""
+    h = pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+    return pd.Series((h % np.uint64(buckets)).astype(int), index=values.index).map("b{:03d}".format)
+
+
+def partition(source, by, spill_dir, cap_mb=MEMORY_MB, transform=None, buckets=None):
+    """Stream a CSV, frame or iterable of frames into <spill_dir>/<key>/ partitions; returns keys.
+
+    `transform(chunk)` runs on each chunk before it is split (e.g. cleaning or
+    z-scoring with precomputed stats), so a stage never holds more than a chunk.
+    With `buckets`, keys are hashed into that many partitions instead.
+    """
+    shutil.rmtree(spill_dir, ignore_errors=True)
+    chunks = iter_chunks(source, cap_mb) if isinstance(source, (str, pd.DataFrame)) else source
+    keys, columns = {}, []
+    for i, chunk in enumerate(chunks):
+        if transform is not None:
+            chunk = transform(chunk)
+        columns = columns or list(chunk.columns)
+        split = _bucket(chunk[by], buckets) if buckets else chunk[by].astype(str)
+        for key, part in chunk.groupby(split, sort=False):
+            keys.setdefault(key, _safe(key))
+            write_piece(part, os.path.join(spill_dir, keys[key], f"{i:06d}"))
+    with open(os.path.join(spill_dir, "partitions.json"), "w") as f:
+        json.dump({"by": by, "buckets": buckets, "columns": columns, "keys": keys}, f, indent=1)
+    return list(keys)
+
+
+def _layout(spill_dir):
+    with open(os.path.join(spill_dir, "partitions.json")) as f:
+        return json.load(f)
+
+
+def partition_keys(spill_dir):
+    return _layout(spill_dir)["keys"]
+
+
+def read_partition(spill_dir, key, columns=None):
+    folder = os.path.join(spill_dir, partition_keys(spill_dir)[key])
+    pieces = [read_piece(os.path.join(folder, p), columns) for p in sorted(os.listdir(folder))]
+    return pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame(columns=columns)
+
+
+def partition_rows(spill_dir):
+    """Total rows across all partitions (array headers only)."""
+    total = 0
+    for folder in partition_keys(spill_dir).values():
+        for p in os.listdir(os.path.join(spill_dir, folder)):
+            piece = os.path.join(spill_dir, folder, p)
+            with open(os.path.join(piece, "schema.json")) as f:
+                first = next(iter(json.load(f)), None)
+            if first is not None:
+                total += len(np.load(os.path.join(piece, f"{_safe(first)}.npy"), mmap_mode="r"))
+    return total
+
+
+def iter_partitions(spill_dir, columns=None):
+    for key in partition_keys(spill_dir):
+        yield key, read_partition(spill_dir, key, columns)
+
+
+def merge_partitions(left_dir, right_dir, on, how, spill_dir):
+    """Partition-wise merge; exact whenever both sides share the partitioning and it is one of `on`."""
+    layout_l, layout_r = _layout(left_dir), _layout(right_dir)
+    left, right = layout_l["keys"], layout_r["keys"]
+    by = layout_l["by"]
+    if by not in on:
+        raise ValueError(f"Partition column {by!r} must be a merge key")
+    if (layout_r["by"], layout_r.get("buckets")) != (by, layout_l.get("buckets")):
+        raise ValueError("Both sides must be partitioned the same way")
+    keys = list(left) + [k for k in right if k not in left]
+    empty_l = pd.DataFrame(columns=layout_l.get("columns", on))
+    empty_r = pd.DataFrame(columns=layout_r.get("columns", on))
+
+    def frames():
+        for k in keys:
+            a = read_partition(left_dir, k) if k in left else None
+            b = read_partition(right_dir, k) if k in right else None
+            if (a is None and how in ("inner", "left")) or (b is None and how in ("inner", "right")):
+                continue
+            # a one-sided partition still gets the other side's columns (as NaN)
+            a = empty_l.astype({c: b[c].dtype for c in on}) if a is None else a
+            b = empty_r.astype({c: a[c].dtype for c in on}) if b is None else b
+            yield a.merge(b, on=on, how=how)
+    return partition(frames(), by, spill_dir, buckets=layout_l.get("buckets"))
+
+
+def merge_on(left, right, on, how, name, buckets=BUCKETS, cap_mb=MEMORY_MB):
+    """left.merge(right) for CSV paths or frames, bucket by bucket; returns the result's spill dir.
+
+    Both sides are hashed on on[0] into the same buckets under SPILL_DIR/<name>_*.
+    """
+    root = SPILL_DIR + name
+    partition(left, on[0], root + "_left", cap_mb, buckets=buckets)
+    partition(right, on[0], root + "_right", cap_mb, buckets=buckets)
+    merge_partitions(root + "_left", root + "_right", on, how, root)
+    return root
+
+
+# ---------- Exact combinable statistics ----------
+class Moments:
+    """Weighted count / mean / M2 per group × feature, mergeable across partitions."""
+
+    def __init__(self, cols):
+        self.cols = list(cols)
+        self.groups = pd.Index([], dtype=object)
+        p = len(self.cols)
+        self.n, self.w, self.mean, self.m2 = (np.zeros((0, p)) for _ in range(4))
+
+    @staticmethod
+    def _combine(na, wa, ma, qa, nb, wb, mb, qb):
+        W = wa + wb
+        frac = np.divide(wb, W, out=np.zeros_like(W), where=W > 0)
+        d = mb - ma
+        return na + nb, W, ma + d * frac, qa + qb + d ** 2 * wa * frac
+
+    def _merge(self, groups, n, w, mean, m2):
+        new = groups.difference(self.groups, sort=False)
+        if len(new):
+            self.groups = self.groups.append(new)
+            pad = np.zeros((len(new), len(self.cols)))
+            self.n, self.w, self.mean, self.m2 = (np.vstack([a, pad]) for a in (self.n, self.w, self.mean, self.m2))
+        idx = self.groups.get_indexer(groups)
+        self.n[idx], self.w[idx], self.mean[idx], self.m2[idx] = self._combine(
+            self.n[idx], self.w[idx], self.mean[idx], self.m2[idx], n, w, mean, m2)
+        return self
+
+    def update(self, df, group_col=None, weight_col=None):
+        """Fold one chunk in: per-group moments by bincount, then the pairwise merge."""
+        if group_col:
+            df = df[df[group_col].notna()]      # like groupby: rows without a key are dropped
+        X = df[self.cols].to_numpy(dtype=float)
+        ok = ~np.isnan(X)
+        wt = df[weight_col].fillna(0).to_numpy(dtype=float) if weight_col else np.ones(len(df))
+        codes, uniq = pd.factorize(df[group_col].astype(str) if group_col else pd.Series(LEAGUE, index=df.index))
+        G = len(uniq)
+        W = ok * wt[:, None]
+        Xz = np.where(ok, X, 0.0)
+
+        def per_group(v):
+            return np.stack([np.bincount(codes, weights=v[:, j], minlength=G) for j in range(v.shape[1])], axis=1)
+
+        n, w = per_group(ok.astype(float)), per_group(W)
+        mean = per_group(W * Xz) / np.where(w > 0, w, 1)
+        m2 = per_group(W * (Xz - mean[codes]) ** 2 * ok)
+        return self._merge(pd.Index(uniq.astype(str)), n, w, mean, m2)
+
+    def merge(self, other):
+        return self._merge(other.groups, other.n, other.w, other.mean, other.m2)
+
+    def league(self):
+        n, w, m, q = (a[:1] * 0 for a in (self.n, self.w, self.mean, self.m2))
+        for g in range(len(self.groups)):
+            n, w, m, q = self._combine(n, w, m, q, self.n[g:g + 1], self.w[g:g + 1], self.mean[g:g + 1], self.m2[g:g + 1])
+        return n[0], w[0], m[0], q[0]
+
+    def stats(self, min_group=MIN_GROUP, grouped=True):
+        """The standardize.group_stats table (Group, Feature, N, Weight, Mean, Std, Source)."""
+        ln, lw, lm, lq = self.league()
+        lsd = np.sqrt(np.maximum(lq / np.where(lw > 0, lw, 1), 0.0))
+        league = pd.DataFrame({"Group": LEAGUE, "Feature": self.cols, "N": ln.astype(int), "Weight": lw,
+                               "Mean": lm, "Std": lsd, "Source": "league"})
+        if not grouped:
+            return league
+        sd = np.sqrt(np.maximum(self.m2 / np.where(self.w > 0, self.w, 1), 0.0))
+        thin = (self.n < min_group) | (self.w <= 0)
+        out = pd.DataFrame({
+            "Group": np.repeat(self.groups.astype(str), len(self.cols)),
+            "Feature": np.tile(self.cols, len(self.groups)),
+            "N": self.n.ravel().astype(int), "Weight": self.w.ravel(),
+            "Mean": np.where(thin, lm, self.mean).ravel(), "Std": np.where(thin, lsd, sd).ravel(),
+            "Source": np.where(thin.ravel(), "league", "group"),
+        })
+        return pd.concat([out, league], ignore_index=True)
+
+    def means(self):
+        """Group × feature weighted means (e.g. team aggregates), as a DataFrame."""
+        return pd.DataFrame(np.where(self.w > 0, self.mean, np.nan), index=self.groups, columns=self.cols)
+
+
+# ---------- Stages ----------
+def chunked_stats(source, cols, group_col=None, weight_col=None, min_group=MIN_GROUP, cap_mb=MEMORY_MB):
+    """One streaming pass: the standardize.group_stats table, chunk by chunk."""
+    m = Moments(cols)
+    for chunk in iter_chunks(source, cap_mb):
+        m.update(chunk, group_col, weight_col)
+    return m.stats(min_group, grouped=group_col is not None)
+
+
+def standardize(source, cols, spill_dir, by="Team", group_col=None, weight_col=None,
+                min_group=MIN_GROUP, cap_mb=MEMORY_MB):
+    """Two streaming passes: exact group stats, then z-score and spill by partition; returns stats."""
+    stats = chunked_stats(source, cols, group_col, weight_col, min_group, cap_mb)
+
+    def z(chunk):
+        chunk = chunk.copy()
+        chunk[cols] = apply_group_stats(chunk, cols, stats, group_col)
+        return chunk
+    partition(source, by, spill_dir, cap_mb, transform=z)
+    return stats
+
+
+def team_aggregate(spill_dir, cols, team_col="Team", weight_col=None, transform=None, how="mean"):
+    """(Weighted) team means or sums of cols from spilled partitions, plus player counts.
+
+    `transform(part)` runs on each partition first (e.g. team-code fixes or
+    player scoring), so cols may be columns it creates.
+    """
+    m = Moments(cols)
+    need = None if transform is not None else cols + [team_col] + ([weight_col] if weight_col else [])
+    for _, part in iter_partitions(spill_dir, need):
+        m.update(part if transform is None else transform(part), team_col, weight_col)
+    out = m.means()
+    if how == "sum":     # NaN-skipping sums, 0 for a team with no values (groupby().sum())
+        out = pd.DataFrame(np.where(m.w > 0, m.mean * m.w, 0.0), index=out.index, columns=out.columns)
+    out["Players"] = m.n.max(axis=1).astype(int)
+    return out.rename_axis(team_col).sort_index().reset_index()
+
+
+def score_aggregate(spill_dir, score, cols, team_col="Team", how="mean", transform=None):
+    """Team aggregates of player scores computed partition by partition.
+
+    score(part, sketch, fold) scores one partition in place (score_tom /
+    score_tdm). The first pass folds every partition's tails into one
+    TailQuantiles, so the second clips at the exact league-wide bounds the
+    in-memory run uses.
+    """
+    sketch = TailQuantiles(partition_rows(spill_dir))
+    for _, part in iter_partitions(spill_dir):
+        score(part if transform is None else transform(part), sketch, True)
+
+    def scored(part):
+        part = part if transform is None else transform(part)
+        score(part, sketch, False)
+        return part
+    return team_aggregate(spill_dir, cols, team_col, transform=scored, how=how)
+
+
+if __name__ == "__main__":
+    from standardize import group_stats
+    from scoring_kernel import TOM_DOMAINS
+
+    src = BASE + "Unified_Value_Model_Base.csv"
+    if not os.path.exists(src):
+        print("(Info) Out-of-core check skipped: run TOM Part 2 first")
+    else:
+        spill = SPILL_DIR + "tom_base"
+        stats = standardize(src, TOM_DOMAINS, spill, by="Team", group_col="Position")
+        full = pd.read_csv(src)
+        ref = group_stats(full, TOM_DOMAINS, "Position")
+        diff = np.abs(stats.set_index(["Group", "Feature"])[["Mean", "Std"]]
+                      - ref.set_index(["Group", "Feature"])[["Mean", "Std"]]).max().max()
+        teams = team_aggregate(spill, TOM_DOMAINS)
+        print(f"✅ {len(partition_keys(spill))} team partitions under {MEMORY_MB} MB chunks → {spill}")
+        print(f"📊 Max |stats − in-memory stats|: {diff:.2e}")
+        print(teams.head().round(3).to_string(index=False))
@@ -0,0 +1,91 @@
+# ======================================
+# Permutation Tests: significance for team-level metric vs DVOA correlations
+# ======================================
+# With 32 teams a single Pearson r says little on its own. Each correlation is
+# re-computed under tens of thousands of shuffles of the DVOA team labels;
+# every (metric, DVOA) pair is scored for a whole chunk of shuffles in one
+# einsum over pre-standardized columns, so the full table costs well under a
+# second. Bootstrap resamples of teams give percentile CIs the same way.
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+N_PERM = 20000
+N_BOOT = 5000
+SEED = 42
+CHUNK = 2000
+
+
+def _std(A):
+    """Column z-scores scaled so that z_x · z_y is Pearson r (constant columns → 0)."""
+    Z = A - A.mean(axis=-2, keepdims=True)
+    ss = np.sqrt((Z ** 2).sum(axis=-2, keepdims=True))
+    return Z / np.where(ss == 0, 1.0, ss)
+
+
+def _parse(pairs):
+    labels, xs, ys, signs = [], [], [], []
+    for label, (x, y, *sign) in pairs.items():
+        labels.append(label)
+        xs.append(x)
+        ys.append(y)
+        signs.append(float(sign[0]) if sign else 1.0)
+    return labels, xs, ys, np.array(signs)
+
+
+def correlation_table(df, pairs, n_perm=N_PERM, n_boot=N_BOOT, seed=SEED, alpha=0.05):
+    """Pearson r, permutation p-value, null band and CIs for each labelled pair.
+
+    pairs: {label: (metric_col, dvoa_col)} or (metric_col, dvoa_col, sign);
+    sign=-1 reports the inverted correlation (TDM: ↑ = better defense).
+    Rows missing any used column are dropped so every pair sees the same teams.
+    """
+    labels, xs, ys, signs = _parse(pairs)
+    used = list(dict.fromkeys(xs + ys))
+    data = df[used].apply(pd.to_numeric, errors="coerce").dropna()
+    n = len(data)
+    X = _std(data[xs].to_numpy(dtype=float))
+    Y = _std(data[ys].to_numpy(dtype=float)) * signs
+    r = np.einsum("nk,nk->k", X, Y)
+
+    rng = np.random.default_rng(seed)
+    null = np.empty((n_perm, len(labels)))
+    for start in range(0, n_perm, CHUNK):
+        b = min(CHUNK, n_perm - start)
+        perm = rng.permuted(np.tile(np.arange(n), (b, 1)), axis=1)
+        null[start:start + b] = np.einsum("nk,bnk->bk", X, Y[perm])
+    hits = (np.abs(null) >= np.abs(r) - 1e-12).sum(axis=0)
+    p_perm = (hits + 1) / (n_perm + 1)
+    null_lo, null_hi = np.quantile(null, [alpha / 2, 1 - alpha / 2], axis=0)
+
+    boot = np.empty((n_boot, len(labels)))
+    Xr = data[xs].to_numpy(dtype=float)
+    Yr = data[ys].to_numpy(dtype=float) * signs
+    for start in range(0, n_boot, CHUNK):
+        b = min(CHUNK, n_boot - start)
+        idx = rng.integers(0, n, size=(b, n))
+        boot[start:start + b] = np.einsum("bnk,bnk->bk", _std(Xr[idx]), _std(Yr[idx]))
+    boot_lo, boot_hi = np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+
+    # Fisher z interval (analytic, assumes bivariate normality)
+    zc = NormalDist().inv_cdf(1 - alpha / 2)
+    z, se = np.arctanh(np.clip(r, -0.999999, 0.999999)), 1 / np.sqrt(max(n - 3, 1))
+
+    return pd.DataFrame({
+        "Comparison": labels, "Metric": xs, "DVOA": ys, "Sign": signs.astype(int), "N": n,
+        "r": r, "p_perm": p_perm,
+        "Null_lo": null_lo, "Null_hi": null_hi,
+        "Fisher_lo": np.tanh(z - zc * se), "Fisher_hi": np.tanh(z + zc * se),
+        "Boot_lo": boot_lo, "Boot_hi": boot_hi,
+    })
+
+
+def print_correlation_table(tbl, width=36):
+    """Console lines in the Part 4 style: r, p and the bootstrap CI per comparison."""
+    for row in tbl.itertuples(index=False):
+        star = "*" if row.p_perm < 0.05 else " "
+        print(f"  {row.Comparison:{width}s}: {row.r:+.3f}{star} (p={row.p_perm:.4f}, "
+              f"95% CI [{row.Boot_lo:+.3f}, {row.Boot_hi:+.3f}], "
+              f"null band [{row.Null_lo:+.3f}, {row.Null_hi:+.3f}])")
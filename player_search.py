@@ -0,0 +1,138 @@
+# ======================================
+# Player Search: prebuilt name index (exact / prefix / trigram)
+# ======================================
+# Names are normalized once (accents, punctuation, case, "Jr."/"II" suffixes),
+# then resolved through an exact map, sorted token prefixes and a trigram
+# inverted index. Batches of queries never rescan the frame, and the same
+# index matches names across PFF, DVOA and roster sources.
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+
+EXACT_SCORE  = 1.00
+PREFIX_SCORE = 0.90
+MIN_SCORE    = 0.50
+
+
+def normalize_name(name):
+    """'Pat Surtain II' / 'pat  surtain' / 'Pát Surtain, Jr.' → 'pat surtain'."""
+    if not isinstance(name, str):
+        return ""
+    s = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    s = re.sub(r"[.'’`]", "", s.lower())
+    tokens = re.sub(r"[^a-z0-9]+", " ", s).split()
+    while len(tokens) > 1 and tokens[-1] in SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def _grams(norm, n=3):
+    padded = f"  {norm} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class PlayerIndex:
+    """Name index over one or more scored tables; hits are (source, row) pairs."""
+
+    def __init__(self, names, sources=None, rows=None):
+        names = pd.Series(names).astype(object).tolist()
+        self.names = names
+        self.sources = list(sources) if sources is not None else [None] * len(names)
+        self.rows = np.asarray(rows if rows is not None else np.arange(len(names)))
+        self.norm = [normalize_name(n) for n in names]
+
+        self.exact = defaultdict(list)
+        tokens, grams = [], defaultdict(list)
+        for i, nm in enumerate(self.norm):
+            if not nm:
+                continue
+            self.exact[nm].append(i)
+            tokens += [(t, i) for t in nm.split()]
+            for g in _grams(nm):
+                grams[g].append(i)
+        tokens.sort()
+        self.tokens = [t for t, _ in tokens]
+        self.token_ids = [i for _, i in tokens]
+        self.full = sorted((nm, i) for i, nm in enumerate(self.norm) if nm)
+        self.full_keys = [nm for nm, _ in self.full]
+        self.full_ids = [i for _, i in self.full]
+        self.grams = {g: np.array(ids) for g, ids in grams.items()}
+        self.gram_len = np.array([len(_grams(nm)) if nm else 0 for nm in self.norm])
+
+    @classmethod
+    def from_frames(cls, col="Player", **frames):
+        """PlayerIndex.from_frames(off=uvm_off, def_=tdm): rows are positions within each frame."""
+        names, sources, rows = [], [], []
+        for src, df in frames.items():
+            names += df[col].tolist()
+            sources += [src.rstrip("_")] * len(df)
+            rows += list(range(len(df)))
+        return cls(names, sources, rows)
+
+    # ---------- Lookup ----------
+    def _prefix(self, keys, ids, q):
+        out, i = [], bisect_left(keys, q)
+        while i < len(keys) and keys[i].startswith(q):
+            out.append(ids[i])
+            i += 1
+        return out
+
+    def _scores(self, query, min_score=MIN_SCORE):
+        """{entry: score} for one query."""
+        q = normalize_name(query)
+        if not q:
+            return {}
+        hits = {i: EXACT_SCORE for i in self.exact.get(q, [])}
+
+        # Whole-name prefix, then every query token prefixing some name token
+        for i in self._prefix(self.full_keys, self.full_ids, q):
+            hits.setdefault(i, PREFIX_SCORE)
+        qt = q.split()
+        if qt:
+            sets = [set(self._prefix(self.tokens, self.token_ids, t)) for t in qt]
+            for i in set.intersection(*sets):
+                hits.setdefault(i, PREFIX_SCORE)
+
+        # Trigram Dice similarity over the inverted index
+        qg = _grams(q)
+        post = [self.grams[g] for g in qg if g in self.grams]
+        if post:
+            ids, shared = np.unique(np.concatenate(post), return_counts=True)
+            dice = 2.0 * shared / (len(qg) + self.gram_len[ids])
+            keep = dice >= min_score
+            for i, d in zip(ids[keep], dice[keep]):
+                if i not in hits:
+                    hits[int(i)] = float(min(d, PREFIX_SCORE - 0.01))
+        return hits
+
+    def lookup(self, query, k=10, min_score=MIN_SCORE):
+        """Best matches for one query as a DataFrame (Source, Row, Player, Score)."""
+        return self.lookup_many([query], k, min_score).drop(columns="Query")
+
+    def lookup_many(self, queries, k=10, min_score=MIN_SCORE):
+        """Resolve a batch of queries; returns one long frame of ranked hits."""
+        out = []
+        for q in queries:
+            hits = sorted(self._scores(q, min_score).items(), key=lambda x: (-x[1], x[0]))[:k]
+            out += [(q, self.sources[i], int(self.rows[i]), self.names[i], s) for i, s in hits]
+        return pd.DataFrame(out, columns=["Query", "Source", "Row", "Player", "Score"])
+
+    def rows_for(self, query, source=None, min_score=EXACT_SCORE):
+        """Row positions (within `source`) whose names match query at >= min_score."""
+        hits = self._scores(query, min(min_score, MIN_SCORE))
+        return [int(self.rows[i]) for i, s in sorted(hits.items())
+                if s >= min_score and (source is None or self.sources[i] == source)]
+
+    def match(self, names, min_score=0.8):
+        """Cross-source matching: best index entry for each external name (or NaN)."""
+        best = self.lookup_many(list(names), k=1, min_score=min_score)
+        best = best.drop_duplicates("Query")
+        out = pd.DataFrame({"Query": list(names)})
+        return out.merge(best, on="Query", how="left")
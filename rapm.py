@@ -0,0 +1,227 @@
+# ======================================
+# RAPM: sparse play-level adjusted plus-minus
+# ======================================
+# Team-level ridge (TOM/TDM Part 3) has 32 rows and cannot split credit
+# between teammates. Here every play is a row and every on-field player a
+# column: +1 on offense, -1 on defense, so one coefficient per player reads
+# "play value added" on either side (defenders: value taken away).
+#
+# Ridge is solved with Jacobi-preconditioned CG on the sparse normal equations
+# (or LSQR straight on X when the Gram matrix is unwanted), walking alphas from
+# strong to weak shrinkage and warm-starting each solve from the previous one.
+# X is float32 CSR with int32 indices, so several seasons of plays
+# (millions of rows × ~22 nonzeros) stay in a few hundred MB.
+#
+# Expected local inputs (one season or many stacked):
+#   Play_Outcomes.csv       PlayID, EPA [, Weight] [, GameID]
+#   Play_Participation.csv  PlayID, Player, Side   (Side: O/D or Offense/Defense)
+#
+#   python rapm.py   → RAPM_Player_Coefficients.csv (blended with TOM/TDM if present)
+
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator, cg, lsqr
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+OUTCOMES_PATH = BASE + "Play_Outcomes.csv"
+PARTICIPATION_PATH = BASE + "Play_Participation.csv"
+OFF_PATH = BASE + "UVM_Player_Leaderboard_PhaseWeighted.csv"
+DEF_PATH = BASE + "TDM_Player_Leaderboard_PhaseWeighted_RoleCalibrated.csv"
+OUT_PATH = BASE + "RAPM_Player_Coefficients.csv"
+
+ALPHAS = np.logspace(4, 1, 10)     # strong → weak shrinkage (warm-start order)
+N_FOLDS = 5
+SEED = 42
+RTOL = 1e-6
+DENSE_FRAC = 0.3
+SIDE_SIGN = {"O": 1.0, "D": -1.0}
+
+
+def load_plays(outcomes_path=OUTCOMES_PATH, participation_path=PARTICIPATION_PATH, value_col="EPA"):
+    """Read the two play-level tables with compact dtypes."""
+    outcomes = pd.read_csv(outcomes_path)
+    part = pd.read_csv(participation_path, usecols=["PlayID", "Player", "Side"],
+                       dtype={"Player": "category", "Side": "category"})
+    outcomes = outcomes.dropna(subset=[value_col]).drop_duplicates("PlayID")
+    return outcomes, part
+
+
+class RAPM:
+    """Sparse play × player ridge with warm-started CG/LSQR solves."""
+
+    def __init__(self, outcomes, participation, value_col="EPA", weight_col="Weight", group_col="GameID"):
+        plays = pd.Index(outcomes["PlayID"])
+        rows = plays.get_indexer(participation["PlayID"])
+        # String work happens on the categories only, never per participation row
+        side = participation["Side"].astype("category")
+        side_sign = (pd.Series(side.cat.categories.astype(str)).str.strip().str[0].str.upper()
+                     .map(SIDE_SIGN).to_numpy(dtype=float))
+        sign = np.append(side_sign, np.nan)[side.cat.codes.to_numpy()]
+        player = participation["Player"].astype("category")
+        pcodes = player.cat.codes.to_numpy()
+        ok = (rows >= 0) & ~np.isnan(sign) & (pcodes >= 0)
+        if (~ok).any():
+            print(f"(Info) RAPM: dropped {int((~ok).sum())} participation rows (unknown play, side or player)")
+        used, cols = np.unique(pcodes[ok], return_inverse=True)
+        players = player.cat.categories[used].astype(str)
+
+        X = sp.csr_matrix((sign[ok].astype(np.float32), (rows[ok].astype(np.int32), cols.astype(np.int32))),
+                          shape=(len(plays), len(players)), dtype=np.float32)
+        X.sum_duplicates()
+        self.X = X
+        self.players = pd.Index(players, name="Player")
+        self.w = (outcomes[weight_col].to_numpy(dtype=float) if weight_col in outcomes
+                  else np.ones(len(plays)))
+        y = outcomes[value_col].to_numpy(dtype=float)
+        self.intercept = float(np.average(y, weights=self.w))
+        self.y = y - self.intercept
+        self.groups = outcomes[group_col].to_numpy() if group_col in outcomes else None
+        self.plays_per_player = np.bincount(X.indices, minlength=X.shape[1])
+        self._gram = None
+
+    @classmethod
+    def from_files(cls, outcomes_path=OUTCOMES_PATH, participation_path=PARTICIPATION_PATH, **kw):
+        outcomes, part = load_plays(outcomes_path, participation_path, kw.get("value_col", "EPA"))
+        return cls(outcomes, part, **kw)
+
+    # ---------- Normal equations ----------
+    def _normal(self, rows=None):
+        """XᵀWX and XᵀWy over a row subset (all rows when None)."""
+        X, w, y = (self.X, self.w, self.y) if rows is None else (self.X[rows], self.w[rows], self.y[rows])
+        Xw = sp.diags(w.astype(np.float32)) @ X
+        G = (X.T.tocsr() @ Xw).astype(np.float64)
+        rhs = np.asarray(Xw.T @ y, dtype=np.float64).ravel()
+        # Lineups mix most of the league within a season or two; a dense Gram
+        # is then both smaller and faster to multiply than its sparse form
+        if G.nnz > DENSE_FRAC * G.shape[0] ** 2:
+            G = G.toarray()
+        return G, rhs
+
+    @property
+    def gram(self):
+        if self._gram is None:
+            self._gram = self._normal()
+        return self._gram
+
+    @staticmethod
+    def _solve_cg(G, rhs, alpha, x0=None):
+        p = G.shape[0]
+        A = LinearOperator((p, p), matvec=lambda v: G @ v + alpha * v, dtype=np.float64)
+        M = sp.diags(1.0 / (G.diagonal() + alpha))
+        b, info = cg(A, rhs, x0=x0, rtol=RTOL, M=M, maxiter=5 * G.shape[0])
+        if info > 0:
+            print(f"(Info) RAPM: CG stopped at maxiter (alpha={alpha:g})")
+        return b
+
+    def fit(self, alpha, prior=None, x0=None, method="cg"):
+        """Ridge coefficients; with a prior b0 the penalty is α‖b − b0‖² (shrink toward b0)."""
+        prior = np.zeros(self.X.shape[1]) if prior is None else np.asarray(prior, dtype=float)
+        x0 = None if x0 is None else np.asarray(x0, dtype=float) - prior
+        if method == "lsqr":
+            sw = np.sqrt(self.w)
+            A = sp.diags(sw) @ self.X
+            r = sw * (self.y - self.X @ prior)
+            delta = lsqr(A, r, damp=np.sqrt(alpha), atol=RTOL, btol=RTOL, x0=x0)[0]
+        else:
+            G, rhs = self.gram
+            delta = self._solve_cg(G, rhs - G @ prior, alpha, x0)
+        return prior + delta
+
+    def fit_path(self, alphas=ALPHAS, prior=None, method="cg"):
+        """Coefficient path over alphas (sorted strong → weak), each solve warm-started."""
+        out, b = {}, None
+        for a in sorted(alphas, reverse=True):
+            b = self.fit(a, prior=prior, x0=b, method=method)
+            out[a] = b
+        return out
+
+    # ---------- Alpha selection ----------
+    def cross_validate(self, alphas=ALPHAS, n_folds=N_FOLDS, seed=SEED, prior=None):
+        """K-fold CV (folds by game when GameID is present).
+
+        Each fold's Gram is built once; the full Gram is their sum and each
+        training Gram is full − held-out, so X is only multiplied through once.
+        """
+        rng = np.random.default_rng(seed)
+        if self.groups is not None:
+            g_codes, g_uni = pd.factorize(self.groups)
+            fold = rng.permutation(len(g_uni)) % n_folds
+            fold = fold[g_codes]
+        else:
+            fold = rng.permutation(self.X.shape[0]) % n_folds
+        prior = np.zeros(self.X.shape[1]) if prior is None else np.asarray(prior, dtype=float)
+        parts = [(np.flatnonzero(fold == k),) + self._normal(np.flatnonzero(fold == k)) for k in range(n_folds)]
+        if any(not sp.issparse(G) for _, G, _ in parts):
+            parts = [(t, G.toarray() if sp.issparse(G) else G, r) for t, G, r in parts]
+        if self._gram is None:
+            self._gram = (sum(G for _, G, _ in parts), sum(r for _, _, r in parts))
+        G_all, rhs_all = self.gram
+        alphas = sorted(alphas, reverse=True)
+        sse = np.zeros(len(alphas))
+        for test, G_te, rhs_te in parts:
+            G_tr, rhs_tr = G_all - G_te, rhs_all - rhs_te
+            Xte, yte, wte = self.X[test], self.y[test], self.w[test]
+            b = None
+            for i, a in enumerate(alphas):
+                b = self._solve_cg(G_tr, rhs_tr - G_tr @ prior, a, b)
+                resid = yte - Xte @ (prior + b)
+                sse[i] += float(np.sum(wte * resid ** 2))
+        cv = pd.DataFrame({"Alpha": alphas, "CV_MSE": sse / self.w.sum()})
+        return float(cv.loc[cv["CV_MSE"].idxmin(), "Alpha"]), cv
+
+    # ---------- Priors from the existing metrics ----------
+    def metric_prior(self, *metrics):
+        """Prior coefficients proportional to existing player metrics, in play-value units.
+
+        Each metric (Series indexed by Player, e.g. TotalTOM_Adjusted or
+        TotalTDM_Adjusted) is z-scored over the players it covers; the scales
+        s_i come from one weighted least-squares fit of play outcomes on the
+        lineup sums X·m_i, so the prior lives on the same scale as RAPM.
+        """
+        M = np.zeros((self.X.shape[1], len(metrics)))
+        for j, m in enumerate(metrics):
+            m = pd.to_numeric(m, errors="coerce").groupby(level=0).mean()
+            m = (m - m.mean()) / (m.std(ddof=0) or 1.0)
+            M[:, j] = m.reindex(self.players).fillna(0.0).to_numpy()
+        Z = np.column_stack([self.X @ M[:, j] for j in range(M.shape[1])])
+        sw = np.sqrt(self.w)
+        scales = np.linalg.lstsq(Z * sw[:, None], self.y * sw, rcond=None)[0]
+        return M @ scales, scales
+
+    def coefficients(self, **vectors):
+        """Player table with play counts plus each named coefficient vector."""
+        out = pd.DataFrame({"Player": self.players, "Plays": self.plays_per_player})
+        for name, v in vectors.items():
+            out[name] = v
+        return out
+
+
+if __name__ == "__main__":
+    if not (os.path.exists(OUTCOMES_PATH) and os.path.exists(PARTICIPATION_PATH)):
+        print(f"(Info) RAPM skipped: need {OUTCOMES_PATH} and {PARTICIPATION_PATH}")
+    else:
+        model = RAPM.from_files()
+        print(f"✅ Design: {model.X.shape[0]:,} plays × {model.X.shape[1]:,} players, {model.X.nnz:,} nonzeros")
+        alpha, cv = model.cross_validate()
+        print(cv.round(5).to_string(index=False))
+        print(f"Best α = {alpha:g}")
+        rapm = model.fit(alpha)
+        cols = {"RAPM": rapm}
+
+        metrics = []
+        if os.path.exists(OFF_PATH):
+            metrics.append(pd.read_csv(OFF_PATH).set_index("Player")["TotalTOM_Adjusted"])
+        if os.path.exists(DEF_PATH):
+            metrics.append(pd.read_csv(DEF_PATH).set_index("Player")["TotalTDM_Adjusted"])
+        if metrics:
+            prior, scales = model.metric_prior(*metrics)
+            print(f"Prior scales (play value per metric SD): {np.round(scales, 4).tolist()}")
+            cols["RAPM_Prior"] = prior
+            cols["RAPM_Blend"] = model.fit(alpha, prior=prior, x0=rapm)
+
+        out = model.coefficients(**cols).sort_values(list(cols)[-1], ascending=False)
+        out.to_csv(OUT_PATH, index=False)
+        print(f"📁 Saved: {OUT_PATH}")
@@ -0,0 +1,83 @@
+# ======================================
+# Replacement: position baselines and value over replacement (VOR)
+# ======================================
+# Replacement level for a position group in a season is the best player who
+# would not start: with S starting slots per team and T teams, the (S·T + 1)-th
+# best score. Every player is then expressed as score − baseline, which puts
+# a QB and a slot corner on the same footing without hand-set multipliers.
+#
+# All season × group cells are handled at once: scores are scattered into a
+# padded (cells × max players) matrix and one np.partition call, with every
+# distinct replacement rank as kth, places each cell's replacement score at
+# its rank. The baselines table is written once and looked up afterwards.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+N_TEAMS = 32
+
+# Starters per team by position group (11 personnel offense; nickel defense)
+TOM_ROSTER_SLOTS = {"QB": 1, "RB": 1, "WR": 3, "TE": 1, "OL": 5}
+TDM_ROSTER_SLOTS = {"ED": 2, "DI": 2, "LB": 2, "CB": 3, "S": 2}
+
+
+def replacement_baselines(df, value_col, slots, group_col="PositionGroup", season_col="Season", n_teams=None):
+    """Season × group replacement scores from one partial sort over all cells."""
+    keep = df[group_col].isin(list(slots)) & df[value_col].notna()
+    d = df.loc[keep, [season_col, group_col, value_col] + (["Team"] if "Team" in df.columns else [])]
+    if d.empty:
+        return pd.DataFrame(columns=["Season", "PositionGroup", "Slots", "Teams", "Rank", "Players", "Baseline"])
+
+    cells = d[[season_col, group_col]].astype(str)
+    codes, uniq = pd.factorize(pd.MultiIndex.from_frame(cells))
+    n_cells = len(uniq)
+    sizes = np.bincount(codes, minlength=n_cells)
+
+    if n_teams is None and "Team" in d.columns:
+        teams = d.groupby(cells[season_col])["Team"].nunique()
+        teams_c = teams.reindex(uniq.get_level_values(0)).to_numpy()
+    else:
+        teams_c = np.full(n_cells, n_teams or N_TEAMS)
+    slots_c = np.array([slots[g] for g in uniq.get_level_values(1)])
+    rank = np.minimum(slots_c * teams_c, sizes - 1)          # 0-based, descending order
+
+    # scores negated so the best come first; +inf padding sorts after every player
+    order = np.argsort(codes, kind="stable")
+    start = np.r_[0, np.cumsum(sizes)[:-1]]
+    pos = np.arange(len(codes)) - start[codes[order]]
+    M = np.full((n_cells, sizes.max()), np.inf)
+    M[codes[order], pos] = -d[value_col].to_numpy(dtype=float)[order]
+    P = np.partition(M, np.unique(rank), axis=1)
+    baseline = -P[np.arange(n_cells), rank]
+
+    return pd.DataFrame({
+        "Season": uniq.get_level_values(0), "PositionGroup": uniq.get_level_values(1),
+        "Slots": slots_c, "Teams": teams_c, "Rank": rank + 1, "Players": sizes, "Baseline": baseline,
+    }).sort_values(["Season", "PositionGroup"], ignore_index=True)
+
+
+def value_over_replacement(df, baselines, value_col, group_col="PositionGroup", season_col="Season"):
+    """value − baseline by table lookup (NaN for groups/seasons without a baseline)."""
+    table = pd.MultiIndex.from_frame(baselines[["Season", "PositionGroup"]].astype(str))
+    keys = pd.MultiIndex.from_frame(df[[season_col, group_col]].astype(str))
+    idx = table.get_indexer(keys)
+    base = np.where(idx >= 0, baselines["Baseline"].to_numpy()[np.maximum(idx, 0)], np.nan)
+    return df[value_col].to_numpy(dtype=float) - base
+
+
+def update_baselines(path, new, side):
+    """Persist new baselines for one side, replacing the same seasons; returns the full table."""
+    new = new.assign(Side=side)
+    if os.path.exists(path):
+        old = pd.read_csv(path, dtype={"Season": str})
+        drop = (old["Side"] == side) & old["Season"].isin(new["Season"].astype(str))
+        new = pd.concat([old[~drop], new], ignore_index=True)
+    new.to_csv(path, index=False)
+    return new
+
+
+def load_baselines(path, side):
+    b = pd.read_csv(path, dtype={"Season": str})
+    return b[b["Side"] == side]
@@ -0,0 +1,43 @@
+# ======================================
+# Runtime: headless mode and what optional stages run
+# ======================================
+# The scoring path only needs numpy + pandas. Figures render off-screen in
+# the figure stage (figures.py), sklearn is imported inside the ridge fits
+# and the collinearity diagnostics run only when enabled, so a CSV refresh
+# from cron or a request handler skips all of them.
+#
+#   METRIC_HEADLESS=1     skip figures and diagnostics
+#   METRIC_FIGURES=1      (with headless) still render figures to PNG
+#   METRIC_DIAGNOSTICS=1  (with headless) still run VIF / correlation diagnostics
+#   METRIC_REPORT=1       also bundle all rendered figures into one HTML report
+#   METRIC_DVOA_PROXY=1   validate against the play-by-play DVOA proxy (dvoa_proxy.py)
+#   METRIC_STORE=0        don't upsert results into the SQLite score store (score_store.py)
+#   METRIC_SHARED=0       don't publish Part 3 model matrices for workers (shared_features.py)
+#   METRIC_OUT_OF_CORE=1  partition-streamed Part 3/4 team stages (out_of_core.py); Parts 1-2 stay in memory
+#   METRIC_MEMORY_MB=256  chunk memory cap for out-of-core runs
+#   METRIC_BACKEND=pandas eager Part 1 ingest (default auto: Polars when installed; frame_backend.py)
+#   METRIC_FLOAT32=1      also narrow non-model float columns to float32 (lossy; dtypes.py)
+#   METRIC_SEASON=2025    season the current inputs belong to (score store key)
+#   `--headless` on the command line is the same as METRIC_HEADLESS=1
+
+import os
+import sys
+
+
+def _flag(name, default):
+    val = os.environ.get(name)
+    return default if val is None else val.strip().lower() in ("1", "true", "yes", "on")
+
+
+HEADLESS    = _flag("METRIC_HEADLESS", False) or "--headless" in sys.argv
+FIGURES     = _flag("METRIC_FIGURES", not HEADLESS)
+DIAGNOSTICS = _flag("METRIC_DIAGNOSTICS", not HEADLESS)
+REPORT      = _flag("METRIC_REPORT", False)
+USE_DVOA_PROXY = _flag("METRIC_DVOA_PROXY", False)
+STORE       = _flag("METRIC_STORE", True)
+SHARED      = _flag("METRIC_SHARED", True)
+OUT_OF_CORE = _flag("METRIC_OUT_OF_CORE", False)
+MEMORY_MB   = int(os.environ.get("METRIC_MEMORY_MB", "512"))
+FRAME_BACKEND = os.environ.get("METRIC_BACKEND", "auto").strip().lower()
+FLOAT32     = _flag("METRIC_FLOAT32", False)
+SEASON      = int(os.environ.get("METRIC_SEASON", "2024"))
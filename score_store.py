@@ -0,0 +1,118 @@
+# ======================================
+# Score Store: one SQLite file for every season's scores
+# ======================================
+# The Part 4/5 scripts still write their CSVs; they also upsert the same rows
+# here keyed by Season (and Side), so career and multi-season questions are
+# an indexed query instead of a glob over overwritten files.
+#
+#   players       one row per player-season-side: domain scores, phase
+#                 components, adjusted totals, RoleMult, volumes
+#   teams         team aggregates per season and side (+ DVOA)
+#   coefficients  ridge weights used for scoring, per season and side
+#
+# Tables take whatever columns the scripts produce; new columns are added on
+# the fly. Writes replace the (Season, Side) slice in one transaction with a
+# bulk executemany; the database runs in WAL mode so readers (the leaderboard
+# service, notebooks) are never blocked by a refresh.
+
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from player_search import normalize_name
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+DB_PATH = BASE + "Metric_Scores.sqlite"
+
+INDEX_COLS = ["Season", "PlayerID", "Team", "Position", "Side"]
+
+
+def connect(path=DB_PATH):
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _ensure_table(con, table, df):
+    have = [r[1] for r in con.execute(f'PRAGMA table_info("{table}")')]
+    if not have:
+        cols = ", ".join(f'"{c}" {_sql_type(t)}' for c, t in df.dtypes.items())
+        con.execute(f'CREATE TABLE "{table}" ({cols})')
+    else:
+        for c, t in df.dtypes.items():
+            if c not in have:
+                con.execute(f'ALTER TABLE "{table}" ADD COLUMN "{c}" {_sql_type(t)}')
+    for c in INDEX_COLS:
+        if c in df.columns:
+            con.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{c}" ON "{table}" ("{c}")')
+
+
+def write_season(df, table, season, path=DB_PATH, **keys):
+    """Replace the rows for (season, **keys) in `table` with df; returns rows written.
+
+    keys (e.g. Side="off") become constant columns and part of the replaced
+    slice. A PlayerID (normalized name, stable across teams and seasons) is
+    added whenever there is a Player column.
+    """
+    df = df.copy()
+    df.insert(0, "Season", int(season))
+    for k, v in keys.items():
+        df.insert(1, k, v)
+    if "Player" in df.columns and "PlayerID" not in df.columns:
+        df.insert(len(keys) + 1, "PlayerID", df["Player"].map(normalize_name))
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    # sqlite3 binds plain Python scalars only
+    rows = df.astype(object).where(df.notna(), None).to_numpy()
+    rows = [tuple(v.item() if isinstance(v, np.generic) else v for v in r) for r in rows]
+    slice_cols = ["Season"] + list(keys)
+    cols = ", ".join(f'"{c}"' for c in df.columns)
+    marks = ", ".join("?" * df.shape[1])
+    with connect(path) as con:
+        _ensure_table(con, table, df)
+        con.execute(f'DELETE FROM "{table}" WHERE ' + " AND ".join(f'"{c}" = ?' for c in slice_cols),
+                    [int(season)] + list(keys.values()))
+        con.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({marks})', rows)
+    con.close()
+    return len(rows)
+
+
+def query(sql, params=(), path=DB_PATH):
+    """Run a read query and return a DataFrame."""
+    con = connect(path)
+    try:
+        return pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+
+def career(player, side="off", path=DB_PATH):
+    """All stored seasons for one player (any spelling normalize_name resolves)."""
+    return query('SELECT * FROM players WHERE PlayerID = ? AND Side = ? ORDER BY Season',
+                 (normalize_name(player), side), path)
+
+
+def season_history(table, side, exclude_season=None, path=DB_PATH):
+    """Every stored row for one side (minus one season, e.g. the one being rebuilt); None without a store."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return query(f'SELECT * FROM "{table}" WHERE Side = ? AND Season <> ?',
+                     (side, -1 if exclude_season is None else int(exclude_season)), path)
+    except pd.errors.DatabaseError:
+        return None
+
+
+def seasons(path=DB_PATH):
+    return query("SELECT DISTINCT Season, Side FROM players ORDER BY Season, Side", path=path)
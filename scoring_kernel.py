@@ -0,0 +1,256 @@
+# ======================================
+# Scoring Kernel: every TOM / TDM variant from one matrix product
+# ======================================
+# The per-player phase scores are all linear in the domain scores, so each
+# variant (core, adjusted, phase-weighted) is one column of a coefficient
+# matrix. Parts 4 and 5 of both chains score through here so the team
+# validation and the leaderboards always use identical numbers. decompose()
+# splits the final score of every player into exact additive terms with the
+# same coefficients, so explanations are a lookup rather than a recompute.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from winsorize import winsorize
+
+# ---------- TOM (offense) ----------
+TOM_DOMAINS   = ["AirScore", "RushScore", "ReceiveScore", "BlockScore"]
+TOM_PASS_NEED = ["AirScore", "ReceiveScore", "BlockScore"]
+TOM_RUSH_NEED = ["RushScore", "BlockScore"]
+
+PASS_WEIGHT = 1.50
+RUSH_WEIGHT = 1.00
+NUDGE_AIR   = 1.50   # radical intra-pass tilt
+NUDGE_REC   = 0.50
+
+# Position groups for within-group standardization (TOM Part 2)
+TOM_POS_MAP = {
+    "QB": "QB",
+    "HB": "RB", "RB": "RB", "FB": "RB",
+    "WR": "WR",
+    "TE": "TE",
+    "T": "OL", "G": "OL", "C": "OL", "OT": "OL", "OG": "OL", "OL": "OL",
+    "LT": "OL", "LG": "OL", "RT": "OL", "RG": "OL"
+}
+
+# QB premium (WAR-style, applied after the volume filter)
+TOM_ROLE_MULT = {"QB": 1.25}
+
+# ---------- TDM (defense) ----------
+TDM_DOMAINS   = ["PassRushScore", "CoverageScore", "RunDefenseScore"]
+TDM_PASS_NEED = ["PassRushScore", "CoverageScore"]
+TDM_RUSH_NEED = ["RunDefenseScore", "PassRushScore"]
+
+# Phase weighting
+PASS_W = 1.20
+RUSH_W = 0.80
+
+# Slight domain weights (the "_Adj" validation variant)
+PASSRUSH_W, COVERAGE_W, RUNDEF_W = 1.2, 0.9, 1.0
+
+TDM_POS_MAP = {
+    "EDGE": "ED", "ED": "ED", "DE": "ED", "OLB": "ED",
+    "DT": "DI", "IDL": "DI", "NT": "DI", "DI": "DI",
+    "ILB": "LB", "LB": "LB", "MLB": "LB",
+    "CB": "CB", "SCB": "CB",
+    "S": "S", "SS": "S", "FS": "S"
+}
+
+TDM_ROLE_MULT = {
+    # mild trims to trench dominance
+    "DI": 0.92,
+    "ED": 0.95,
+    # slight boost to back-seven
+    "LB": 1.03,
+    "S":  1.08,
+    "CB": 1.12,
+    # others neutral
+    "Other": 1.00
+}
+
+# Outlier control (winsorize.py, CLIP_LO/CLIP_HI quantiles): always on for the
+# calibrated TDM columns, opt-in for TOM so leaderboard tops stay untied
+TDM_CLIP_COLS = ["PassDef_TDM_Adj", "RushDef_TDM_Adj", "TotalTDM_Adj", "PassDef_TDM", "RushDef_TDM", "TotalTDM"]
+TOM_CLIP_COLS = ["PassTOM", "RushTOM", "TotalTOM", "PassTOM_Adjusted", "TotalTOM_Adjusted"]
+TOM_WINSORIZE = False
+
+# Decomposition: phase → (core column, column the phase weight multiplies) in the
+# coefficient matrix; Σ_phase weight · calibrated = the pre-role total
+TOM_PHASES = {"Pass": ("PassTOM", "PassTOM_Adjusted"), "Rush": ("RushTOM", "RushTOM")}
+TDM_PHASES = {"Pass": ("PassDef_TDM_core", "PassDef_TDM_core"), "Rush": ("RushDef_TDM_core", "RushDef_TDM_core")}
+
+
+# ---------- Coefficient helpers ----------
+def coef_map(wts, phase, needed):
+    """Ridge weights for one phase as {metric: coef}, zero-filled for missing metrics."""
+    sub = wts[(wts["Phase"] == phase) & (wts["Metric"].isin(needed))]
+    m = dict(zip(sub["Metric"], sub["Ridge"]))
+    for k in needed:
+        m.setdefault(k, 0.0)
+    return m
+
+
+def tom_coef_matrix(beta_pass, beta_rush, pass_weight=PASS_WEIGHT, rush_weight=RUSH_WEIGHT,
+                    nudge_air=NUDGE_AIR, nudge_rec=NUDGE_REC):
+    """Domain x variant coefficient matrix for every TOM column."""
+    C = pd.DataFrame(0.0, index=TOM_DOMAINS, columns=["PassTOM", "RushTOM"])
+    for d in TOM_PASS_NEED:
+        C.loc[d, "PassTOM"] = beta_pass[d]
+    for d in TOM_RUSH_NEED:
+        C.loc[d, "RushTOM"] = beta_rush[d]
+
+    nudge = pd.Series({"AirScore": nudge_air, "ReceiveScore": nudge_rec, "BlockScore": 1.0})
+    C["TotalTOM"] = C["PassTOM"] + C["RushTOM"]
+    C["PassTOM_Adjusted"] = C["PassTOM"] * nudge.reindex(C.index, fill_value=0.0)
+    C["TotalTOM_Adjusted"] = pass_weight * C["PassTOM_Adjusted"] + rush_weight * C["RushTOM"]
+    C.attrs["phase_weight"] = {"Pass": pass_weight, "Rush": rush_weight}
+    return C
+
+
+def tdm_coef_matrix(beta_pass, beta_rush, pass_w=PASS_W, rush_w=RUSH_W,
+                    passrush_w=PASSRUSH_W, coverage_w=COVERAGE_W, rundef_w=RUNDEF_W):
+    """Domain x variant coefficient matrix for every TDM column."""
+    C = pd.DataFrame(0.0, index=TDM_DOMAINS, columns=["PassDef_TDM_core", "RushDef_TDM_core"])
+    for d in TDM_PASS_NEED:
+        C.loc[d, "PassDef_TDM_core"] = beta_pass[d]
+    for d in TDM_RUSH_NEED:
+        C.loc[d, "RushDef_TDM_core"] = beta_rush[d]
+    C["TotalTDM_core"] = C["PassDef_TDM_core"] + C["RushDef_TDM_core"]
+
+    dom_w = pd.Series({"PassRushScore": passrush_w, "CoverageScore": coverage_w,
+                       "RunDefenseScore": rundef_w})
+    C["PassDef_TDM_Adj"] = C["PassDef_TDM_core"] * dom_w
+    C["RushDef_TDM_Adj"] = C["RushDef_TDM_core"] * dom_w
+    C["TotalTDM_Adj"] = C["PassDef_TDM_Adj"] + C["RushDef_TDM_Adj"]
+
+    C["PassDef_TDM"] = pass_w * C["PassDef_TDM_core"]
+    C["RushDef_TDM"] = rush_w * C["RushDef_TDM_core"]
+    C["TotalTDM"] = C["PassDef_TDM"] + C["RushDef_TDM"]
+    C.attrs["phase_weight"] = {"Pass": pass_w, "Rush": rush_w}
+    return C
+
+
+# ---------- Kernel ----------
+def apply_kernel(df, coef):
+    """Write every variant column of `coef` onto df with a single matrix product."""
+    for c in coef.index:
+        if c not in df.columns:
+            df[c] = 0.0
+    X = df[list(coef.index)].to_numpy(dtype=float)
+    df[list(coef.columns)] = X @ coef.to_numpy(dtype=float)
+    return df
+
+
+# ---------- Decomposition ----------
+def term_matrix(C, phases):
+    """Domain × term coefficients ("<phase>:<domain>:Core" / ":Calibration") summing to the pre-role total."""
+    w = C.attrs["phase_weight"]
+    names, cols = [], []
+    for ph, (core, cal) in phases.items():
+        core_c, cal_c = C[core].to_numpy(), w[ph] * C[cal].to_numpy()
+        for i, d in enumerate(C.index):
+            if core_c[i] == 0 and cal_c[i] == 0:
+                continue
+            for kind, coef in (("Core", core_c[i]), ("Calibration", cal_c[i] - core_c[i])):
+                col = np.zeros(len(C))
+                col[i] = coef
+                names.append(f"{ph}:{d}:{kind}")
+                cols.append(col)
+    return pd.DataFrame(np.column_stack(cols), index=C.index, columns=names)
+
+
+def decompose(df, C, phases, final_col, features=None):
+    """Player × term contributions to df[final_col], every level adding up exactly.
+
+    Returns (T, terms, levels):
+      "phase"   terms: raw ridge weight × domain score per phase (Core) and what
+                       nudges / phase weights add on top (Calibration)
+      "feature" terms: each domain's total coefficient × a feature's share of the
+                       domain score (from Part 2's *_Feature_Contributions.csv)
+      "shared"  terms: Winsorization (clip residual) and RoleMult ((m − 1) · base)
+    so phase + shared and feature + shared each sum to final_col.
+    """
+    K = term_matrix(C, phases)
+    S = df[list(C.index)].to_numpy(dtype=float)
+    T_phase = S @ K.to_numpy()
+    final = df[final_col].to_numpy(dtype=float)
+    mult = df["RoleMult"].to_numpy(dtype=float) if "RoleMult" in df.columns else np.ones(len(df))
+    base = final / mult
+    shared = np.column_stack([base - T_phase.sum(axis=1), final - base])
+
+    blocks, terms, levels = [T_phase], list(K.columns), ["phase"] * K.shape[1]
+    if features is not None:
+        dom_coef = K.sum(axis=1)
+        fcols = [c for c in features.columns if c.split(":")[0] in dom_coef.index]
+        scale = dom_coef.reindex([c.split(":")[0] for c in fcols]).to_numpy()
+        blocks.append(features[fcols].fillna(0).to_numpy(dtype=float) * scale)
+        terms += fcols
+        levels += ["feature"] * len(fcols)
+    blocks.append(shared)
+    terms += ["Winsorization", "RoleMult"]
+    levels += ["shared"] * 2
+    return np.hstack(blocks), terms, levels
+
+
+def feature_contributions(path, df):
+    """Part 2 feature shares for df's rows (row-aligned by index with the base file), or None."""
+    if not os.path.exists(path):
+        return None
+    feats = pd.read_csv(path)
+    if len(feats) <= df.index.max() or not (feats.loc[df.index, "Player"].to_numpy() == df["Player"].to_numpy()).all():
+        print(f"(Info) {os.path.basename(path)} does not line up with the scored rows; feature terms skipped")
+        return None
+    return feats.loc[df.index]
+
+
+def save_decomposition(path, df, T, terms, levels, id_cols=("Player", "Team", "Position")):
+    ids = [c for c in id_cols if c in df.columns]
+    np.savez_compressed(path, T=T, terms=np.array(terms, dtype=str), levels=np.array(levels, dtype=str),
+                        ids=df[ids].astype(str).to_numpy().astype(str), id_cols=np.array(ids, dtype=str))
+
+
+def load_decomposition(path):
+    """(frame of ids + one column per term, Series term → level)."""
+    z = np.load(path, allow_pickle=False)
+    frame = pd.DataFrame(z["ids"], columns=z["id_cols"].tolist())
+    frame = pd.concat([frame, pd.DataFrame(z["T"], columns=z["terms"].tolist())], axis=1)
+    return frame, pd.Series(z["levels"], index=z["terms"].tolist())
+
+
+def role_calibrate(df, total_col, out_col, role_mult, group_col):
+    """Post-hoc role multiplier on the final total (not on the phase components)."""
+    df["RoleMult"] = df[group_col].map(role_mult).fillna(1.00)
+    df[out_col] = df[total_col] * df["RoleMult"]
+    return df
+
+
+def score_tom(uvm, beta_pass, beta_rush, clip=TOM_WINSORIZE, sketch=None, fold=True, **calibration):
+    """All TOM variants onto uvm (optionally winsorized); returns the coefficient matrix used.
+
+    fold=False clips at the sketch's bounds without adding these rows to it.
+    """
+    C = tom_coef_matrix(beta_pass, beta_rush, **calibration)
+    apply_kernel(uvm, C)
+    if clip:
+        if sketch is not None and fold:
+            sketch.update(uvm, TOM_CLIP_COLS)
+        winsorize(uvm, TOM_CLIP_COLS, sketch=sketch)
+    return C
+
+
+def score_tdm(tdm, beta_pass, beta_rush, sketch=None, fold=True, **calibration):
+    """All TDM variants onto tdm, winsorized and role-calibrated; returns the coefficient matrix."""
+    C = tdm_coef_matrix(beta_pass, beta_rush, **calibration)
+    apply_kernel(tdm, C)
+
+    # Outlier control on the calibrated variants (core stays raw). A sketch
+    # (earlier seasons) gets this season folded in and supplies the bounds.
+    if sketch is not None and fold:
+        sketch.update(tdm, TDM_CLIP_COLS)
+    winsorize(tdm, TDM_CLIP_COLS, sketch=sketch)
+
+    tdm["PositionGroup"] = tdm["Position"].map(TDM_POS_MAP).fillna("Other")
+    role_calibrate(tdm, "TotalTDM", "TotalTDM_Adjusted", TDM_ROLE_MULT, "PositionGroup")
+    return C
@@ -0,0 +1,162 @@
+# ======================================
+# Shared Features: publish model matrices once, attach zero-copy in workers
+# ======================================
+# Part 3 of each chain publishes its numeric inputs (player domain-score
+# matrix, team codes, team-level design, DVOA targets) under a name. Worker
+# processes for bootstrap / CV / tuning / sensitivity runs attach by that
+# name and get read-only numpy views onto the same memory, so N workers cost
+# one copy and nothing is pickled but a small manifest.
+#
+#   backend "npy"  one .npy per array under SHARED_DIR/<name>/, opened with
+#                  mmap_mode="r"; outlives the publishing process (pipeline
+#                  default — Part 3 exits before any workers start)
+#   backend "shm"  named multiprocessing.shared_memory segments; lives while
+#                  the publisher does (parent process that starts the pool)
+#
+# Strings (team, column names) are stored as fixed-width unicode arrays, and
+# label columns as int32 codes + labels, so everything stays a plain ndarray.
+
+import json
+import os
+import re
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+BASE = "/Users/anokhpalakurthi/Downloads/"
+SHARED_DIR = BASE + "Shared_Features/"
+BACKEND = "npy"
+
+_OWNED = {}       # name → [SharedMemory] kept alive by the publisher
+_ATTACHED = {}    # name → [SharedMemory] kept open by an attached worker
+FEATURES = None   # set in each pool worker by _init_worker
+
+
+def frame_arrays(df, numeric_cols, label_cols=(), prefix=""):
+    """{prefix+"X", prefix+"columns", prefix+<label>, prefix+<label>_labels} from a DataFrame."""
+    out = {prefix + "X": df[list(numeric_cols)].to_numpy(dtype=np.float64),
+           prefix + "columns": np.array(list(numeric_cols), dtype=str)}
+    for c in label_cols:
+        codes, labels = pd.factorize(df[c].astype(str))
+        out[prefix + c] = codes.astype(np.int32)
+        out[prefix + c + "_labels"] = np.asarray(labels, dtype=str)
+    return out
+
+
+def _open(seg, **kw):
+    # workers must not hand segments to the resource tracker (3.13+: track=False)
+    try:
+        return SharedMemory(name=seg, track=False, **kw)
+    except TypeError:
+        return SharedMemory(name=seg, **kw)
+
+
+def _segment(name, key):
+    return re.sub(r"[^A-Za-z0-9_]", "_", f"metric_{name}_{key}")
+
+
+def publish(name, arrays, backend=BACKEND, root=SHARED_DIR):
+    """Write arrays once under `name`; returns the (small, picklable) manifest."""
+    folder = os.path.join(root, name)
+    os.makedirs(folder, exist_ok=True)
+    manifest = {"name": name, "backend": backend, "arrays": {}}
+    if backend == "shm":
+        release(name)
+        _OWNED[name] = []
+
+    for key, a in arrays.items():
+        a = np.ascontiguousarray(a)
+        entry = {"dtype": a.dtype.str, "shape": list(a.shape)}
+        if backend == "npy":
+            entry["file"] = os.path.join(folder, key + ".npy")
+            np.save(entry["file"], a)
+        else:
+            seg = _segment(name, key)
+            try:
+                _open(seg).unlink()      # stale segment from a crashed run
+            except FileNotFoundError:
+                pass
+            shm = SharedMemory(name=seg, create=True, size=max(a.nbytes, 1))
+            np.ndarray(a.shape, a.dtype, buffer=shm.buf)[...] = a
+            _OWNED[name].append(shm)
+            entry["shm"] = seg
+        manifest["arrays"][key] = entry
+
+    with open(os.path.join(folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def load_manifest(name, root=SHARED_DIR):
+    with open(os.path.join(root, name, "manifest.json")) as f:
+        return json.load(f)
+
+
+def attach(manifest, root=SHARED_DIR):
+    """Read-only views of a published set (manifest dict or its name); no copies."""
+    if isinstance(manifest, str):
+        manifest = load_manifest(manifest, root)
+    out = {}
+    for key, e in manifest["arrays"].items():
+        if "file" in e:
+            out[key] = np.load(e["file"], mmap_mode="r")
+        else:
+            shm = _open(e["shm"])
+            _ATTACHED.setdefault(manifest["name"], []).append(shm)
+            a = np.ndarray(tuple(e["shape"]), np.dtype(e["dtype"]), buffer=shm.buf)
+            a.flags.writeable = False
+            out[key] = a
+    return out
+
+
+def release(name):
+    """Close (and, for the publisher, unlink) the shared-memory segments of `name`."""
+    for shm in _ATTACHED.pop(name, []):
+        shm.close()
+    for shm in _OWNED.pop(name, []):
+        shm.close()
+        shm.unlink()
+
+
+def _init_worker(manifest):
+    global FEATURES
+    FEATURES = attach(manifest)
+
+
+def _call(args):
+    fn, task = args
+    return fn(FEATURES, task)
+
+
+def run_parallel(fn, tasks, manifest, processes=None, chunksize=1):
+    """[fn(features, task) for task in tasks] across a pool attached once per worker.
+
+    fn must be a module-level function; only fn, the task and the manifest
+    are pickled, never the matrices.
+    """
+    if isinstance(manifest, str):
+        manifest = load_manifest(manifest)
+    with Pool(processes, initializer=_init_worker, initargs=(manifest,)) as pool:
+        return pool.map(_call, [(fn, t) for t in tasks], chunksize=chunksize)
+
+
+def _bootstrap_fit(features, seed, alpha=1.0):
+    """Team ridge (standardized, first target) on one bootstrap resample."""
+    X, y = features["team_X"], features["team_y"][:, 0]
+    idx = np.random.default_rng(seed).integers(0, len(X), len(X))
+    Z = (X[idx] - X[idx].mean(0)) / np.where(X[idx].std(0) > 0, X[idx].std(0), 1.0)
+    return np.linalg.solve(Z.T @ Z + alpha * np.eye(Z.shape[1]), Z.T @ (y[idx] - y[idx].mean()))
+
+
+if __name__ == "__main__":
+    for name in ("tom", "tdm"):
+        if not os.path.exists(os.path.join(SHARED_DIR, name, "manifest.json")):
+            print(f"(Info) {name}: nothing published yet (run Part 3)")
+            continue
+        feats = attach(name)
+        coefs = np.array(run_parallel(_bootstrap_fit, range(200), name, chunksize=20))
+        lo, hi = np.percentile(coefs, [5, 95], axis=0)
+        print(f"📊 {name}: 200 bootstrap team ridges across workers (90% bands)")
+        print(pd.DataFrame({"Metric": feats["team_columns"], "P05": lo, "P95": hi}).round(3).to_string(index=False))
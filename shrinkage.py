@@ -0,0 +1,141 @@
+# ======================================
+# Shrinkage: empirical-Bayes rates for low-volume players
+# ======================================
+# Model per rate column and position group g:
+#     observed r_i = θ_i + e_i,   Var(e_i) = σ² / n_i     (n_i = player volume)
+#     θ_i ~ (μ_g, τ²_g)
+# Method of moments from the two group variances:
+#     unweighted  S_u = Σ (r_i − μ)² / k          ≈ τ² + σ² · mean(1/n)
+#     n-weighted  S_w = Σ n_i (r_i − μ)² / Σ n_i  ≈ τ² + σ² · k / Σ n
+# which solve for σ² and τ² directly. The posterior mean
+#     θ̂_i = B_i μ_g + (1 − B_i) r_i,   B_i = (σ²/n_i) / (σ²/n_i + τ²)
+# pulls a 3-target coverage line most of the way to the position mean and
+# leaves a 90-target one nearly untouched. All rate columns and groups are
+# fit together with sparse group-indicator products (as in standardize.py).
+
+import numpy as np
+import pandas as pd
+
+from standardize import LEAGUE, MIN_GROUP
+
+TAU2_FLOOR = 0.05    # τ² ≥ 5% of the raw between-player variance
+
+# Per domain table: rate column → volume column(s) it is a rate over
+RATE_SPECS = {
+    "passing":   {"CompletionPercent": "Attempts", "YardsPerAttempt": "Attempts",
+                  "BTT_Rate": "Dropbacks", "TWP_Rate": "Dropbacks",
+                  "PressureToSackRate": "PressuresFaced"},
+    "rushing":   {"YardsPerAttempt": "RushAttempts", "YAC_PerAttempt": "RushAttempts",
+                  "ExplosiveRunRate": "RushAttempts"},
+    "receiving": {"CatchPercent": "Targets", "DropRate": "Targets"},
+    "blocking":  {"PassBlockEfficiency": "PassBlockSnaps", "PressureRateAllowed": "PassBlockSnaps",
+                  "SackRateAllowed": "PassBlockSnaps", "PenaltyRate_Block": "TotalBlockSnaps"},
+    "passrush":  {"PressureRate": "PassRushSnaps", "WinRate": "PassRushSnaps", "PRP": "PassRushSnaps"},
+    "coverage":  {"YardsPerTarget": "Targets", "PasserRatingAllowed": "Targets"},
+    "rundef":    {"StopPercent": "RunDefenseSnaps", "MissedTackleRate": ("Tackles", "MissedTackles")},
+}
+
+
+def _volumes(df, spec):
+    cols = [spec] if isinstance(spec, str) else list(spec)
+    return df[cols].apply(pd.to_numeric, errors="coerce").fillna(0).sum(axis=1).to_numpy(dtype=float)
+
+
+def _fit(codes, n_groups, R, N, ok):
+    """Per-group K, volume, μ, σ², τ² for every rate column from indicator products."""
+    import scipy.sparse as sp      # fitting only (Part 2); scoring imports of this module skip scipy
+    G = sp.csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))), shape=(n_groups, len(codes)))
+    Nw = np.where(ok, N, 0.0)
+    k = G @ ok.astype(float)
+    sn = G @ Nw
+    kk, ss = np.where(k > 0, k, 1), np.where(sn > 0, sn, 1)
+    mu = (G @ (Nw * np.where(ok, R, 0.0))) / ss
+    dev2 = np.where(ok, (R - mu[codes]) ** 2, 0.0)
+    s_u = (G @ dev2) / kk
+    s_w = (G @ (Nw * dev2)) / ss
+    denom = (G @ np.where(ok, 1.0 / np.where(N > 0, N, 1), 0.0)) / kk - k / ss
+    sigma2 = np.where(denom > 1e-12, np.maximum(s_u - s_w, 0.0) / np.where(denom > 1e-12, denom, 1), 0.0)
+    # a noisy MoM τ² of ~0 would collapse the whole group onto μ; keep a floor
+    tau2 = np.maximum(s_w - sigma2 * k / ss, np.maximum(TAU2_FLOOR * s_u, 1e-12))
+    return {"K": k, "Volume": sn, "Mu": mu, "Sigma2": sigma2, "Tau2": tau2}
+
+
+def _long(names, rates, fit):
+    out = pd.DataFrame({"Group": np.repeat(np.asarray(names, dtype=object), len(rates)),
+                        "Rate": np.tile(rates, len(names))})
+    for c, v in fit.items():
+        out[c] = v.ravel()
+    out["K"] = out["K"].astype(int)
+    return out
+
+
+def eb_priors(df, rate_vols, group_col=None, min_group=MIN_GROUP):
+    """Long table Group × Rate → K, Volume, Mu, Sigma2, Tau2 (thin groups use the league row)."""
+    rates = [c for c in rate_vols if c in df.columns]
+    R = df[rates].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    N = np.column_stack([_volumes(df, rate_vols[c]) for c in rates])
+    ok = ~np.isnan(R) & (N > 0)
+
+    league = _fit(np.zeros(len(df), dtype=int), 1, R, N, ok)
+    frames = [_long([LEAGUE], rates, league)]
+    if group_col:
+        codes, uniq = pd.factorize(df[group_col].astype(str))
+        grp = _fit(codes, len(uniq), R, N, ok)
+        thin = grp["K"] < min_group
+        for c in ["Mu", "Sigma2", "Tau2"]:
+            grp[c] = np.where(thin, league[c], grp[c])
+        g = _long(list(uniq), rates, grp)
+        g["Source"] = np.where(thin.ravel(), "league", "group")
+        frames.insert(0, g)
+    frames[-1]["Source"] = "league"
+    return pd.concat(frames, ignore_index=True)
+
+
+def shrink_rates(df, rate_vols, group_col=None, priors=None, min_group=MIN_GROUP):
+    """Copy of df with each rate replaced by its posterior mean; returns (df, priors)."""
+    rate_vols = {c: v for c, v in rate_vols.items() if c in df.columns}
+    if not rate_vols:
+        return df, pd.DataFrame()
+    if priors is None:
+        priors = eb_priors(df, rate_vols, group_col, min_group)
+    rates = list(rate_vols)
+    piv = {c: priors.pivot(index="Group", columns="Rate", values=c).reindex(columns=rates)
+           for c in ["Mu", "Sigma2", "Tau2"]}
+    groups = df[group_col].astype(str) if group_col else pd.Series(LEAGUE, index=df.index)
+    idx = piv["Mu"].index.get_indexer(groups)
+    idx[idx < 0] = piv["Mu"].index.get_loc(LEAGUE)
+    mu, s2, t2 = (piv[c].to_numpy()[idx] for c in ["Mu", "Sigma2", "Tau2"])
+
+    R = df[rates].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    N = np.column_stack([_volumes(df, rate_vols[c]) for c in rates])
+    noise = s2 / np.where(N > 0, N, 1)
+    B = np.where(N > 0, noise / (noise + t2), 1.0)
+    post = np.where(np.isnan(R), mu, B * mu + (1 - B) * np.nan_to_num(R))
+    df = df.copy()
+    df[rates] = post
+    return df, priors
+
+
+def rates_from_plays(plays, key_cols, value_cols):
+    """Per-player volume (play count) and mean of each value column from play-level rows."""
+    g = plays.groupby(key_cols, sort=False, dropna=False).ngroup().to_numpy()
+    n_g = g.max() + 1 if len(g) else 0
+    out = plays[key_cols].drop_duplicates().reset_index(drop=True)
+    cnt = np.bincount(g, minlength=n_g)
+    out["Plays"] = cnt
+    for c in value_cols:
+        v = pd.to_numeric(plays[c], errors="coerce").to_numpy(dtype=float)
+        ok = ~np.isnan(v)
+        out[c] = np.bincount(g, weights=np.where(ok, v, 0), minlength=n_g) / np.maximum(
+            np.bincount(g, weights=ok, minlength=n_g), 1)
+    return out
+
+
+def shrink_domain(df, domain, pos_map):
+    """shrink_rates for one Part 2 domain table, grouped by mapped position; returns (df, priors)."""
+    df = df.assign(PositionGroup=df["Position"].map(pos_map).fillna("Other"))
+    out, pri = shrink_rates(df, RATE_SPECS[domain], "PositionGroup")
+    if pri.empty:
+        return df.drop(columns="PositionGroup"), pri
+    print(f"✅ EB-shrunk {domain} rates: {pri['Rate'].unique().tolist()}")
+    return out.drop(columns="PositionGroup"), pri.assign(Domain=domain)
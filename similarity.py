@@ -0,0 +1,136 @@
+# ======================================
+# Similarity: nearest-neighbour comparables over domain-score vectors
+# ======================================
+# Every player-season is a point in domain-score space (offense: Air / Rush /
+# Receive / Block; defense: PassRush / Coverage / RunDefense), optionally
+# extended with standardized raw features. Columns are scaled once with the
+# build-time mean/SD, which are kept so incremental adds land on the same scale.
+#
+# Low-dimensional vectors go into a KD-tree (scipy cKDTree); wide ones use
+# exact blocked distance products (|q|² + |x|² − 2·Q·Xᵀ, one block of queries
+# at a time). Both answer a k-NN query in well under a millisecond per player.
+# New weeks or seasons are add()-ed: rows with the same key are replaced and
+# the tree is rebuilt, which is O(n log n) and cheap at league scale.
+
+import numpy as np
+import pandas as pd
+
+from player_search import normalize_name
+
+OFF_VECTOR = ["AirScore", "RushScore", "ReceiveScore", "BlockScore"]
+DEF_VECTOR = ["PassRushScore", "CoverageScore", "RunDefenseScore"]
+
+KEY_COLS = ["PlayerID", "Season", "Team"]
+TREE_MAX_DIM = 10       # above this, blocked products beat the tree
+BLOCK = 2048
+
+
+class SimilarityIndex:
+    """Exact k-NN over scaled feature vectors, keyed by player-season."""
+
+    def __init__(self, df, feature_cols, label_cols=("Player", "Team", "Position", "Season")):
+        self.features = list(feature_cols)
+        self.label_cols = [c for c in label_cols if c in df.columns]
+        X = df[self.features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        self.mean = np.nanmean(X, axis=0)
+        sd = np.nanstd(X, axis=0)
+        self.sd = np.where((sd > 0) & np.isfinite(sd), sd, 1.0)
+        self.meta = pd.DataFrame(index=range(0))
+        self.X = np.empty((0, len(self.features)), dtype=np.float32)
+        self.add(df)
+
+    # ---------- Building ----------
+    def _scale(self, df):
+        X = df[self.features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        return np.nan_to_num((X - self.mean) / self.sd).astype(np.float32)
+
+    @staticmethod
+    def _keys(df):
+        out = pd.DataFrame({"PlayerID": (df["PlayerID"] if "PlayerID" in df.columns
+                                         else df["Player"].map(normalize_name))})
+        for c in KEY_COLS[1:]:
+            out[c] = df[c].astype(str).to_numpy() if c in df.columns else ""
+        return out.reset_index(drop=True)
+
+    def add(self, df):
+        """Insert new player-seasons (same key replaces the old row) and rebuild."""
+        keys = self._keys(df)
+        meta = pd.concat([keys, df[self.label_cols].reset_index(drop=True)], axis=1)
+        meta = meta.loc[:, ~meta.columns.duplicated()]
+        old = pd.MultiIndex.from_frame(self.meta[KEY_COLS]) if len(self.meta) else None
+        keep = (~old.isin(pd.MultiIndex.from_frame(keys[KEY_COLS]))) if old is not None else np.zeros(0, bool)
+        self.meta = pd.concat([self.meta[keep], meta], ignore_index=True)
+        self.X = np.vstack([self.X[keep], self._scale(df)])
+        return self._rebuild()
+
+    def _rebuild(self):
+        from scipy.spatial import cKDTree
+        self.sq = np.einsum("ij,ij->i", self.X, self.X, dtype=np.float64)
+        self.tree = cKDTree(self.X) if len(self.features) <= TREE_MAX_DIM and len(self.X) else None
+        self._by_id = pd.Series(np.arange(len(self.meta))).groupby(self.meta["PlayerID"].to_numpy()).agg(list)
+        return self
+
+    # ---------- Queries ----------
+    def _knn(self, Q, k):
+        k = min(k, len(self.X))
+        if self.tree is not None:
+            d, idx = self.tree.query(Q, k=k)
+            return d.reshape(len(Q), k), idx.reshape(len(Q), k)
+        dist, idx = [], []
+        for s in range(0, len(Q), BLOCK):
+            q = Q[s:s + BLOCK].astype(np.float64)
+            d2 = (np.einsum("ij,ij->i", q, q)[:, None] + self.sq[None, :] - 2.0 * q @ self.X.T.astype(np.float64))
+            part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            order = np.take_along_axis(d2, part, axis=1).argsort(axis=1)
+            part = np.take_along_axis(part, order, axis=1)
+            idx.append(part)
+            dist.append(np.sqrt(np.maximum(np.take_along_axis(d2, part, axis=1), 0)))
+        return np.vstack(dist), np.vstack(idx)
+
+    def rows_for(self, player, season=None):
+        """Index rows for a player name (any spelling normalize_name resolves)."""
+        rows = self._by_id.get(normalize_name(player), [])
+        if season is not None:
+            rows = [r for r in rows if self.meta.at[r, "Season"] == str(season)]
+        return rows
+
+    def similar(self, player, k=10, season=None, other_players_only=True):
+        """k most similar player-seasons to a player's latest (or given) season."""
+        rows = self.rows_for(player, season)
+        if not rows:
+            return pd.DataFrame(columns=list(self.meta.columns) + ["Distance"])
+        row = max(rows, key=lambda r: self.meta.at[r, "Season"])
+        pid = self.meta.at[row, "PlayerID"]
+        extra = len(self._by_id.get(pid, [])) if other_players_only else 1
+        dist, idx = self._knn(self.X[[row]], k + extra)
+        out = self.meta.iloc[idx[0]].assign(Distance=dist[0])
+        out = out[out["PlayerID"] != pid] if other_players_only else out.drop(index=row, errors="ignore")
+        return out.head(k).drop(columns="PlayerID").reset_index(drop=True)
+
+    def knn_all(self, k=5):
+        """(distances, indices) of every row's k nearest other rows."""
+        dist, idx = self._knn(self.X, k + 1)
+        return dist[:, 1:], idx[:, 1:]
+
+    # ---------- Persistence ----------
+    def save(self, path):
+        np.savez_compressed(path, X=self.X, mean=self.mean, sd=self.sd,
+                            features=np.array(self.features), label_cols=np.array(self.label_cols),
+                            meta=self.meta.to_numpy().astype(str), meta_cols=np.array(self.meta.columns, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path, allow_pickle=False)
+        self = cls.__new__(cls)
+        self.features, self.label_cols = z["features"].tolist(), z["label_cols"].tolist()
+        self.mean, self.sd = z["mean"], z["sd"]
+        self.meta = pd.DataFrame(z["meta"], columns=z["meta_cols"].tolist())
+        self.X = z["X"]
+        return self._rebuild()
+
+
+def build_index(current, feature_cols, history=None):
+    """Index over history (e.g. every stored season) plus the current leaderboard rows."""
+    if history is not None and len(history):
+        return SimilarityIndex(history, feature_cols).add(current)
+    return SimilarityIndex(current, feature_cols)
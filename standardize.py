@@ -0,0 +1,119 @@
+# ======================================
+# Standardization: z-scores without sklearn
+# ======================================
+# zscore() is the league-wide transform. group_zscore() standardizes every
+# feature within position groups in one pass: a sparse group-indicator matrix
+# turns (weighted) counts, sums and sums of squares for all columns into three
+# matrix products, however many groups or seasons are stacked. Groups thinner
+# than MIN_GROUP fall back to the league-wide stats. The stats table it
+# returns is what online scoring reloads to standardize new rows identically.
+# composite_parts() splits an equal-weight composite back into its features.
+
+import numpy as np
+import pandas as pd
+
+MIN_GROUP = 15          # players needed before a group gets its own mean/SD
+LEAGUE = "__league__"   # stats row used for thin or unseen groups
+
+
+def zscore(X):
+    """Column z-scores matching StandardScaler (ddof=0; NaNs ignored and kept; constant columns → 0)."""
+    X = np.asarray(X, dtype=float)
+    mu = np.nanmean(X, axis=0)
+    sd = np.nanstd(X, axis=0)
+    sd[(sd == 0) | np.isnan(sd)] = 1.0
+    return (X - mu) / sd
+
+
+def group_stats(df, cols, group_col=None, weight_col=None, min_group=MIN_GROUP):
+    """Long table of Group × Feature → N, Weight, Mean, Std (ddof=0), Source."""
+    import scipy.sparse as sp      # fitting only (Part 2); apply/load paths skip scipy
+    X = df[cols].to_numpy(dtype=float)
+    ok = ~np.isnan(X)
+    w = (df[weight_col].fillna(0).to_numpy(dtype=float) if weight_col else np.ones(len(df)))
+    groups = (df[group_col].astype(str).to_numpy() if group_col else np.full(len(df), LEAGUE))
+    codes, uniq = pd.factorize(groups)
+
+    # centre on the league mean first so the sum-of-squares step doesn't cancel
+    W = ok * w[:, None]
+    league_mu = (np.where(ok, X, 0) * W).sum(axis=0) / np.maximum(W.sum(axis=0), 1e-12)
+    Xc = np.where(ok, X - league_mu, 0.0)
+
+    G = sp.csr_matrix((np.ones(len(df)), (codes, np.arange(len(df)))), shape=(len(uniq), len(df)))
+    n = G @ ok.astype(float)
+    sw = G @ W
+    s1 = G @ (W * Xc)
+    s2 = G @ (W * Xc ** 2)
+    sw_all, s1_all, s2_all = sw.sum(0), s1.sum(0), s2.sum(0)
+
+    def _mean_sd(sw, s1, s2):
+        m = s1 / np.where(sw > 0, sw, 1)
+        return m + league_mu, np.sqrt(np.maximum(s2 / np.where(sw > 0, sw, 1) - m ** 2, 0.0))
+
+    mean, sd = _mean_sd(sw, s1, s2)
+    lmean, lsd = _mean_sd(sw_all, s1_all, s2_all)
+    thin = (n < min_group) | (sw <= 0)
+    mean = np.where(thin, lmean, mean)
+    sd = np.where(thin, lsd, sd)
+
+    out = pd.DataFrame({
+        "Group": np.repeat(uniq.astype(str), len(cols)),
+        "Feature": np.tile(cols, len(uniq)),
+        "N": n.ravel().astype(int), "Weight": sw.ravel(),
+        "Mean": mean.ravel(), "Std": sd.ravel(),
+        "Source": np.where(thin.ravel(), "league", "group"),
+    })
+    league = pd.DataFrame({"Group": LEAGUE, "Feature": cols, "N": n.sum(0).astype(int), "Weight": sw_all,
+                           "Mean": lmean, "Std": lsd, "Source": "league"})
+    return pd.concat([out, league], ignore_index=True) if group_col else league
+
+
+def apply_group_stats(df, cols, stats, group_col=None, domain=None):
+    """Z-scores of df[cols] from a stats table; unseen groups use the league row.
+
+    A table saved for several domains (Domain column) needs `domain`: the same
+    feature can be standardized in more than one domain.
+    """
+    if domain is not None:
+        stats = stats[stats["Domain"] == domain]
+    elif "Domain" in stats.columns and stats["Domain"].nunique() > 1:
+        raise ValueError("stats cover several domains; pass domain=")
+    mean = stats.pivot(index="Group", columns="Feature", values="Mean").reindex(columns=cols)
+    sd = stats.pivot(index="Group", columns="Feature", values="Std").reindex(columns=cols)
+    sd = sd.where(sd > 0, 1.0).fillna(1.0)
+    groups = df[group_col].astype(str) if group_col else pd.Series(LEAGUE, index=df.index)
+    idx = mean.index.get_indexer(groups)
+    idx[idx < 0] = mean.index.get_loc(LEAGUE)
+    X = df[cols].to_numpy(dtype=float)
+    return (X - mean.to_numpy()[idx]) / sd.to_numpy()[idx]
+
+
+def group_zscore(df, cols, group_col=None, weight_col=None, min_group=MIN_GROUP, stats=None, domain=None):
+    """Within-group (optionally weight-based) z-scores for all cols; returns (Z, stats).
+
+    Pass `stats` from a previous run (or load_group_stats) to reuse persisted
+    group means/SDs instead of refitting; `domain` picks one domain's rows.
+    """
+    if stats is None:
+        stats = group_stats(df, cols, group_col, weight_col, min_group)
+    return apply_group_stats(df, cols, stats, group_col, domain), stats
+
+
+def composite_parts(df, cols, prefix):
+    """Per-feature shares of the NaN-skipping row mean of cols, named "<prefix>:<col>".
+
+    The shares add up exactly to df[cols].mean(axis=1) (NaN where every
+    feature is NaN), so a composite score can be traced back to its features.
+    """
+    X = df[cols].to_numpy(dtype=float)
+    n = (~np.isnan(X)).sum(axis=1)
+    parts = np.where(n[:, None] > 0, np.nan_to_num(X) / np.maximum(n, 1)[:, None], np.nan)
+    return pd.DataFrame(parts, columns=[f"{prefix}:{c}" for c in cols], index=df.index)
+
+
+def save_group_stats(stats, path):
+    stats.to_csv(path, index=False)
+
+
+def load_group_stats(path):
+    return pd.read_csv(path, dtype={"Group": str})
@@ -0,0 +1,34 @@
+# ======================================
+# Teams: one team-code convention and the DVOA loader that applies it
+# ======================================
+# PFF and DVOA exports disagree on a handful of abbreviations. Every stage that
+# joins players to teams maps both sides onto the same codes first: Arizona
+# ARI, Baltimore BAL, Cleveland CLE, Houston HOU, the Rams LAR, San Francisco SF.
+
+import pandas as pd
+
+from dtypes import recode
+
+TEAM_FIX = {"ARZ": "ARI", "BLT": "BAL", "CLV": "CLE", "HST": "HOU", "LA": "LAR", "SFO": "SF"}
+
+DVOA_COLS = {
+    "off": {"TEAM": "Team", "DVOA": "OffensiveDVOA", "OFF": "OffensiveDVOA",
+            "PASS": "PassDVOA", "RUSH": "RushDVOA"},
+    "def": {"TEAM": "Team", "DVOA": "DefensiveDVOA",
+            "PASS": "PassDefenseDVOA", "RUSH": "RushDefenseDVOA"},
+}
+
+
+def fix_teams(s):
+    """Team labels (plain or categorical) on the TEAM_FIX codes."""
+    return recode(s, TEAM_FIX)
+
+
+def load_dvoa(path, side):
+    """Team + the side's DVOA / pass / rush columns from a DVOA (or DVOA proxy) export, team codes fixed."""
+    rename = DVOA_COLS[side]
+    dvoa = pd.read_csv(path)
+    dvoa.columns = dvoa.columns.str.strip().str.upper()
+    dvoa = dvoa.rename(columns=rename)[list(dict.fromkeys(rename.values()))]
+    dvoa["Team"] = fix_teams(dvoa["Team"])
+    return dvoa
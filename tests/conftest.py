@@ -0,0 +1,5 @@
+# The pipeline modules live at the repo root (the Part scripts import them via sys.path[0])
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from one_metric import ALPHAS, ridge_svd
+
+linear_model = pytest.importorskip("sklearn.linear_model")
+
+
+def _teams(seed, n=32, k=7):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, k)) * rng.uniform(0.5, 3.0, k) + rng.normal(size=k)
+    Y = X @ rng.normal(size=(k, 3)) + rng.normal(scale=rng.uniform(0.5, 8.0), size=(n, 3))
+    return X, Y
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_ridge_svd_matches_ridgecv(seed):
+    X, Y = _teams(seed)
+    fit = ridge_svd(X, Y, ALPHAS)
+    Z = (X - X.mean(axis=0)) / X.std(axis=0)
+    for j in range(Y.shape[1]):
+        ref = linear_model.RidgeCV(alphas=ALPHAS).fit(Z, Y[:, j])
+        assert fit["alpha"][j] == ref.alpha_
+        np.testing.assert_allclose(fit["beta_std"][:, j], ref.coef_, rtol=1e-8, atol=1e-10)
+        np.testing.assert_allclose(fit["fitted"][:, j], ref.predict(Z), rtol=1e-8)
+
+
+def test_ridge_svd_flags_alpha_at_grid_edge():
+    rng = np.random.default_rng(3)      # signal target lands inside the grid, pure noise at its top
+    X = rng.normal(size=(32, 7))
+    Y = np.column_stack([X @ rng.normal(size=7) * 5 + rng.normal(size=32), rng.normal(size=32)])
+    fit = ridge_svd(X, Y, ALPHAS)
+    assert not fit["at_edge"][0]
+    assert fit["at_edge"][1] and fit["alpha"][1] == ALPHAS[-1]
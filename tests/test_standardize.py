@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from standardize import apply_group_stats, group_zscore, load_group_stats, save_group_stats
+
+
+def _domain(seed, n=120):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "PositionGroup": rng.choice(["QB", "RB", "WR", "OL"], n),
+        "PFF_OffenseGrade": rng.normal(65, 10, n),      # shared by both domains, as in Part 2
+        "Feature": rng.normal(size=n),
+    })
+
+
+def test_saved_stats_reload_per_domain(tmp_path):
+    cols = ["PFF_OffenseGrade", "Feature"]
+    frames = {"Air": _domain(0), "Rush": _domain(1)}
+    fitted, stats = {}, []
+    for dom, df in frames.items():
+        fitted[dom], s = group_zscore(df, cols, "PositionGroup", min_group=10)
+        stats.append(s.assign(Domain=dom))
+    path = tmp_path / "stats.csv"
+    save_group_stats(pd.concat(stats, ignore_index=True), path)
+
+    reloaded = load_group_stats(path)
+    for dom, df in frames.items():
+        again = apply_group_stats(df, cols, reloaded, "PositionGroup", domain=dom)
+        np.testing.assert_allclose(again, fitted[dom], atol=1e-9)
+
+
+def test_multi_domain_stats_need_domain(tmp_path):
+    cols = ["PFF_OffenseGrade"]
+    stats = pd.concat([group_zscore(_domain(i), cols, "PositionGroup")[1].assign(Domain=d)
+                       for i, d in enumerate(["Air", "Rush"])], ignore_index=True)
+    with pytest.raises(ValueError, match="domain"):
+        apply_group_stats(_domain(0), cols, stats, "PositionGroup")
+
+
+def test_unseen_group_uses_league_row():
+    df = _domain(2)
+    _, stats = group_zscore(df, ["Feature"], "PositionGroup")
+    new = pd.DataFrame({"PositionGroup": ["K"], "Feature": [1.0]})
+    league = stats[stats["Group"] == "__league__"].iloc[0]
+    z = apply_group_stats(new, ["Feature"], stats, "PositionGroup")
+    assert z[0, 0] == pytest.approx((1.0 - league["Mean"]) / league["Std"])
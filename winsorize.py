@@ -0,0 +1,187 @@
+# ======================================
+# Winsorize: shared [lo, hi] quantile clipping for score columns
+# ======================================
+# Exact bounds: one np.partition over all columns selects the two order
+# statistics around each quantile (linear interpolation, same numbers as
+# Series.quantile), then one clip writes every column back.
+#
+# Streaming bounds: QuantileSketch keeps a merging t-digest per column.
+# Centroids are re-bucketed on the arcsine scale k(q) = δ/2π · asin(2q − 1),
+# so the tails (where 1%/99% live) stay at near-singleton resolution while the
+# middle compresses hard. Sketches from chunks, seasons or machines merge by
+# concatenating centroids, and save/load as a small CSV so a new week of data
+# can be clipped against history without rescanning it.
+#
+# Exact streaming bounds: TailQuantiles keeps only the k smallest and largest
+# values per column (k ≈ 1% of the rows), which is all the 1%/99% order
+# statistics need, so chunked or partitioned runs clip at exactly the bounds
+# exact_bounds would give over the whole table.
+
+import numpy as np
+import pandas as pd
+
+CLIP_LO, CLIP_HI = 0.01, 0.99
+COMPRESSION = 500     # t-digest δ: ~δ/2 centroids per column (rank error ~1e-4 at 1%)
+
+
+def exact_bounds(X, lo=CLIP_LO, hi=CLIP_HI):
+    """(lower, upper) quantile per column of X, by selection rather than a full sort."""
+    X = np.asarray(X, dtype=float)
+    if np.isnan(X).any():
+        return tuple(np.nanquantile(X, [lo, hi], axis=0))
+    n = X.shape[0]
+    if n == 0:          # nothing to clip: NaN bounds, as Series.quantile gives
+        return np.full(X.shape[1:], np.nan), np.full(X.shape[1:], np.nan)
+    pos = np.array([lo, hi]) * (n - 1)
+    below, above = np.floor(pos).astype(int), np.ceil(pos).astype(int)
+    part = np.partition(X, np.unique(np.r_[below, above]), axis=0)
+    frac = (pos - below)[:, None]
+    q = part[below] * (1 - frac) + part[above] * frac
+    return q[0], q[1]
+
+
+class QuantileSketch:
+    """Mergeable per-column t-digest for streaming / multi-season quantiles."""
+
+    def __init__(self, compression=COMPRESSION):
+        self.compression = compression
+        self.centroids = {}      # column → (means, weights)
+        self.extrema = {}        # column → (min, max)
+
+    # ---------- Building ----------
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q_mid = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        bucket = np.floor(k - k[0]).astype(int)
+        w = np.bincount(bucket, weights=weights)
+        m = np.bincount(bucket, weights=weights * means)
+        keep = w > 0
+        return m[keep] / w[keep], w[keep]
+
+    def _add(self, col, means, weights, lo, hi):
+        if col in self.centroids:
+            old_m, old_w = self.centroids[col]
+            means, weights = np.r_[old_m, means], np.r_[old_w, weights]
+            old_lo, old_hi = self.extrema[col]
+            lo, hi = min(lo, old_lo), max(hi, old_hi)
+        self.centroids[col] = self._compress(means, weights)
+        self.extrema[col] = (lo, hi)
+
+    def update(self, df, cols):
+        """Fold a chunk of rows into the sketch (NaNs ignored)."""
+        for c in cols:
+            v = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)
+            v = v[~np.isnan(v)]
+            if len(v):
+                self._add(c, v, np.ones(len(v)), v.min(), v.max())
+        return self
+
+    def merge(self, other):
+        """Combine another sketch (another chunk, season or worker) into this one."""
+        for c, (m, w) in other.centroids.items():
+            self._add(c, m, w, *other.extrema[c])
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks, cols, compression=COMPRESSION):
+        """Sketch built from an iterable of DataFrames, e.g. pd.read_csv(..., chunksize=...)."""
+        sk = cls(compression)
+        for chunk in chunks:
+            sk.update(chunk, cols)
+        return sk
+
+    # ---------- Queries ----------
+    def quantile(self, col, q):
+        """Interpolated quantile(s) of one column."""
+        m, w = self.centroids[col]
+        lo, hi = self.extrema[col]
+        mid = np.cumsum(w) - w / 2
+        x = np.r_[0.0, mid, w.sum()]
+        y = np.r_[lo, m, hi]
+        return np.interp(np.asarray(q, dtype=float) * w.sum(), x, y)
+
+    def bounds(self, cols, lo=CLIP_LO, hi=CLIP_HI):
+        q = np.array([self.quantile(c, [lo, hi]) for c in cols])
+        return q[:, 0], q[:, 1]
+
+    # ---------- Persistence ----------
+    def save(self, path):
+        rows = [pd.DataFrame({"Column": c, "Mean": m, "Weight": w,
+                              "Min": self.extrema[c][0], "Max": self.extrema[c][1]})
+                for c, (m, w) in self.centroids.items()]
+        out = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(
+            columns=["Column", "Mean", "Weight", "Min", "Max"])
+        out.to_csv(path, index=False)
+
+    @classmethod
+    def load(cls, path, compression=COMPRESSION):
+        sk = cls(compression)
+        for c, g in pd.read_csv(path).groupby("Column", sort=False):
+            sk.centroids[c] = (g["Mean"].to_numpy(dtype=float), g["Weight"].to_numpy(dtype=float))
+            sk.extrema[c] = (float(g["Min"].iloc[0]), float(g["Max"].iloc[0]))
+        return sk
+
+
+class TailQuantiles:
+    """Exact lo/hi quantiles over streamed chunks, keeping only each column's tails.
+
+    `rows` is an upper bound on the total row count; it sizes the tails.
+    Same update / bounds interface as QuantileSketch.
+    """
+
+    def __init__(self, rows, lo=CLIP_LO, hi=CLIP_HI):
+        self.k = int(np.ceil(max(lo, 1 - hi) * max(rows - 1, 0))) + 2
+        self.low, self.high, self.n = {}, {}, {}
+
+    def update(self, df, cols):
+        """Fold a chunk of rows in (NaNs ignored)."""
+        for c in cols:
+            v = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)
+            v = v[~np.isnan(v)]
+            low, high = np.r_[self.low.get(c, []), v], np.r_[self.high.get(c, []), v]
+            k = min(self.k, len(low))
+            self.low[c] = np.sort(np.partition(low, k - 1)[:k]) if k else low
+            self.high[c] = np.sort(np.partition(high, len(high) - k)[len(high) - k:]) if k else high
+            self.n[c] = self.n.get(c, 0) + len(v)
+        return self
+
+    def _rank(self, col, r):
+        n, low, high = self.n[col], self.low[col], self.high[col]
+        if r < len(low):
+            return low[r]
+        if n - r <= len(high):
+            return high[len(high) - (n - r)]
+        raise ValueError(f"rank {r} of {col!r} is outside the kept tails (rows={n}, k={self.k})")
+
+    def quantile(self, col, q):
+        """Linearly interpolated quantile(s) of one column, as Series.quantile."""
+        n = self.n.get(col, 0)
+        out = []
+        for p in np.atleast_1d(q):
+            if n == 0:
+                out.append(np.nan)
+                continue
+            pos = p * (n - 1)
+            b, a = int(np.floor(pos)), int(np.ceil(pos))
+            out.append(self._rank(col, b) * (1 - (pos - b)) + self._rank(col, a) * (pos - b))
+        return np.array(out)
+
+    def bounds(self, cols, lo=CLIP_LO, hi=CLIP_HI):
+        q = np.array([self.quantile(c, [lo, hi]) for c in cols]).reshape(len(cols), 2)
+        return q[:, 0], q[:, 1]
+
+
+def winsorize(df, cols, lo=CLIP_LO, hi=CLIP_HI, sketch=None):
+    """Clip every column to its [lo, hi] quantiles in one pass (in place).
+
+    Bounds are exact over df unless a QuantileSketch (or TailQuantiles) is
+    given, in which case its (e.g. multi-season, persisted, streamed) bounds
+    are used.
+    """
+    X = df[cols].to_numpy(dtype=float)
+    lower, upper = sketch.bounds(cols, lo, hi) if sketch is not None else exact_bounds(X, lo, hi)
+    df[cols] = np.clip(X, lower, upper)
+    return df